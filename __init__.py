@@ -2,18 +2,24 @@ from nonebot import get_driver
 from nonebot.plugin import PluginMetadata
 from nonebot_plugin_apscheduler import scheduler
 
+from zhenxun.configs.config import Config
 from zhenxun.configs.utils import Command, PluginExtraData, RegisterConfig
 from zhenxun.services.log import logger
 from zhenxun.utils.message import MessageUtils
 
+from . import config
 from .command import diuse_farm, diuse_register, reclamation
 from .database.database import g_pSqlManager
 from .dbService import g_pDBService
 from .event.event import g_pEventManager
 from .farm.farm import g_pFarmManager
+from .farm.help import g_pHelpManager
+from .farm.notify import g_pRipeNotifyManager
 from .farm.shop import g_pShopManager
+from .farm.stealIndex import g_pStealIndexManager
 from .json import g_pJsonManager
 from .request import g_pRequestManager
+from .startup import g_pStartupManager
 
 __plugin_meta__ = PluginMetadata(
     name="真寻农场",
@@ -34,11 +40,15 @@ __plugin_meta__ = PluginMetadata(
         我的作物
         出售作物 [作物/种子名称] [数量] (不填写作物名将售卖仓库种全部作物 填作物名不填数量将指定作物全部出售
         偷菜 at (每人每天只能偷5次
+        随机偷菜 (在本群已成熟的农场中随机挑选一位偷取
+        开启成熟提醒 / 关闭成熟提醒 (作物成熟后在本群提醒
         开垦
         购买农场币 [数量] 数量为消耗金币的数量
         更改农场名 [新农场名]
         农场签到
+        签到日历
         土地升级 [地块ID]（通过农场详述获取）
+        农场帮助
     """.strip(),
     extra=PluginExtraData(
         author="Art_Sakura",
@@ -76,6 +86,48 @@ __plugin_meta__ = PluginMetadata(
                 help="签到、交易行、活动等服务器地址",
                 default_value="http://diuse.work",
             ),
+            RegisterConfig(
+                key="离线模式",
+                value=False,
+                help="开启后不再访问服务地址，仅使用本地已有的签到文件与作物数据",
+                default_value=False,
+                type=bool,
+            ),
+            RegisterConfig(
+                key="成熟提醒合并时间",
+                value=300,
+                help="作物成熟提醒的合并时间（秒），期间成熟的作物会合并为一条群消息",
+                default_value=300,
+                type=int,
+            ),
+            RegisterConfig(
+                key="签到记录保留月数",
+                value=6,
+                help="逐日签到记录保留的月数（含当月），更早的记录会被压缩为按月汇总，0为不压缩",
+                default_value=6,
+                type=int,
+            ),
+            RegisterConfig(
+                key="农场缓存用户数",
+                value=500,
+                help="内存中缓存地块与用户信息的最大用户数，超出时淘汰最久未使用的用户，0为不缓存",
+                default_value=500,
+                type=int,
+            ),
+            RegisterConfig(
+                key="数据库迁移预估",
+                value=False,
+                help="开启后启动时只统计待执行的数据库迁移及预计耗时并输出到日志，不修改数据库，插件不会启动",
+                default_value=False,
+                type=bool,
+            ),
+            RegisterConfig(
+                key="数据库备份保留份数",
+                value=7,
+                help="每日数据库维护时在线备份 farm.db 并保留最近的份数，0为不备份",
+                default_value=7,
+                type=int,
+            ),
         ],
     ).to_dict(),
 )
@@ -86,20 +138,71 @@ driver = get_driver()
 @driver.on_startup
 async def start():
     # 初始化数据库
-    await g_pSqlManager.init()
+    g_pStartupManager.addStep("数据库连接", g_pSqlManager.init)
+
+    # 初始化读取Json，配置文件有误时直接终止启动，避免在指令执行中途才出错
+    g_pStartupManager.addStep("配置文件", g_pJsonManager.init)
+
+    # 作物数据库使用独立连接，与用户数据表并发初始化
+    g_pStartupManager.addStep("作物数据库", g_pDBService.initPlant)
+    g_pStartupManager.addStep(
+        "用户数据表", g_pDBService.initUserTables, depends=("数据库连接",)
+    )
+
+    # 随机偷菜使用的群内可偷地块索引
+    g_pStartupManager.addStep(
+        "偷菜索引", g_pStealIndexManager.load, depends=("用户数据表",), critical=False
+    )
+
+    # 作物成熟提醒的定时器
+    g_pStartupManager.addStep(
+        "成熟提醒", g_pRipeNotifyManager.load, depends=("用户数据表",), critical=False
+    )
+
+    # 监听配置文件变更，修改后无需重启
+    g_pStartupManager.addStep(
+        "配置监听", g_pJsonManager.startWatch, depends=("配置文件",), critical=False
+    )
 
-    # 初始化读取Json
-    await g_pJsonManager.init()
+    # 签到文件与作物文件的检查更新需要访问服务端，放到后台进行，不阻塞启动
+    g_pStartupManager.addStep(
+        "签到文件更新",
+        g_pJsonManager.initSignInFile,
+        depends=("配置文件",),
+        critical=False,
+        background=True,
+    )
+    g_pStartupManager.addStep(
+        "作物文件更新",
+        g_pRequestManager.initPlantDBFile,
+        depends=("作物数据库",),
+        critical=False,
+        background=True,
+    )
 
-    await g_pDBService.init()
+    # 预先渲染帮助图片，帮助指令只需读取缓存文件
+    g_pStartupManager.addStep(
+        "帮助图片", g_pHelpManager.createHelpImage, critical=False, background=True
+    )
 
-    # 检查作物文件是否缺失 or 更新
-    await g_pRequestManager.initPlantDBFile()
+    if not await g_pStartupManager.run():
+        # 步骤主动终止（如数据库迁移预估）时只停止本插件，不中断整个 bot 的启动
+        if g_pStartupManager.m_sStopReason:
+            logger.info(f"真寻农场未启动：{g_pStartupManager.m_sStopReason}")
+            return
+
+        raise RuntimeError("真寻农场启动失败，请检查数据库与 config 目录")
 
 
 # 析构函数
 @driver.on_shutdown
 async def shutdown():
+    g_pJsonManager.stopWatch()
+
+    g_pRipeNotifyManager.stop()
+
+    await g_pHelpManager.closeBrowser()
+
     await g_pSqlManager.cleanup()
 
     await g_pDBService.cleanup()
@@ -107,8 +210,42 @@ async def shutdown():
 
 @scheduler.scheduled_job(trigger="cron", hour=4, minute=30, id="signInFile")
 async def signInFile():
+    # 插件未就绪（启动失败或仅预估数据库迁移）时不修改数据库
+    if not config.g_bReady:
+        return
+
     try:
         await g_pJsonManager.initSignInFile()
         await g_pRequestManager.initPlantDBFile()
+
+        # 清理已重新种植或生长的地块上遗留的偷菜记录
+        await g_pDBService.userSteal.pruneStealRecords()
     except Exception as e:
         logger.error("农场定时检查出错", e=e)
+
+
+@scheduler.scheduled_job(trigger="cron", hour=4, minute=40, id="signLogRollup")
+async def signLogRollup():
+    # 插件未就绪（启动失败或仅预估数据库迁移）时不修改数据库
+    if not config.g_bReady:
+        return
+
+    try:
+        retainMonths = Config.get_config("zhenxun_plugin_farm", "签到记录保留月数")
+        await g_pDBService.userSign.rollupSignLog(int(retainMonths or 0))
+    except Exception as e:
+        logger.error("农场签到记录压缩出错", e=e)
+
+
+@scheduler.scheduled_job(trigger="cron", hour=4, minute=50, id="dbMaintenance")
+async def dbMaintenance():
+    # 插件未就绪（启动失败或仅预估数据库迁移）时不修改数据库
+    if not config.g_bReady:
+        return
+
+    # 在偷菜记录清理与签到记录压缩之后执行，回收其释放的空间
+    try:
+        keepBackups = Config.get_config("zhenxun_plugin_farm", "数据库备份保留份数")
+        await g_pDBService.maintenance.runMaintenance(int(keepBackups or 0))
+    except Exception as e:
+        logger.error("农场数据库维护出错", e=e)
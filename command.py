@@ -1,6 +1,7 @@
 import inspect
 
 from nonebot.adapters import Event
+from nonebot.permission import SUPERUSER
 from nonebot.rule import to_me
 from nonebot_plugin_alconna import (
     Alconna,
@@ -22,10 +23,15 @@ from zhenxun.configs.config import BotConfig
 from zhenxun.services.log import logger
 from zhenxun.utils.message import MessageUtils
 
-from .config import g_bSignStatus, g_sTranslation
+from . import config
+from .config import g_sTranslation
+from .database.farmCache import g_pFarmCache, g_pUserCache
 from .dbService import g_pDBService
 from .farm.farm import g_pFarmManager
+from .farm.help import g_pHelpManager
+from .farm.notify import g_pRipeNotifyManager
 from .farm.shop import g_pShopManager
+from .farm.stealIndex import g_pStealIndexManager
 from .json import g_pJsonManager
 from .tool import g_pToolManager
 
@@ -40,10 +46,11 @@ diuse_register = on_alconna(
 
 @diuse_register.handle()
 async def handle_register(session: Uninfo):
-    uid = str(session.user.id)
-    user = await g_pDBService.user.getUserInfoByUid(uid)
+    if not await g_pToolManager.isReady():
+        return
 
-    if user:
+    uid = str(session.user.id)
+    if await g_pDBService.user.isUserExist(uid):
         await MessageUtils.build_message(g_sTranslation["register"]["repeat"]).send(
             reply_to=True
         )
@@ -89,13 +96,17 @@ diuse_farm = on_alconna(
         Subcommand("unlock-plant", Args["name?", str], help_text="作物解锁"),
         Subcommand("sell-plant", Args["name?", str]["num?", int], help_text="出售作物"),
         Subcommand("stealing", Args["target?", At], help_text="偷菜"),
+        Subcommand("random-stealing", help_text="随机偷菜"),
+        Subcommand("ripe-notify", Args["switch", str], help_text="成熟提醒"),
         Subcommand("buy-point", Args["num?", int], help_text="购买农场币"),
         # Subcommand("sell-point", Args["num?", int], help_text="转换金币")
         Subcommand("change-name", Args["name?", str], help_text="更改农场名"),
         Subcommand("sign-in", help_text="农场签到"),
+        Subcommand("sign-calendar", help_text="签到日历"),
         Subcommand("admin-up", Args["num?", int], help_text="农场下阶段"),
         Subcommand("point-to-vipPoint", Args["num?", int], help_text="点券兑换"),
         Subcommand("my-vipPoint", help_text="我的点券"),
+        Subcommand("help", help_text="农场帮助"),
     ),
     priority=5,
     block=True,
@@ -110,6 +121,8 @@ async def _(session: Uninfo):
     if not await g_pToolManager.isRegisteredByUid(uid):
         return
 
+    await g_pStealIndexManager.recordSession(session, uid)
+
     image = await g_pFarmManager.drawFarmByUid(uid)
     await MessageUtils.build_message(image).send(reply_to=True)
 
@@ -271,6 +284,8 @@ async def _(
     if not await g_pToolManager.isRegisteredByUid(uid):
         return
 
+    await g_pStealIndexManager.recordSession(session, uid)
+
     result = await g_pFarmManager.sowing(uid, name.result, num.result)
     await MessageUtils.build_message(result).send(reply_to=True)
 
@@ -290,6 +305,8 @@ async def _(session: Uninfo):
     if not await g_pToolManager.isRegisteredByUid(uid):
         return
 
+    await g_pStealIndexManager.recordSession(session, uid)
+
     result = await g_pFarmManager.harvest(uid)
     await MessageUtils.build_message(result).send(reply_to=True)
 
@@ -456,10 +473,96 @@ async def _(session: Uninfo, target: Match[At]):
         ).send()
         return None
 
+    await g_pStealIndexManager.recordSession(session, uid)
+
     result = await g_pFarmManager.stealing(uid, tar.target)
     await MessageUtils.build_message(result).send(reply_to=True)
 
 
+diuse_farm.shortcut(
+    "随机偷菜",
+    command="我的农场",
+    arguments=["random-stealing"],
+    prefix=True,
+)
+
+
+@diuse_farm.assign("random-stealing")
+async def _(session: Uninfo):
+    uid = str(session.user.id)
+
+    if not await g_pToolManager.isRegisteredByUid(uid):
+        return
+
+    if not session.scene.is_group:
+        await MessageUtils.build_message(g_sTranslation["stealing"]["notGroup"]).send(
+            reply_to=True
+        )
+        return
+
+    await g_pStealIndexManager.recordSession(session, uid)
+
+    target = g_pStealIndexManager.pickTarget(str(session.scene.id), uid)
+    if target is None:
+        await MessageUtils.build_message(
+            g_sTranslation["stealing"]["noRandomTarget"]
+        ).send(reply_to=True)
+        return
+
+    targetInfo = await g_pDBService.user.getUserInfoByUid(target)
+    result = await g_pFarmManager.stealing(uid, target)
+    await MessageUtils.build_message(
+        g_sTranslation["stealing"]["randomTarget"].format(
+            name=targetInfo.name if targetInfo else target
+        )
+        + "\n"
+        + result
+    ).send(reply_to=True)
+
+
+diuse_farm.shortcut(
+    "开启成熟提醒",
+    command="我的农场",
+    arguments=["ripe-notify", "on"],
+    prefix=True,
+)
+
+diuse_farm.shortcut(
+    "关闭成熟提醒",
+    command="我的农场",
+    arguments=["ripe-notify", "off"],
+    prefix=True,
+)
+
+
+@diuse_farm.assign("ripe-notify")
+async def _(session: Uninfo, switch: Match[str]):
+    uid = str(session.user.id)
+
+    if not await g_pToolManager.isRegisteredByUid(uid):
+        return
+
+    if not session.scene.is_group:
+        await MessageUtils.build_message(
+            g_sTranslation["ripeNotify"]["notGroup"]
+        ).send(reply_to=True)
+        return
+
+    enable = switch.result == "on"
+    groupId = str(session.scene.id)
+
+    await g_pStealIndexManager.recordSession(session, uid)
+    if not await g_pRipeNotifyManager.subscribe(uid, groupId, enable):
+        await MessageUtils.build_message(g_sTranslation["ripeNotify"]["error"]).send(
+            reply_to=True
+        )
+        return
+
+    await MessageUtils.build_message(
+        g_sTranslation["ripeNotify"]["on" if enable else "off"]
+    ).send(reply_to=True)
+
+
 diuse_farm.shortcut(
     "购买农场币(.*?)",
     command="我的农场",
@@ -540,42 +643,45 @@ async def _(session: Uninfo):
         return
 
     # 判断签到是否正常加载
-    if not g_bSignStatus:
+    if not config.g_bSignStatus:
         await MessageUtils.build_message(g_sTranslation["signIn"]["error"]).send()
 
         return
 
     toDay = g_pToolManager.dateTime().date().today()
     message = ""
-    status = await g_pDBService.userSign.sign(uid, toDay.strftime("%Y-%m-%d"))
+    result = await g_pDBService.userSign.signIn(uid, toDay.strftime("%Y-%m-%d"))
+    status = result["status"]
 
     # 如果完成签到
     if status == 1 or status == 2:
-        # 获取签到总天数
-        signDay = await g_pDBService.userSign.getUserSignCountByDate(
-            uid, toDay.strftime("%Y-%m")
-        )
-        exp, point = await g_pDBService.userSign.getUserSignRewardByDate(
-            uid, toDay.strftime("%Y-%m-%d")
-        )
+        signDay = result["monthSignDays"]
+
+        if status == 1:
+            exp, point = result["exp"], result["point"]
+            reward = result["reward"]
+        else:
+            # 重复签到时展示当天的签到结果
+            exp, point = await g_pDBService.userSign.getUserSignRewardByDate(
+                uid, toDay.strftime("%Y-%m-%d")
+            )
+            reward = g_pJsonManager.m_pSign.reward(signDay)
 
         message += g_sTranslation["signIn"]["success"].format(
             day=signDay, exp=exp, num=point
         )
 
-        reward = g_pJsonManager.m_pSign["continuou"].get(f"{signDay}", None)
-
         if reward:
-            extraPoint = reward.get("point", 0)
-            extraExp = reward.get("exp", 0)
+            extraPoint = reward.point
+            extraExp = reward.exp
 
-            plant = reward.get("plant", {})
+            plant = reward.plant
 
             message += g_sTranslation["signIn"]["grandTotal"].format(
                 exp=extraExp, num=extraPoint
             )
 
-            vipPoint = reward.get("vipPoint", 0)
+            vipPoint = reward.vipPoint
 
             if vipPoint > 0:
                 message += g_sTranslation["signIn"]["grandTotal1"].format(num=vipPoint)
@@ -593,6 +699,33 @@ async def _(session: Uninfo):
     # await MessageUtils.alc_forward_msg([info], session.self_id, BotConfig.self_nickname).send(reply_to=True)
 
 
+diuse_farm.shortcut(
+    "签到日历",
+    command="我的农场",
+    arguments=["sign-calendar"],
+    prefix=True,
+)
+
+
+@diuse_farm.assign("sign-calendar")
+async def _(session: Uninfo):
+    uid = str(session.user.id)
+
+    if not await g_pToolManager.isRegisteredByUid(uid):
+        return
+
+    toDay = g_pToolManager.dateTime().date().today()
+    image = await g_pDBService.userSign.drawSignCalendarImage(
+        uid, toDay.year, toDay.month
+    )
+
+    if not image:
+        await MessageUtils.build_message(g_sTranslation["signIn"]["error"]).send()
+        return
+
+    await MessageUtils.build_message(image).send(reply_to=True)
+
+
 soil_upgrade = on_alconna(
     Alconna("土地升级", Args["index", int]),
     priority=5,
@@ -693,3 +826,104 @@ async def _(session: Uninfo):
     await MessageUtils.build_message(
         g_sTranslation["basic"]["vipPoint"].format(vipPoint=vipPoint)
     ).send(reply_to=True)
+
+
+diuse_farm.shortcut(
+    "农场帮助",
+    command="我的农场",
+    arguments=["help"],
+    prefix=True,
+)
+
+
+@diuse_farm.assign("help")
+async def _(session: Uninfo):
+    if not await g_pToolManager.isReady():
+        return
+
+    image = await g_pHelpManager.getHelpImage()
+    if image is None:
+        await MessageUtils.build_message("农场帮助图片生成失败，请稍后再试").send()
+        return
+
+    await MessageUtils.build_message(image).send(reply_to=True)
+
+
+diuse_metrics = on_alconna(
+    Alconna("农场统计"),
+    permission=SUPERUSER,
+    priority=5,
+    block=True,
+    use_cmd_start=True,
+)
+
+
+@diuse_metrics.handle()
+async def _():
+    if not await g_pToolManager.isReady():
+        return
+
+    steal = await g_pDBService.userSteal.getStealStats()
+    lines = [
+        "真寻农场数据统计",
+        f"偷菜记录：{steal['rows']}条（偷菜者{steal['stealers']}人，"
+        f"地块{steal['plots']}块）",
+    ]
+
+    lastPrune = g_pDBService.userSteal.m_pLastPrune
+    if lastPrune:
+        remain = lastPrune["before"] - lastPrune["pruned"]
+        pruneTime = g_pToolManager.dateTime().fromtimestamp(lastPrune["time"])
+        lines.append(
+            f"上次清理：{pruneTime.strftime('%Y-%m-%d %H:%M')} "
+            f"清理{lastPrune['pruned']}条，此后新增{steal['rows'] - remain}条"
+        )
+
+    maintenance = g_pDBService.maintenance.m_pLastReport
+    if maintenance:
+        maintenanceTime = g_pToolManager.dateTime().fromtimestamp(maintenance["time"])
+        backup = maintenance["backup"]
+        lines.append(
+            f"上次维护：{maintenanceTime.strftime('%Y-%m-%d %H:%M')} "
+            f"耗时{maintenance['elapsed']:.1f}秒，"
+            f"文件{maintenance['after']['size'] / 1024 / 1024:.1f}MB，"
+            f"完整性检查{'未通过' if maintenance['problems'] else '正常'}，"
+            f"备份{'成功' if backup else '未完成'}"
+        )
+
+    for name, cache in (("地块缓存", g_pFarmCache), ("用户缓存", g_pUserCache)):
+        stats = cache.getStats()
+        total = stats["hit"] + stats["miss"]
+        hitRate = stats["hit"] / total * 100 if total else 0
+        lines.append(
+            f"{name}：{stats['users']}/{stats['capacity']}人，命中率{hitRate:.1f}%"
+            f"（{stats['hit']}/{total}），淘汰{stats['evict']}次"
+        )
+
+    await MessageUtils.build_message("\n".join(lines)).send(reply_to=True)
+
+
+diuse_cacheCheck = on_alconna(
+    Alconna("农场缓存校验"),
+    permission=SUPERUSER,
+    priority=5,
+    block=True,
+    use_cmd_start=True,
+)
+
+
+@diuse_cacheCheck.handle()
+async def _():
+    if not await g_pToolManager.isReady():
+        return
+
+    users = len(g_pFarmCache.m_pItems)
+    mismatched = await g_pDBService.userSoil.verifyFarmCache()
+    if mismatched:
+        text = f"已校验{users}人，{len(mismatched)}人不一致并已移出缓存：" + "、".join(
+            mismatched[:20]
+        )
+    else:
+        text = f"已校验{users}人，地块缓存与数据库一致"
+
+    await MessageUtils.build_message(text).send(reply_to=True)
@@ -5,6 +5,9 @@ from zhenxun.configs.path_config import DATA_PATH
 # 签到状态
 g_bSignStatus = True
 
+# 插件是否启动完毕 启动完成前不处理指令
+g_bReady = False
+
 # 是否处于Debug模式
 g_bIsDebug = False
 
@@ -14,12 +17,21 @@ g_sDBPath = DATA_PATH / "farm_db"
 # 数据库文件路径
 g_sDBFilePath = DATA_PATH / "farm_db/farm.db"
 
+# 服务端 GET 响应缓存路径
+g_sHttpCachePath = DATA_PATH / "farm_db/http_cache.json"
+
 # 农场资源文件目录
 g_sResourcePath = Path(__file__).resolve().parent / "resource"
 
 # 农场作物数据库
 g_sPlantPath = g_sResourcePath / "db/plant.db"
 
+# 农场资源清单本地缓存 记录已校验的资源文件 path -> size/sha256
+g_sManifestPath = g_sResourcePath / "db/manifest.json"
+
+# 参与清单同步的资源目录
+g_sManifestDirs = ("plant", "soil", "background")
+
 # 农场配置文件目录
 g_sConfigPath = Path(__file__).resolve().parent / "config"
 
@@ -33,6 +45,7 @@ g_iSoilLevelMax = 3
 g_sTranslation = {
     "basic": {
         "notFarm": "尚未开通农场，快at我发送 开通农场 开通吧 🌱🚜",
+        "notReady": "农场正在启动中，请稍后再试 ⏳",
         "point": "你的当前农场币为: {point} 🌾💰",
         "vipPoint": "你的当前点券为: {vipPoint} 🌾💰",
     },
@@ -97,6 +110,15 @@ g_sTranslation = {
         "info": "🤫 成功偷到作物：{name}，数量为：{num} 🍒",
         "noPlant": "🌱 目标没有作物可以被偷 🌾",
         "repeat": "🚫 你已经偷过目标啦，请手下留情 🙏",
+        "notGroup": "👥 随机偷菜只能在群聊中使用",
+        "noRandomTarget": "🌱 群里暂时没有成熟的作物可以偷，晚点再来吧 🌾",
+        "randomTarget": "🎲 随机来到了农场：{name}",
+    },
+    "ripeNotify": {
+        "notGroup": "👥 成熟提醒只能在群聊中设置",
+        "on": "⏰ 已开启本群的作物成熟提醒，作物成熟后会在群里提醒你 🌾",
+        "off": "🔕 已关闭本群的作物成熟提醒",
+        "error": "❌ 设置成熟提醒失败，请稍后再试 💔",
     },
     "changeName": {
         "noName": "✏️ 请在指令后跟需要更改的农场名",
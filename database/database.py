@@ -8,6 +8,7 @@ import aiosqlite
 from zhenxun.services.log import logger
 
 from ..config import g_sDBFilePath, g_sDBPath
+from ..event.event import g_pEventManager
 
 
 class CSqlManager:
@@ -54,26 +55,52 @@ class CSqlManager:
         except aiosqlite.Error:
             return []
 
+    # 字段定义中类型之后的约束关键字
+    m_pConstraintPattern = re.compile(
+        r"\s+(?:NOT|NULL|DEFAULT|PRIMARY|UNIQUE|CHECK|REFERENCES|COLLATE|GENERATED)\b"
+    )
+
+    @classmethod
+    def columnType(cls, definition: str) -> str:
+        """字段定义中的类型部分，与 PRAGMA table_info 返回的类型一致"""
+        return cls.m_pConstraintPattern.split(definition.upper(), maxsplit=1)[0].strip()
+
+    @classmethod
+    def canAddColumn(cls, definition: str) -> bool:
+        """字段能否通过 ALTER TABLE ADD COLUMN 添加"""
+        definition = definition.upper()
+        if "PRIMARY KEY" in definition or "UNIQUE" in definition:
+            return False
+
+        # 不能使用表达式或当前时间作为默认值
+        if re.search(r"DEFAULT\s*\(|DEFAULT\s+CURRENT_", definition):
+            return False
+
+        return "NOT NULL" not in definition or "DEFAULT" in definition
+
     @classmethod
     async def ensureTableSchema(cls, tableName: str, columns: dict) -> bool:
-        """由AI生成
-        创建表或为已存在表添加缺失字段。
-        返回 True 表示有变更（创建或新增列），False 则无操作
+        """创建表或为已存在表添加缺失字段，删除字段或字段类型变化时分批重建表
 
         Args:
-            tableName (_type_): 表名
-            columns (_type_): 字典
+            tableName (str): 表名
+            columns (dict): 字段名-字段定义，PRIMARY KEY 为主键定义
 
         Returns:
-            _type_: _description_
+            bool: 有变更（创建、新增字段或重建）返回 True，无操作或预估模式下返回 False
         """
+        from .migration import CMigrationManager
 
         info = await cls.getTableInfo(tableName)
         existing = {col["name"]: col["type"].upper() for col in info}
-        desired = {k: v.upper() for k, v in columns.items() if k != "PRIMARY KEY"}
+        desired = {k: v for k, v in columns.items() if k != "PRIMARY KEY"}
         primaryKey = columns.get("PRIMARY KEY", "")
 
         if not existing:
+            if CMigrationManager.isDryRun():
+                CMigrationManager.m_pPlan.append((f"创建表 {tableName}", 0, 0))
+                return False
+
             colsDef = ", ".join(f'"{k}" {v}' for k, v in desired.items())
             if primaryKey:
                 colsDef += f", PRIMARY KEY {primaryKey}"
@@ -83,39 +110,35 @@ class CSqlManager:
         toAdd = [k for k in desired if k not in existing]
         toRemove = [k for k in existing if k not in desired]
         typeMismatch = [
-            k for k in desired if k in existing and existing[k] != desired[k]
+            k
+            for k in desired
+            if k in existing and existing[k] != cls.columnType(desired[k])
         ]
 
-        if toAdd and not toRemove and not typeMismatch:
+        if not toAdd and not toRemove and not typeMismatch:
+            return False
+
+        if (
+            not toRemove
+            and not typeMismatch
+            and all(cls.canAddColumn(desired[k]) for k in toAdd)
+        ):
+            if CMigrationManager.isDryRun():
+                CMigrationManager.m_pPlan.append(
+                    (f"表 {tableName} 新增字段 {', '.join(toAdd)}", 0, 0)
+                )
+                return False
+
             for col in toAdd:
                 await cls.m_pDB.execute(
                     f'ALTER TABLE "{tableName}" ADD COLUMN "{col}" {columns[col]}'
                 )
             return True
 
-        async with cls._transaction():
-            tmpTable = f"{tableName}_new"
-            colsDef = ", ".join(f'"{k}" {v}' for k, v in desired.items())
-            if primaryKey:
-                colsDef += f", PRIMARY KEY {primaryKey}"
-            await cls.m_pDB.execute(f'CREATE TABLE "{tmpTable}" ({colsDef});')
-
-            commonCols = [k for k in desired if k in existing]
-            if commonCols:
-                colsStr = ", ".join(f'"{c}"' for c in commonCols)
-
-                sql = (
-                    f'INSERT INTO "{tmpTable}" ({colsStr}) '
-                    f"SELECT {colsStr} "
-                    f'FROM "{tableName}";'
-                )
-
-                await cls.m_pDB.execute(sql)
-            await cls.m_pDB.execute(f'DROP TABLE "{tableName}";')
-            await cls.m_pDB.execute(
-                f'ALTER TABLE "{tmpTable}" RENAME TO "{tableName}";'
-            )
-        return True
+        commonCols = [k for k in desired if k in existing]
+        return await CMigrationManager.rebuildTable(
+            tableName, desired, primaryKey, commonCols
+        )
 
     @classmethod
     async def executeDB(cls, command: str) -> bool:
@@ -134,10 +157,12 @@ class CSqlManager:
         try:
             async with cls._transaction():
                 await cls.m_pDB.execute(command)
-            return True
         except Exception as e:
             logger.warning(f"数据库语句执行出错: {command}", e=e)
             return False
 
+        await g_pEventManager.m_afterExecuteDB.emit(command=command)  # type: ignore
+        return True
+
 
 g_pSqlManager = CSqlManager()
@@ -0,0 +1,235 @@
+from collections import OrderedDict
+import re
+
+from zhenxun.configs.config import Config
+
+from ..event.event import g_pEventManager
+from .record import FarmUser, SoilPlot
+
+
+class CLruCache:
+    """按用户缓存数据库数据，按最近使用淘汰
+
+    所有写入先提交数据库再同步更新缓存（写穿），缓存内容始终与数据库一致。
+    从数据库加载期间发生写入时放弃本次加载结果，避免缓存旧数据
+    """
+
+    # 未配置时缓存的用户数
+    m_iDefaultCapacity = 500
+
+    def __init__(self):
+        self.m_pItems: OrderedDict = OrderedDict()
+        # 正在从数据库加载的用户 -> 加载期间发生的写入次数
+        self.m_pLoading: dict[str, int] = {}
+
+        self.m_iHit = 0
+        self.m_iMiss = 0
+        self.m_iEvict = 0
+
+    def capacity(self) -> int:
+        capacity = Config.get_config("zhenxun_plugin_farm", "农场缓存用户数")
+        if capacity is None:
+            return self.m_iDefaultCapacity
+        return max(0, int(capacity))
+
+    def lookup(self, uid: str):
+        item = self.m_pItems.get(uid)
+        if item is None:
+            self.m_iMiss += 1
+            return None
+
+        self.m_iHit += 1
+        self.m_pItems.move_to_end(uid)
+        return item
+
+    def beginLoad(self, uid: str):
+        """标记开始从数据库加载用户数据"""
+        self.m_pLoading.setdefault(uid, 0)
+
+    def endLoad(self, uid: str, item) -> bool:
+        """写入加载结果，加载期间用户数据被修改时放弃写入
+
+        Returns:
+            bool: 是否写入缓存
+        """
+        if self.m_pLoading.pop(uid, 0) > 0:
+            return False
+
+        capacity = self.capacity()
+        if capacity <= 0:
+            return False
+
+        self.m_pItems[uid] = item
+        self.m_pItems.move_to_end(uid)
+        while len(self.m_pItems) > capacity:
+            self.onEvict(self.m_pItems.popitem(last=False)[0])
+            self.m_iEvict += 1
+
+        return True
+
+    def abortLoad(self, uid: str):
+        """加载失败时清除加载标记"""
+        self.m_pLoading.pop(uid, None)
+
+    def markWrite(self, uid: str):
+        if uid in self.m_pLoading:
+            self.m_pLoading[uid] += 1
+
+    def onEvict(self, uid: str):
+        """用户被移出缓存时调用，子类用于清理附加状态"""
+        pass
+
+    def evict(self, uid: str):
+        """移除指定用户的缓存"""
+        self.markWrite(uid)
+        if self.m_pItems.pop(uid, None) is not None:
+            self.onEvict(uid)
+            self.m_iEvict += 1
+
+    def clear(self):
+        """清空缓存"""
+        for uid in self.m_pLoading:
+            self.m_pLoading[uid] += 1
+
+        for uid in self.m_pItems:
+            self.onEvict(uid)
+
+        self.m_iEvict += len(self.m_pItems)
+        self.m_pItems.clear()
+
+    def getStats(self) -> dict:
+        """获取缓存统计
+
+        Returns:
+            dict: users 缓存用户数, capacity 容量, hit 命中, miss 未命中, evict 淘汰
+        """
+        return {
+            "users": len(self.m_pItems),
+            "capacity": self.capacity(),
+            "hit": self.m_iHit,
+            "miss": self.m_iMiss,
+            "evict": self.m_iEvict,
+        }
+
+
+class CFarmCache(CLruCache):
+    """用户地块缓存
+
+    以用户为单位缓存整个农场的地块，常用用户的地块读取只访问内存。
+    绕过 CUserSoilDB 直接修改 userSoil 后需调用 evict 或 clear 使缓存失效
+    """
+
+    m_pItems: OrderedDict[str, dict[int, SoilPlot]]
+
+    def get(self, uid: str) -> dict[int, SoilPlot] | None:
+        """获取用户的全部地块，未缓存时返回 None
+
+        返回的地块与缓存共享，调用方不应修改
+        """
+        return self.lookup(uid)
+
+    def setPlot(self, uid: str, soilIndex: int, plot: SoilPlot | None):
+        """写穿：数据库写入成功后替换缓存中的地块，plot 为 None 表示地块已删除"""
+        self.markWrite(uid)
+
+        farm = self.m_pItems.get(uid)
+        if farm is None:
+            return
+
+        if plot is None:
+            farm.pop(soilIndex, None)
+        else:
+            farm[soilIndex] = plot
+
+    def updatePlot(self, uid: str, soilIndex: int, fields: dict):
+        """写穿：数据库更新成功后修改缓存中地块的字段"""
+        self.markWrite(uid)
+
+        plot = self.m_pItems.get(uid, {}).get(soilIndex)
+        if plot is None:
+            return
+
+        for field, value in fields.items():
+            if field in SoilPlot.m_pDefaults:
+                setattr(plot, field, value)
+
+    def onExecuteDB(self, command: str):
+        # 自定义SQL可能修改任意用户的地块，涉及 userSoil 时整体失效
+        if re.search(r"\busersoil\b", command, re.IGNORECASE):
+            self.clear()
+
+
+class CUserCache(CLruCache):
+    """用户信息缓存
+
+    缓存 user 表的整行记录，并在内存中维护全部已注册用户的集合。
+    土地摘要由 CUserSoilDB 在写入事务中计算后写入缓存；
+    其他由SQL表达式计算的字段只标记失效，读取该用户时重新加载整行
+    """
+
+    m_pItems: OrderedDict[str, FarmUser]
+
+    def __init__(self):
+        super().__init__()
+
+        # 已注册用户，None 表示尚未加载
+        self.m_pRegistered: set[str] | None = None
+        # uid -> 已失效的字段
+        self.m_pStale: dict[str, set[str]] = {}
+
+    def get(self, uid: str) -> FarmUser | None:
+        """获取缓存的用户记录，未缓存或有字段失效时返回 None
+
+        返回的记录与缓存共享，调用方不应修改
+        """
+        if uid in self.m_pStale:
+            self.m_iMiss += 1
+            return None
+
+        return self.lookup(uid)
+
+    def endLoad(self, uid: str, item) -> bool:
+        # 加载期间有写入时保留失效标记，下次读取重新加载
+        if not super().endLoad(uid, item):
+            return False
+
+        self.m_pStale.pop(uid, None)
+        return True
+
+    def onEvict(self, uid: str):
+        self.m_pStale.pop(uid, None)
+
+    def addRegistered(self, uid: str):
+        if self.m_pRegistered is not None:
+            self.m_pRegistered.add(uid)
+
+    def setFields(self, uid: str, **fields):
+        """写穿：数据库更新成功后修改缓存中用户的字段"""
+        self.markWrite(uid)
+
+        user = self.m_pItems.get(uid)
+        if user is None:
+            return
+
+        for field, value in fields.items():
+            setattr(user, field, value)
+
+    def invalidate(self, uid: str, *fields: str):
+        """使用户的部分字段失效，用于缓存无法得知写入结果的SQL更新"""
+        self.markWrite(uid)
+
+        if uid in self.m_pItems:
+            self.m_pStale.setdefault(uid, set()).update(fields)
+
+    def onExecuteDB(self, command: str):
+        # 自定义SQL可能增删用户或修改任意字段，涉及 user 表时整体失效
+        if re.search(r"\buser\b", command, re.IGNORECASE):
+            self.clear()
+            self.m_pRegistered = None
+
+
+g_pFarmCache = CFarmCache()
+g_pUserCache = CUserCache()
+
+g_pEventManager.m_afterExecuteDB.connect(g_pFarmCache.onExecuteDB)
+g_pEventManager.m_afterExecuteDB.connect(g_pUserCache.onExecuteDB)
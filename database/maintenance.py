@@ -0,0 +1,311 @@
+import asyncio
+import os
+from pathlib import Path
+import sqlite3
+import time
+
+from zhenxun.services.log import logger
+
+from ..config import g_sDBFilePath, g_sDBPath
+from ..tool import g_pToolManager
+from .database import CSqlManager
+
+
+class CBackupRestarted(Exception):
+    """在线备份期间源数据库被反复修改"""
+
+
+class CMaintenanceDB(CSqlManager):
+    """数据库定期维护
+
+    依次执行增量回收空闲页、更新查询统计信息、快速完整性检查与在线备份。
+    在线备份使用独立连接分步复制，每步之间释放锁，不会长时间阻塞写入
+    """
+
+    # 备份文件目录
+    m_sBackupPath = Path(g_sDBPath) / "backup"
+    # 在线备份每步复制的页数与两步之间的间隔（秒）
+    m_iBackupPages = 256
+    m_fBackupSleep = 0.05
+    # 在线备份因写入重新开始的最大次数，超出后改用主连接一次性备份
+    m_iBackupRestart = 5
+    # 每次增量回收的页数，分段执行避免长时间占用连接
+    m_iVacuumPages = 1000
+
+    # 上次维护的报告，用于统计展示
+    m_pLastReport: dict = {}
+
+    @classmethod
+    async def pragma(cls, name: str):
+        cursor = await cls.m_pDB.execute(f"PRAGMA {name}")
+        row = await cursor.fetchone()
+        return row[0] if row else None
+
+    @classmethod
+    async def getFileStats(cls) -> dict:
+        """获取数据库文件大小与页使用情况
+
+        Returns:
+            dict: size 文件大小（字节）, pages 总页数, free 空闲页数, pageSize 页大小
+        """
+        return {
+            "size": os.path.getsize(g_sDBFilePath),
+            "pages": await cls.pragma("page_count"),
+            "free": await cls.pragma("freelist_count"),
+            "pageSize": await cls.pragma("page_size"),
+        }
+
+    @classmethod
+    async def vacuum(cls) -> int:
+        """回收空闲页
+
+        数据库未启用增量回收时切换为 INCREMENTAL，切换需执行一次完整 VACUUM；
+        之后每次只分段执行 incremental_vacuum
+
+        Returns:
+            int: 回收的页数，本次跳过返回 -1
+        """
+        # 0 NONE, 1 FULL, 2 INCREMENTAL
+        if await cls.pragma("auto_vacuum") != 2:
+            # VACUUM 不能在事务中执行，有其他协程的事务未提交时留到下次
+            if cls.m_pDB.in_transaction:
+                logger.info("数据库维护：存在未提交的事务，跳过启用增量回收")
+                return -1
+
+            free = await cls.pragma("freelist_count")
+            logger.info("数据库维护：启用增量回收，执行一次完整 VACUUM")
+            await cls.m_pDB.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            await cls.m_pDB.execute("VACUUM")
+            return free
+
+        freed = 0
+        free = await cls.pragma("freelist_count")
+        while free:
+            # executescript 会先提交连接上未完成的事务，其他协程的事务未提交时留到下次
+            if cls.m_pDB.in_transaction:
+                logger.info("数据库维护：存在未提交的事务，剩余空闲页留到下次回收")
+                break
+
+            # execute 只执行一步，每次只回收一页，需用 executescript 执行完整条语句
+            await cls.m_pDB.executescript(
+                f"PRAGMA incremental_vacuum({cls.m_iVacuumPages})"
+            )
+
+            remain = await cls.pragma("freelist_count")
+            if remain >= free:
+                break
+            freed += free - remain
+            free = remain
+
+            # 让出事件循环，分段之间处理其他数据库请求
+            await asyncio.sleep(0)
+
+        return freed
+
+    @classmethod
+    async def optimize(cls) -> str:
+        """更新查询统计信息，首次执行 ANALYZE，之后由 PRAGMA optimize 按需分析
+
+        Returns:
+            str: 执行的语句
+        """
+        cursor = await cls.m_pDB.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'"
+        )
+        if await cursor.fetchone() is None:
+            await cls.m_pDB.execute("ANALYZE")
+            return "ANALYZE"
+
+        await cls.m_pDB.execute("PRAGMA optimize")
+        return "PRAGMA optimize"
+
+    @classmethod
+    async def quickCheck(cls) -> list[str]:
+        """快速完整性检查
+
+        Returns:
+            list[str]: 发现的问题，为空表示正常
+        """
+        cursor = await cls.m_pDB.execute("PRAGMA quick_check")
+        problems = [row[0] for row in await cursor.fetchall()]
+        return [] if problems == ["ok"] else problems
+
+    @classmethod
+    def backupStepwise(cls, target: Path) -> int:
+        """使用独立连接分步备份，在线程中执行
+
+        源数据库在两步之间被其他连接修改时备份会从头开始，
+        重新开始次数过多时抛出 CBackupRestarted
+
+        Returns:
+            int: 备份的总页数
+        """
+        restarts = 0
+        lastRemaining = -1
+
+        def progress(status, remaining, total):
+            nonlocal restarts, lastRemaining
+            if lastRemaining >= 0 and remaining > lastRemaining:
+                restarts += 1
+                if restarts > cls.m_iBackupRestart:
+                    raise CBackupRestarted()
+            lastRemaining = remaining
+
+        source = sqlite3.connect(g_sDBFilePath)
+        dest = sqlite3.connect(target)
+        try:
+            source.backup(
+                dest,
+                pages=cls.m_iBackupPages,
+                progress=progress,
+                sleep=cls.m_fBackupSleep,
+            )
+            return dest.execute("PRAGMA page_count").fetchone()[0]
+        finally:
+            dest.close()
+            source.close()
+
+    @classmethod
+    def verifyBackup(cls, target: Path) -> bool:
+        dest = sqlite3.connect(target)
+        try:
+            return dest.execute("PRAGMA quick_check").fetchone()[0] == "ok"
+        finally:
+            dest.close()
+
+    @classmethod
+    async def backup(cls, keep: int) -> Path | None:
+        """在线备份数据库并只保留最近的 keep 份
+
+        先写入临时文件，校验通过后再重命名，避免留下不完整的备份
+
+        Args:
+            keep (int): 保留的备份份数
+
+        Returns:
+            Path | None: 备份文件路径，失败返回 None
+        """
+        os.makedirs(cls.m_sBackupPath, exist_ok=True)
+
+        stamp = g_pToolManager.dateTime().now().strftime("%Y%m%d-%H%M%S")
+        target = cls.m_sBackupPath / f"farm-{stamp}.db"
+        tmpTarget = target.with_suffix(".db.tmp")
+        tmpTarget.unlink(missing_ok=True)
+
+        try:
+            try:
+                await asyncio.to_thread(cls.backupStepwise, tmpTarget)
+            except CBackupRestarted:
+                # 主连接上的写入会同步到备份，不会导致重新开始，但备份期间占用连接
+                logger.info("数据库维护：在线备份被写入反复打断，改用主连接备份")
+                tmpTarget.unlink(missing_ok=True)
+                dest = sqlite3.connect(tmpTarget, check_same_thread=False)
+                try:
+                    await cls.m_pDB.backup(dest)
+                finally:
+                    dest.close()
+
+            if not await asyncio.to_thread(cls.verifyBackup, tmpTarget):
+                logger.warning("数据库维护：备份文件校验失败，已丢弃")
+                tmpTarget.unlink(missing_ok=True)
+                return None
+
+            tmpTarget.replace(target)
+        except Exception as e:
+            logger.warning("数据库备份失败", e=e)
+            tmpTarget.unlink(missing_ok=True)
+            return None
+
+        # 文件名包含时间，按名称排序即按时间排序
+        backups = sorted(cls.m_sBackupPath.glob("farm-*.db"))
+        for old in backups[: max(len(backups) - keep, 0)]:
+            old.unlink(missing_ok=True)
+
+        return target
+
+    @classmethod
+    async def runMaintenance(cls, keepBackups: int) -> dict:
+        """执行一次数据库维护
+
+        完整性检查未通过时不备份，避免用损坏的数据替换掉正常的旧备份
+
+        Args:
+            keepBackups (int): 保留的备份份数，0为不备份
+
+        Returns:
+            dict: 维护报告
+        """
+        start = time.perf_counter()
+        report: dict = {
+            "time": int(g_pToolManager.dateTime().now().timestamp()),
+            "before": await cls.getFileStats(),
+            "timing": {},
+        }
+
+        def lap(name: str, since: float) -> float:
+            now = time.perf_counter()
+            report["timing"][name] = now - since
+            return now
+
+        step = start
+        try:
+            report["freed"] = await cls.vacuum()
+        except Exception as e:
+            logger.warning("数据库维护：回收空闲页失败", e=e)
+            report["freed"] = -1
+        step = lap("回收空闲页", step)
+
+        try:
+            report["optimize"] = await cls.optimize()
+        except Exception as e:
+            logger.warning("数据库维护：更新统计信息失败", e=e)
+            report["optimize"] = ""
+        step = lap("统计信息", step)
+
+        try:
+            report["problems"] = await cls.quickCheck()
+        except Exception as e:
+            logger.warning("数据库维护：完整性检查失败", e=e)
+            report["problems"] = [str(e)]
+        step = lap("完整性检查", step)
+
+        report["backup"] = None
+        if report["problems"]:
+            logger.error(
+                "数据库维护：完整性检查未通过，跳过备份："
+                + "；".join(report["problems"][:10])
+            )
+        elif keepBackups > 0:
+            target = await cls.backup(keepBackups)
+            if target:
+                report["backup"] = {"path": str(target), "size": target.stat().st_size}
+        lap("备份", step)
+
+        report["after"] = await cls.getFileStats()
+        report["elapsed"] = time.perf_counter() - start
+        cls.m_pLastReport = report
+
+        logger.info(cls.formatReport(report))
+        return report
+
+    @classmethod
+    def formatReport(cls, report: dict) -> str:
+        before, after = report["before"], report["after"]
+        timing = "，".join(
+            f"{name}{seconds:.2f}秒" for name, seconds in report["timing"].items()
+        )
+
+        text = (
+            f"数据库维护完成，耗时{report['elapsed']:.2f}秒（{timing}）；"
+            f"文件 {before['size'] / 1024:.0f}KB -> {after['size'] / 1024:.0f}KB，"
+            f"空闲页 {before['free']} -> {after['free']}；"
+            f"完整性检查{'未通过' if report['problems'] else '正常'}"
+        )
+
+        if report["backup"]:
+            text += (
+                f"；备份 {Path(report['backup']['path']).name} "
+                f"{report['backup']['size'] / 1024:.0f}KB"
+            )
+
+        return text
@@ -0,0 +1,348 @@
+import asyncio
+import time
+
+from zhenxun.configs.config import Config
+from zhenxun.services.log import logger
+
+from .. import config
+from .database import CSqlManager
+
+
+class CMigrationStep:
+    def __init__(self, version: int, name: str, table: str, batch, finish):
+        self.m_iVersion = version
+        self.m_sName = name
+        # 需要逐批处理的源表，用于统计进度与预估耗时
+        self.m_sTable = table
+        # async (position, limit) -> (本批最后的 rowid, 本批行数) | None
+        self.m_pBatch = batch
+        # 全部批次完成后在最后一个事务中执行，如删除旧表
+        self.m_pFinish = finish
+
+
+class CMigrationManager(CSqlManager):
+    """数据库迁移
+
+    带编号的迁移步骤执行后记录到 schema_version，每个步骤只执行一次。
+    大表按 rowid 分批处理，每批一个事务，批次之间让出事件循环；
+    进度与批次在同一事务中写入 schema_progress，中断后从上次提交的位置继续。
+    ensureTableSchema 需要重建表时同样使用分批复制。
+
+    分批复制不是在线迁移，复制期间对源表的写入不会同步到新表。
+    迁移与重建只在启动的“用户数据表”步骤中执行，此时 config.g_bReady 尚未置位，
+    指令处理通过 isReady 直接返回、定时任务同样跳过，不存在并发写入；
+    插件就绪后调用会拒绝执行。
+
+    开启预估模式后只统计待执行的迁移及预计耗时，不修改数据库
+    """
+
+    # 每批处理的行数
+    m_iBatchSize = 2000
+    # 进度日志的最短间隔（秒）
+    m_iLogInterval = 5
+
+    m_pSteps: list[CMigrationStep] = []
+    # 预估模式下收集的待执行操作 (描述, 行数, 预计耗时)
+    m_pPlan: list[tuple[str, int, float]] = []
+
+    @classmethod
+    def isDryRun(cls) -> bool:
+        return bool(Config.get_config("zhenxun_plugin_farm", "数据库迁移预估"))
+
+    @classmethod
+    async def initDB(cls):
+        cls.m_pSteps.clear()
+        cls.m_pPlan.clear()
+        if cls.isDryRun():
+            return
+
+        await cls.m_pDB.execute(
+            """
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                appliedAt INTEGER NOT NULL
+            )
+            """
+        )
+        await cls.m_pDB.execute(
+            """
+            CREATE TABLE IF NOT EXISTS schema_progress (
+                task TEXT PRIMARY KEY,
+                position INTEGER NOT NULL DEFAULT 0,
+                done INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+
+    @classmethod
+    def addStep(cls, version: int, name: str, table: str, batch, finish):
+        """注册迁移步骤，版本号从1开始递增且不可修改
+
+        Args:
+            version (int): 版本号
+            name (str): 步骤名称
+            table (str): 逐批处理的源表
+            batch: 处理一批数据的协程函数
+            finish: 全部批次完成后执行的协程函数
+        """
+        if any(step.m_iVersion == version for step in cls.m_pSteps):
+            raise ValueError(f"迁移版本 {version} 重复")
+
+        cls.m_pSteps.append(CMigrationStep(version, name, table, batch, finish))
+        cls.m_pSteps.sort(key=lambda step: step.m_iVersion)
+
+    @classmethod
+    async def countRows(cls, table: str) -> int:
+        if not await cls.getTableInfo(table):
+            return 0
+
+        cursor = await cls.m_pDB.execute(f'SELECT COUNT(*) FROM "{table}"')
+        row = await cursor.fetchone()
+        return row[0] if row else 0
+
+    @classmethod
+    async def estimate(cls, table: str, rows: int) -> float:
+        """复制一批数据到临时表测量写入速度，预估处理整张表的耗时（秒）"""
+        if rows <= 0:
+            return 0
+
+        sample = "_migrationSample"
+        await cls.m_pDB.execute(f'DROP TABLE IF EXISTS temp."{sample}"')
+        await cls.m_pDB.execute(
+            f'CREATE TEMP TABLE "{sample}" AS SELECT * FROM "{table}" LIMIT 0'
+        )
+
+        start = time.perf_counter()
+        cursor = await cls.m_pDB.execute(
+            f'INSERT INTO temp."{sample}" SELECT * FROM "{table}" LIMIT ?',
+            (cls.m_iBatchSize,),
+        )
+        elapsed = time.perf_counter() - start
+        sampled = max(cursor.rowcount, 1)
+
+        await cls.m_pDB.execute(f'DROP TABLE temp."{sample}"')
+        return elapsed / sampled * rows
+
+    @classmethod
+    async def plan(cls, description: str, table: str):
+        """预估模式下记录一项待执行的操作"""
+        rows = await cls.countRows(table)
+        cls.m_pPlan.append((description, rows, await cls.estimate(table, rows)))
+
+    @classmethod
+    def report(cls):
+        if not cls.m_pPlan:
+            logger.info("数据库迁移预估：没有待执行的迁移")
+            return
+
+        total = 0.0
+        for description, rows, seconds in cls.m_pPlan:
+            total += seconds
+            logger.info(f"数据库迁移预估：{description}，{rows}行，约{seconds:.1f}秒")
+
+        logger.info(
+            f"数据库迁移预估：共{len(cls.m_pPlan)}项，约{total:.1f}秒，"
+            "关闭 数据库迁移预估 后重启即可执行迁移"
+        )
+
+    @classmethod
+    async def getProgress(cls, task: str) -> tuple[int, int] | None:
+        if cls.isDryRun():
+            return None
+
+        cursor = await cls.m_pDB.execute(
+            "SELECT position, done FROM schema_progress WHERE task = ?", (task,)
+        )
+        row = await cursor.fetchone()
+        return (row[0], row[1]) if row else None
+
+    @classmethod
+    def copyBatch(cls, source: str, target: str, columns: list[str]):
+        """生成按 rowid 分批复制数据的批处理函数"""
+        colsStr = ", ".join(f'"{c}"' for c in columns)
+
+        async def batch(position: int, limit: int) -> tuple[int, int] | None:
+            cursor = await cls.m_pDB.execute(
+                f"""
+                SELECT MAX(rowid), COUNT(*) FROM (
+                    SELECT rowid FROM "{source}" WHERE rowid > ?
+                    ORDER BY rowid LIMIT ?
+                )
+                """,
+                (position, limit),
+            )
+            last, count = await cursor.fetchone()  # type: ignore
+            if not count:
+                return None
+
+            if colsStr:
+                await cls.m_pDB.execute(
+                    f'INSERT INTO "{target}" ({colsStr}) SELECT {colsStr} '
+                    f'FROM "{source}" WHERE rowid > ? AND rowid <= ?',
+                    (position, last),
+                )
+            return last, count
+
+        return batch
+
+    @classmethod
+    async def runChunked(cls, task: str, table: str, batch, finish) -> bool:
+        """分批执行迁移任务，可从上次中断的位置继续
+
+        Args:
+            task (str): 任务名，用于记录进度
+            table (str): 逐批处理的源表
+            batch: 处理一批数据的协程函数
+            finish: 全部批次完成后在同一事务中执行的协程函数
+
+        Returns:
+            bool: 是否完成
+        """
+        # 就绪后指令与定时任务会并发写入源表，分批复制会丢失这些写入
+        if config.g_bReady:
+            logger.error(f"数据库迁移 {task}：插件已就绪，只能在启动时执行")
+            return False
+
+        progress = await cls.getProgress(task)
+        position, done = progress or (0, 0)
+        if done:
+            logger.info(f"数据库迁移 {task}：从上次中断处继续，已完成{done}行")
+
+        total = await cls.countRows(table)
+        resumed = done
+        start = lastLog = time.perf_counter()
+
+        try:
+            while True:
+                async with cls._transaction():
+                    result = await batch(position, cls.m_iBatchSize)
+                    if result is None:
+                        await finish()
+                        await cls.m_pDB.execute(
+                            "DELETE FROM schema_progress WHERE task = ?", (task,)
+                        )
+                        break
+
+                    position, count = result
+                    done += count
+                    await cls.m_pDB.execute(
+                        "INSERT OR REPLACE INTO schema_progress (task, position, done) "
+                        "VALUES (?, ?, ?)",
+                        (task, position, done),
+                    )
+
+                now = time.perf_counter()
+                if now - lastLog >= cls.m_iLogInterval:
+                    lastLog = now
+                    rate = (done - resumed) / (now - start)
+                    remain = max(total - done, 0) / rate if rate > 0 else 0
+                    logger.info(
+                        f"数据库迁移 {task}：{done}/{total}行，预计剩余{remain:.0f}秒"
+                    )
+
+                # 让出事件循环，迁移期间不阻塞其他任务
+                await asyncio.sleep(0)
+        except Exception as e:
+            logger.error(f"数据库迁移 {task} 中断，下次启动时继续", e=e)
+            return False
+
+        logger.info(
+            f"数据库迁移 {task} 完成，{done}行，耗时{time.perf_counter() - start:.1f}秒"
+        )
+        return True
+
+    @classmethod
+    async def rebuildTable(
+        cls, tableName: str, desired: dict, primaryKey: str, columns: list[str]
+    ) -> bool:
+        """按新的表结构分批重建表
+
+        复制期间源表不能有写入，只能在插件就绪前执行
+
+        Args:
+            tableName (str): 表名
+            desired (dict): 字段名-字段定义
+            primaryKey (str): 主键定义，可为空
+            columns (list[str]): 新旧表共有、需要复制的字段
+
+        Returns:
+            bool: 是否完成
+        """
+        if cls.isDryRun():
+            await cls.plan(f"重建表 {tableName}", tableName)
+            return False
+
+        task = f"rebuild:{tableName}"
+        tmpTable = f"{tableName}_new"
+
+        colsDef = ", ".join(f'"{k}" {v}' for k, v in desired.items())
+        if primaryKey:
+            colsDef += f", PRIMARY KEY {primaryKey}"
+
+        # 中断前创建的临时表结构与当前不一致时重新开始
+        tmpInfo = await cls.getTableInfo(tmpTable)
+        resumable = [col["name"] for col in tmpInfo] == list(desired)
+        if not resumable or await cls.getProgress(task) is None:
+            async with cls._transaction():
+                await cls.m_pDB.execute(f'DROP TABLE IF EXISTS "{tmpTable}"')
+                await cls.m_pDB.execute(f'CREATE TABLE "{tmpTable}" ({colsDef});')
+                await cls.m_pDB.execute(
+                    "INSERT OR REPLACE INTO schema_progress (task, position, done) "
+                    "VALUES (?, 0, 0)",
+                    (task,),
+                )
+
+        async def finish():
+            await cls.m_pDB.execute(f'DROP TABLE "{tableName}";')
+            await cls.m_pDB.execute(
+                f'ALTER TABLE "{tmpTable}" RENAME TO "{tableName}";'
+            )
+
+        return await cls.runChunked(
+            task, tableName, cls.copyBatch(tableName, tmpTable, columns), finish
+        )
+
+    @classmethod
+    async def getAppliedVersions(cls) -> set[int]:
+        if not await cls.getTableInfo("schema_version"):
+            return set()
+
+        cursor = await cls.m_pDB.execute("SELECT version FROM schema_version")
+        return {row[0] for row in await cursor.fetchall()}
+
+    @classmethod
+    async def migrate(cls) -> bool:
+        """按版本号依次执行未执行过的迁移步骤
+
+        Returns:
+            bool: 是否全部完成
+        """
+        applied = await cls.getAppliedVersions()
+
+        for step in cls.m_pSteps:
+            if step.m_iVersion in applied:
+                continue
+
+            if cls.isDryRun():
+                await cls.plan(
+                    f"迁移 {step.m_iVersion} {step.m_sName}", step.m_sTable
+                )
+                continue
+
+            logger.info(f"执行数据库迁移 {step.m_iVersion}：{step.m_sName}")
+
+            async def finish(step=step):
+                await step.m_pFinish()
+                await cls.m_pDB.execute(
+                    "INSERT INTO schema_version (version, name, appliedAt) "
+                    "VALUES (?, ?, ?)",
+                    (step.m_iVersion, step.m_sName, int(time.time())),
+                )
+
+            if not await cls.runChunked(
+                f"version:{step.m_iVersion}", step.m_sTable, step.m_pBatch, finish
+            ):
+                return False
+
+        return True
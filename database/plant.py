@@ -1,5 +1,7 @@
+import asyncio
 from contextlib import asynccontextmanager
 import os
+import shutil
 
 import aiosqlite
 
@@ -7,50 +9,247 @@ from zhenxun.configs.config import Config
 from zhenxun.services.log import logger
 
 from ..config import g_bIsDebug, g_sPlantPath, g_sResourcePath
+from ..manifest import g_pManifestManager
 from ..request import g_pRequestManager
+from .record import PlantDef
 
 
 class CPlantManager:
+    # plant 表必须包含的字段，替换作物数据库前用于校验
+    m_sRequiredColumns = {
+        "name",
+        "level",
+        "buy",
+        "isVip",
+        "vipBuy",
+        "experience",
+        "harvest",
+        "price",
+        "time",
+        "crop",
+        "phase",
+        "general",
+        "sell",
+        "isBuy",
+    }
+
+    # 当前连接
+    m_pDB: aiosqlite.Connection | None = None
+
+    # 内存中的作物目录 作物名称 -> 作物定义，按等级排序
+    m_pCatalog: dict[str, PlantDef] = {}
+
+    # 各连接正在使用的数量，用于等待旧连接上的操作结束
+    m_pUsing: dict[aiosqlite.Connection, int] = {}
+
+    # 已被替换、等待关闭的旧连接
+    m_pRetired: set[aiosqlite.Connection] = set()
+
+    m_pSwapLock = asyncio.Lock()
+
     def __init__(self):
         try:
             os.mkdir(g_sPlantPath)
         except FileExistsError:
             pass
 
+    @classmethod
+    def dbPath(cls) -> str:
+        if g_bIsDebug:
+            return str(g_sPlantPath.parent / "plant-test.db")
+
+        return str(g_sPlantPath)
+
     @classmethod
     async def cleanup(cls):
-        if hasattr(cls, "m_pDB") and cls.m_pDB:
+        if cls.m_pDB:
             await cls.m_pDB.close()
+            cls.m_pDB = None
+
+        for db in list(cls.m_pRetired):
+            await db.close()
+        cls.m_pRetired.clear()
+        cls.m_pUsing.clear()
 
     @classmethod
     async def init(cls) -> bool:
         try:
-            _ = os.path.exists(g_sPlantPath)
+            db = await aiosqlite.connect(cls.dbPath())
+            db.row_factory = aiosqlite.Row
 
-            if g_bIsDebug:
-                cls.m_pDB = await aiosqlite.connect(
-                    str(g_sPlantPath.parent / "plant-test.db")
-                )
-            else:
-                cls.m_pDB = await aiosqlite.connect(str(g_sPlantPath))
+            catalog = await cls.loadCatalog(db)
+            if catalog is None:
+                await db.close()
+                return False
 
-            cls.m_pDB.row_factory = aiosqlite.Row
+            await cls._switch(db, catalog)
             return True
         except Exception as e:
             logger.warning("初始化植物数据库失败", e=e)
             return False
 
+    @classmethod
+    async def loadCatalog(
+        cls, db: aiosqlite.Connection
+    ) -> dict[str, PlantDef] | None:
+        """校验 plant 表结构并将全部作物读入内存
+
+        Args:
+            db (aiosqlite.Connection): 作物数据库连接
+
+        Returns:
+            dict[str, PlantDef] | None: 作物目录，校验失败返回None
+        """
+        try:
+            async with db.execute('PRAGMA table_info("plant")') as cursor:
+                columns = {row[1] for row in await cursor.fetchall()}
+
+            missing = cls.m_sRequiredColumns - columns
+            if missing:
+                logger.warning(f"作物数据库缺少字段: {', '.join(sorted(missing))}")
+                return None
+
+            async with db.execute("SELECT * FROM plant ORDER BY level") as cursor:
+                rows = await cursor.fetchall()
+
+            catalog = {}
+            for row in rows:
+                phase = str(row["phase"]).split(",")
+                if not all(x.strip().isdigit() for x in phase):
+                    logger.warning(f"作物阶段数据格式错误: {row['name']}")
+                    return None
+
+                plant = PlantDef.fromRow(row)
+                catalog[plant.name] = plant
+
+            if not catalog:
+                logger.warning("作物数据库中没有作物数据")
+                return None
+
+            return catalog
+        except Exception as e:
+            logger.warning("校验作物数据库失败", e=e)
+            return None
+
+    @classmethod
+    async def _switch(cls, db: aiosqlite.Connection, catalog: dict[str, PlantDef]):
+        """切换到新的连接与作物目录，旧连接在其上的操作结束后关闭"""
+        old = cls.m_pDB
+
+        # 两次赋值之间没有 await，读取方看到的一定是同一版本
+        cls.m_pDB = db
+        cls.m_pCatalog = catalog
+
+        if old is not None and old is not db:
+            cls.m_pRetired.add(old)
+            await cls._closeIfDrained(old)
+
+    @classmethod
+    async def _closeIfDrained(cls, db: aiosqlite.Connection):
+        if db in cls.m_pRetired and cls.m_pUsing.get(db, 0) <= 0:
+            cls.m_pRetired.discard(db)
+            cls.m_pUsing.pop(db, None)
+            await db.close()
+
+    @classmethod
+    async def _waitClosed(cls, db: aiosqlite.Connection):
+        """等待已切换下来的旧连接在其上的操作结束后关闭"""
+        while db in cls.m_pRetired:
+            await asyncio.sleep(0.05)
+
+    @classmethod
+    @asynccontextmanager
+    async def _acquire(cls):
+        """获取当前连接，期间即使发生替换也继续使用该连接"""
+        db = cls.m_pDB
+        if db is None:
+            raise RuntimeError("作物数据库尚未初始化")
+
+        cls.m_pUsing[db] = cls.m_pUsing.get(db, 0) + 1
+        try:
+            yield db
+        finally:
+            cls.m_pUsing[db] -= 1
+            await cls._closeIfDrained(db)
+
+    @classmethod
+    async def swapDBFile(cls, sidePath: str) -> bool:
+        """热替换作物数据库
+
+        先校验旁路下载的新文件并读入内存，通过后替换本地文件并切换读取方，
+        正在旧连接上执行的操作结束后再关闭旧连接，期间指令不受影响
+
+        Args:
+            sidePath (str): 新作物数据库文件路径
+
+        Returns:
+            bool: 是否替换成功
+        """
+        async with cls.m_pSwapLock:
+            try:
+                async with aiosqlite.connect(sidePath) as sideDB:
+                    sideDB.row_factory = aiosqlite.Row
+                    catalog = await cls.loadCatalog(sideDB)
+            except Exception as e:
+                logger.warning("打开新作物数据库失败", e=e)
+                catalog = None
+
+            if catalog is None:
+                logger.warning("新作物数据库校验失败，继续使用当前版本")
+                return False
+
+            livePath = str(g_sPlantPath)
+            sideDB = None
+            try:
+                os.replace(sidePath, livePath)
+            except PermissionError:
+                # 部分平台不允许替换已打开的文件：先切换到旁路文件继续提供查询，
+                # 旧连接关闭后再把新文件复制到正式路径，期间读取方始终有可用连接
+                try:
+                    sideDB = await aiosqlite.connect(sidePath)
+                    sideDB.row_factory = aiosqlite.Row
+                    old = cls.m_pDB
+                    await cls._switch(sideDB, catalog)
+                    if old is not None:
+                        await cls._waitClosed(old)
+
+                    tmpPath = f"{livePath}.tmp"
+                    await asyncio.to_thread(shutil.copyfile, sidePath, tmpPath)
+                    os.replace(tmpPath, livePath)
+                except Exception as e:
+                    logger.warning("替换作物数据库文件失败", e=e)
+                    return False
+
+            # 调试模式始终使用测试数据库
+            if g_bIsDebug and sideDB is None and cls.m_pDB is not None:
+                return True
+
+            db = await aiosqlite.connect(cls.dbPath())
+            db.row_factory = aiosqlite.Row
+            await cls._switch(db, catalog)
+
+            # 旁路连接关闭后删除旁路文件
+            if sideDB is not None:
+                await cls._waitClosed(sideDB)
+                try:
+                    os.remove(sidePath)
+                except OSError:
+                    pass
+
+            logger.info(f"作物数据库已热替换，共{len(catalog)}种作物")
+            return True
+
     @classmethod
     @asynccontextmanager
-    async def _transaction(cls):
-        await cls.m_pDB.execute("BEGIN;")
+    async def _transaction(cls, db: aiosqlite.Connection):
+        await db.execute("BEGIN;")
         try:
             yield
         except:
-            await cls.m_pDB.execute("ROLLBACK;")
+            await db.execute("ROLLBACK;")
             raise
         else:
-            await cls.m_pDB.execute("COMMIT;")
+            await db.execute("COMMIT;")
 
     @classmethod
     async def executeDB(cls, command: str) -> bool:
@@ -67,32 +266,30 @@ class CPlantManager:
             return False
 
         try:
-            async with cls._transaction():
-                await cls.m_pDB.execute(command)
+            async with cls._acquire() as db:
+                async with cls._transaction(db):
+                    await db.execute(command)
+
+                # 同步内存中的作物目录
+                catalog = await cls.loadCatalog(db)
+                if catalog is not None and db is cls.m_pDB:
+                    cls.m_pCatalog = catalog
             return True
         except Exception as e:
             logger.warning(f"数据库语句执行出错: {command}", e=e)
             return False
 
     @classmethod
-    async def getPlantByName(cls, name: str) -> dict | None:
-        """根据作物名称查询记录
+    async def getPlantByName(cls, name: str) -> PlantDef | None:
+        """根据作物名称查询作物定义
 
         Args:
             name (str): 作物名称
 
         Returns:
-            dict | None: 返回记录字典，未找到返回None
+            PlantDef | None: 作物定义，未找到返回None
         """
-        try:
-            async with cls.m_pDB.execute(
-                "SELECT * FROM plant WHERE name = ?", (name,)
-            ) as cursor:
-                row = await cursor.fetchone()
-                return dict(row) if row else None
-        except Exception as e:
-            logger.warning(f"查询作物失败: {name}", e=e)
-            return None
+        return cls.m_pCatalog.get(name)
 
     @classmethod
     async def getPlantPhaseByName(cls, name: str) -> list[int]:
@@ -104,32 +301,12 @@ class CPlantManager:
         Returns:
             list: 阶段数组
         """
-        try:
-            async with cls.m_pDB.execute(
-                "SELECT phase FROM plant WHERE name = ?", (name,)
-            ) as cursor:
-                row = await cursor.fetchone()
-
-                if not row:
-                    return []
-
-                phase = row[0].split(",")
-
-                seen = set()
-                result = []
-
-                for x in phase:
-                    num = int(x)
-
-                    if num not in seen:
-                        seen.add(num)
-                        result.append(num)
-
-                return result
-        except Exception as e:
-            logger.warning(f"查询作物阶段失败: {name}", e=e)
+        plant = cls.m_pCatalog.get(name)
+        if not plant:
             return []
 
+        return list(plant.phases)
+
     @classmethod
     async def getPlantPhaseNumberByName(cls, name: str) -> int:
         """根据作物名称获取作物总阶段数
@@ -140,30 +317,12 @@ class CPlantManager:
         Returns:
             int: 总阶段数
         """
-        try:
-            async with cls.m_pDB.execute(
-                "SELECT phase FROM plant WHERE name = ?", (name,)
-            ) as cursor:
-                row = await cursor.fetchone()
-
-                if not row:
-                    return -1
-
-                phase = row[0].split(",")
-
-                # 去重
-                seen = set()
-                result = []
-                for x in phase:
-                    if x not in seen:
-                        seen.add(x)
-                        result.append(x)
-
-                return len(result)
-        except Exception as e:
-            logger.warning(f"查询作物阶段失败: {name}", e=e)
+        plant = cls.m_pCatalog.get(name)
+        if not plant:
             return -1
 
+        return plant.phaseCount
+
     @classmethod
     async def getPlantAgainByName(cls, name: str) -> int:
         """根据作物名称获取作物再次成熟时间
@@ -174,20 +333,15 @@ class CPlantManager:
         Returns:
             int: 再次成熟时间 单位:h
         """
+        plant = cls.m_pCatalog.get(name)
+        if not plant:
+            return -1
 
         try:
-            async with cls.m_pDB.execute(
-                "SELECT phase FROM plant WHERE name = ?", (name,)
-            ) as cursor:
-                row = await cursor.fetchone()
-
-                if not row:
-                    return -1
+            phase = plant.phases
+            again = phase[-1] - phase[3] / 60 / 60
 
-                phase = row[0].split(",")
-                again = phase[-1] - phase[3] / 60 / 60
-
-                return again
+            return again
 
         except Exception as e:
             logger.warning(f"查询作物阶段失败: {name}", e=e)
@@ -203,15 +357,7 @@ class CPlantManager:
         Returns:
             bool: 存在返回True，否则False
         """
-        try:
-            async with cls.m_pDB.execute(
-                "SELECT 1 FROM plant WHERE name = ? LIMIT 1", (name,)
-            ) as cursor:
-                row = await cursor.fetchone()
-                return True if row else False
-        except Exception as e:
-            logger.warning(f"检查作物存在性失败: {name}", e=e)
-            return False
+        return name in cls.m_pCatalog
 
     @classmethod
     async def countPlants(cls, onlyBuy: bool = False) -> int:
@@ -223,71 +369,60 @@ class CPlantManager:
         Returns:
             int: 符合条件的记录数
         """
-        try:
-            if onlyBuy:
-                sql = "SELECT COUNT(*) FROM plant WHERE isBuy = 1"
-                params: tuple = ()
-            else:
-                sql = "SELECT COUNT(*) FROM plant"
-                params: tuple = ()
-            async with cls.m_pDB.execute(sql, params) as cursor:
-                row = await cursor.fetchone()
-                return row[0] if row else 0
-        except Exception as e:
-            logger.warning(f"统计作物数量失败, onlyBuy={onlyBuy}", e=e)
-            return 0
+        if onlyBuy:
+            return sum(1 for plant in cls.m_pCatalog.values() if plant.isBuy == 1)
+
+        return len(cls.m_pCatalog)
 
     @classmethod
-    async def listPlants(cls) -> list[dict]:
+    async def listPlants(cls) -> list[PlantDef]:
         """查询所有作物记录"""
-        try:
-            async with cls.m_pDB.execute(
-                "SELECT * FROM plant ORDER BY level"
-            ) as cursor:
-                rows = await cursor.fetchall()
-                return [dict(r) for r in rows]
-        except Exception as e:
-            logger.warning("查询所有作物失败", e=e)
-            return []
+        return list(cls.m_pCatalog.values())
 
     @classmethod
-    async def downloadPlant(cls) -> bool:
-        """遍历所有作物，下载各阶段图片及icon文件到指定文件夹
+    async def downloadPlant(cls) -> dict:
+        """同步作物资源文件
+
+        优先按服务端资源清单增量同步并校验哈希，
+        服务端未提供清单时遍历所有作物，统计缺失的各阶段图片及icon文件后批量并发下载
 
         Returns:
-            bool: 全部下载完成返回True，如有失败返回False
+            dict: 下载报告 {"total": 总数, "success": 成功数, "failed": [{"url", "path", "attempts"}]}
         """
-        success = True
+        if g_pRequestManager.isOffline():
+            logger.debug("农场处于离线模式，跳过作物资源同步")
+            return {"total": 0, "success": 0, "failed": []}
+
+        report = await g_pManifestManager.sync()
+        if report is not None:
+            return report
+
         baseUrl = Config.get_config("zhenxun_plugin_farm", "服务地址")
 
         baseUrl = baseUrl.rstrip("/") + ":8998/file"
         try:
+            # 先构建完整的缺失文件列表
+            tasks: list[tuple[str, str, str]] = []
             plants = await cls.listPlants()
             for plant in plants:
-                name = plant["name"]
-                phaseCount = await cls.getPlantPhaseNumberByName(name)
+                name = plant.name
+                phaseCount = plant.phaseCount
                 saveDir = os.path.join(g_sResourcePath, "plant", name)
-                begin = 0 if plant["general"] == 0 else 1
+                begin = 0 if plant.general == 0 else 1
 
-                for idx in range(begin, phaseCount + 1):
-                    fileName = f"{idx}.png"
-                    fullPath = os.path.join(saveDir, fileName)
+                fileNames = [f"{idx}.png" for idx in range(begin, phaseCount + 1)]
+                fileNames.append("icon.png")
 
-                    if os.path.exists(fullPath):
+                for fileName in fileNames:
+                    if os.path.exists(os.path.join(saveDir, fileName)):
                         continue
 
-                    url = f"{baseUrl}/{name}/{idx}.png"
-                    if not await g_pRequestManager.download(url, saveDir, f"{idx}.png"):
-                        success = False
+                    tasks.append((f"{baseUrl}/{name}/{fileName}", saveDir, fileName))
 
-                iconName = "icon.png"
-                iconPath = os.path.join(saveDir, iconName)
-                if not os.path.exists(iconPath):
-                    iconUrl = f"{baseUrl}/{name}/{iconName}"
-                    if not await g_pRequestManager.download(iconUrl, saveDir, iconName):
-                        success = False
+            if not tasks:
+                logger.debug("作物资源文件检查完毕，无缺失文件")
 
-            return success
+            return await g_pRequestManager.downloadFiles(tasks, name="作物资源")
         except Exception as e:
             logger.warning(f"下载作物资源异常: {e}")
-            return False
+            return {"total": 0, "success": 0, "failed": [], "error": str(e)}
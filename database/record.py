@@ -0,0 +1,211 @@
+from pathlib import Path
+
+from ..config import g_sResourcePath
+
+
+class CRecord:
+    """数据库记录基类
+
+    子类通过 __slots__ 声明字段，m_pDefaults 给出字段缺失或为 NULL 时的默认值，
+    表中新增而记录类型未声明的字段会被忽略。
+    rowFactory 可直接作为 sqlite3/aiosqlite 游标的 row_factory 使用
+    """
+
+    __slots__ = ()
+
+    m_pDefaults: dict = {}
+
+    def __init__(self, **fields):
+        for name, default in self.m_pDefaults.items():
+            value = fields.get(name)
+            setattr(self, name, default if value is None else value)
+
+    @classmethod
+    def rowFactory(cls, cursor, row):
+        columns = (column[0] for column in cursor.description)
+        return cls(**dict(zip(columns, row)))
+
+    @classmethod
+    def fromRow(cls, row):
+        """由 aiosqlite.Row 或字典构建记录"""
+        return cls(**dict(row))
+
+    def toDict(self) -> dict:
+        return {name: getattr(self, name) for name in self.m_pDefaults}
+
+    def __repr__(self) -> str:
+        fields = ", ".join(
+            f"{name}={getattr(self, name)!r}" for name in self.m_pDefaults
+        )
+        return f"{type(self).__name__}({fields})"
+
+
+class PlantDef(CRecord):
+    """作物定义，对应作物数据库 plant 表的一行"""
+
+    __slots__ = (
+        "name",
+        "level",
+        "buy",
+        "isVip",
+        "vipBuy",
+        "experience",
+        "harvest",
+        "price",
+        "time",
+        "crop",
+        "phase",
+        "general",
+        "sell",
+        "isBuy",
+        "officX",
+        "officY",
+        "officW",
+        "officH",
+        "phases",
+    )
+
+    m_pDefaults = {
+        "name": "",
+        "level": 0,
+        "buy": 0,
+        "isVip": 0,
+        "vipBuy": 0,
+        "experience": 0,
+        "harvest": 0,
+        "price": 0,
+        "time": 0,
+        "crop": 1,
+        "phase": "",
+        "general": 0,
+        "sell": 0,
+        "isBuy": 0,
+        "officX": 0,
+        "officY": 0,
+        "officW": 0,
+        "officH": 0,
+    }
+
+    def __init__(self, **fields):
+        super().__init__(**fields)
+
+        # 各阶段的累计时间（秒），去除重复阶段
+        self.phases: tuple[int, ...] = tuple(
+            dict.fromkeys(int(x) for x in str(self.phase).split(","))
+        )
+
+    @property
+    def phaseCount(self) -> int:
+        return len(self.phases)
+
+    @property
+    def iconPath(self) -> Path:
+        return g_sResourcePath / f"plant/{self.name}/icon.png"
+
+    def imagePath(self, stage: int) -> Path:
+        """作物指定阶段的图片路径，通用作物的第 0 阶段使用公共幼苗图片"""
+        if stage <= 0 and self.general:
+            return g_sResourcePath / "plant/basic/0.png"
+
+        return g_sResourcePath / f"plant/{self.name}/{stage}.png"
+
+
+class SoilPlot(CRecord):
+    """用户地块，对应 userSoil 表的一行"""
+
+    __slots__ = (
+        "uid",
+        "soilIndex",
+        "plantName",
+        "plantTime",
+        "matureTime",
+        "soilLevel",
+        "wiltStatus",
+        "fertilizerStatus",
+        "bugStatus",
+        "weedStatus",
+        "waterStatus",
+        "harvestCount",
+        "isSoilPlanted",
+    )
+
+    m_pDefaults = {
+        "uid": "",
+        "soilIndex": 0,
+        "plantName": "",
+        "plantTime": 0,
+        "matureTime": 0,
+        "soilLevel": 0,
+        "wiltStatus": 0,
+        "fertilizerStatus": 0,
+        "bugStatus": 0,
+        "weedStatus": 0,
+        "waterStatus": 0,
+        "harvestCount": 0,
+        "isSoilPlanted": None,
+    }
+
+    # 枯萎作物的图片
+    m_sWiltImage = g_sResourcePath / "plant/basic/9.png"
+
+    @property
+    def isPlanted(self) -> bool:
+        # isSoilPlanted 为 NULL 的旧数据以作物名称为准
+        return bool(self.plantName) and self.isSoilPlanted != 0
+
+    @property
+    def isWilted(self) -> bool:
+        return self.wiltStatus == 1
+
+    @property
+    def isGrowing(self) -> bool:
+        """已种植且未枯萎"""
+        return self.isPlanted and not self.isWilted
+
+    def isRipe(self, now: float) -> bool:
+        return self.isGrowing and now >= self.matureTime
+
+    def stage(self, plant: PlantDef, now: float) -> int:
+        """作物当前所处阶段，成熟时为最后一个阶段"""
+        if now >= self.matureTime:
+            return plant.phaseCount
+
+        elapsed = now - self.plantTime
+        return sum(1 for threshold in plant.phases if elapsed >= threshold)
+
+    def stageImage(self, plant: PlantDef, now: float) -> Path:
+        """作物当前阶段的图片路径"""
+        if self.isWilted:
+            return self.m_sWiltImage
+
+        return plant.imagePath(self.stage(plant, now))
+
+
+class FarmUser(CRecord):
+    """农场用户，对应 user 表的一行"""
+
+    __slots__ = (
+        "uid",
+        "name",
+        "exp",
+        "point",
+        "vipPoint",
+        "soil",
+        "stealTime",
+        "stealCount",
+        "nextMatureTime",
+        "hasWilted",
+    )
+
+    m_pDefaults = {
+        "uid": "",
+        "name": "",
+        "exp": 0,
+        "point": 0,
+        "vipPoint": 0,
+        "soil": 3,
+        "stealTime": "",
+        "stealCount": 0,
+        "nextMatureTime": 0,
+        "hasWilted": 0,
+    }
@@ -0,0 +1,154 @@
+"""userSoil 打包存储格式
+
+将一个用户的全部地块编码为单个 BLOB，读取整个农场只需一次行查询和一次解包。
+本模块只依赖标准库，可被 dev/soilPack.py 在插件外单独加载。
+
+格式（小端）:
+    头部      <BBH   版本号, 地块数, 作物名数
+    作物名表  每项为 <B 长度 + UTF-8 字节，地块通过下标引用，同名作物只存一次
+    地块      每块为定长的 PLOT_STRUCT
+"""
+
+import struct
+
+PACK_VERSION = 1
+
+HEADER_STRUCT = struct.Struct("<BBH")
+
+# soilIndex, 作物名下标, plantTime, matureTime, soilLevel, wiltStatus,
+# fertilizerStatus, bugStatus, weedStatus, waterStatus, harvestCount, isSoilPlanted
+PLOT_STRUCT = struct.Struct("<BHqqBBBBBBHB")
+
+# 与 PLOT_STRUCT 顺序一致的 userSoil 字段，作物名单独处理
+PLOT_FIELDS = (
+    "soilIndex",
+    "plantName",
+    "plantTime",
+    "matureTime",
+    "soilLevel",
+    "wiltStatus",
+    "fertilizerStatus",
+    "bugStatus",
+    "weedStatus",
+    "waterStatus",
+    "harvestCount",
+    "isSoilPlanted",
+)
+
+# 空地块的作物名下标
+NO_PLANT = 0xFFFF
+# isSoilPlanted 为 NULL 时的存储值
+PLANTED_NULL = 0xFF
+
+
+class PackError(ValueError):
+    pass
+
+
+def encodeFarm(soils: list[dict]) -> bytes:
+    """将用户的地块编码为打包格式
+
+    Args:
+        soils (list[dict]): userSoil 记录，字段缺失时按表默认值处理
+
+    Returns:
+        bytes: 打包后的数据
+    """
+    names: list[bytes] = []
+    nameIndex: dict[str, int] = {}
+    plots = []
+
+    for soil in sorted(soils, key=lambda s: s["soilIndex"]):
+        name = soil.get("plantName") or ""
+        index = NO_PLANT
+        if name:
+            if name not in nameIndex:
+                encoded = name.encode("utf-8")
+                if len(encoded) > 0xFF:
+                    raise PackError(f"作物名过长: {name}")
+
+                nameIndex[name] = len(names)
+                names.append(encoded)
+            index = nameIndex[name]
+
+        planted = soil.get("isSoilPlanted")
+        try:
+            plots.append(
+                PLOT_STRUCT.pack(
+                    soil["soilIndex"],
+                    index,
+                    int(soil.get("plantTime") or 0),
+                    int(soil.get("matureTime") or 0),
+                    soil.get("soilLevel") or 0,
+                    soil.get("wiltStatus") or 0,
+                    soil.get("fertilizerStatus") or 0,
+                    soil.get("bugStatus") or 0,
+                    soil.get("weedStatus") or 0,
+                    soil.get("waterStatus") or 0,
+                    soil.get("harvestCount") or 0,
+                    PLANTED_NULL if planted is None else planted,
+                )
+            )
+        except struct.error as e:
+            raise PackError(f"地块 {soil['soilIndex']} 超出打包范围: {e}") from e
+
+    if len(plots) > 0xFF:
+        raise PackError(f"地块数量过多: {len(plots)}")
+
+    parts = [HEADER_STRUCT.pack(PACK_VERSION, len(plots), len(names))]
+    for encoded in names:
+        parts.append(bytes((len(encoded),)))
+        parts.append(encoded)
+    parts.extend(plots)
+
+    return b"".join(parts)
+
+
+def decodeFarm(uid: str, data: bytes) -> list[dict]:
+    """解包用户地块
+
+    Args:
+        uid (str): 用户Uid，写入每条记录
+        data (bytes): encodeFarm 生成的数据
+
+    Returns:
+        list[dict]: 与 userSoil 行字段一致的记录，按 soilIndex 排序
+    """
+    view = memoryview(data)
+    try:
+        version, plotCount, nameCount = HEADER_STRUCT.unpack_from(view, 0)
+    except struct.error as e:
+        raise PackError("打包数据头部不完整") from e
+
+    if version != PACK_VERSION:
+        raise PackError(f"不支持的打包版本: {version}")
+
+    offset = HEADER_STRUCT.size
+    names = []
+    for _ in range(nameCount):
+        if offset >= len(view):
+            raise PackError("作物名表不完整")
+
+        length = view[offset]
+        names.append(bytes(view[offset + 1 : offset + 1 + length]).decode("utf-8"))
+        offset += 1 + length
+
+    if len(view) - offset != plotCount * PLOT_STRUCT.size:
+        raise PackError("地块数据长度与头部不一致")
+
+    soils = []
+    for values in PLOT_STRUCT.iter_unpack(view[offset:]):
+        soil = dict(zip(PLOT_FIELDS, values))
+        soil["uid"] = uid
+        if values[1] == NO_PLANT:
+            soil["plantName"] = ""
+        elif values[1] < len(names):
+            soil["plantName"] = names[values[1]]
+        else:
+            raise PackError(f"地块 {values[0]} 的作物名下标越界")
+
+        if soil["isSoilPlanted"] == PLANTED_NULL:
+            soil["isSoilPlanted"] = None
+        soils.append(soil)
+
+    return soils
@@ -4,6 +4,8 @@ from zhenxun.services.log import logger
 
 from ..tool import g_pToolManager
 from .database import CSqlManager
+from .farmCache import g_pUserCache
+from .record import FarmUser
 
 
 class CUserDB(CSqlManager):
@@ -19,9 +21,15 @@ class CUserDB(CSqlManager):
             "soil": "INTEGER DEFAULT 3",  # 解锁土地数量
             "stealTime": "TEXT DEFAULT ''",  # 偷菜时间字符串
             "stealCount": "INTEGER DEFAULT 0",  # 剩余偷菜次数
+            "nextMatureTime": "INTEGER DEFAULT 0",  # 最早成熟时间 0=没有生长中的作物
+            "hasWilted": "INTEGER DEFAULT 0",  # 是否有枯萎作物 0=没有，1=有
         }
         await cls.ensureTableSchema("user", userInfo)
 
+        g_pUserCache.clear()
+        if await cls.getTableInfo("user"):
+            g_pUserCache.m_pRegistered = set(await cls.getAllUsers())
+
     @classmethod
     async def initUserInfoByUid(
         cls, uid: str, name: str = "", exp: int = 0, point: int = 500
@@ -45,6 +53,9 @@ class CUserDB(CSqlManager):
         try:
             async with cls._transaction():
                 await cls.m_pDB.execute(sql)
+
+            g_pUserCache.evict(uid)
+            g_pUserCache.addRegistered(uid)
             return "开通农场成功"
         except Exception as e:
             logger.warning("initUserInfoByUid 事务执行失败！", e=e)
@@ -73,42 +84,51 @@ class CUserDB(CSqlManager):
         """
         if not uid:
             return False
-        try:
-            async with cls.m_pDB.execute(
-                "SELECT 1 FROM user WHERE uid = ?", (uid,)
-            ) as cursor:
-                row = await cursor.fetchone()
-                return row is not None
-        except Exception as e:
-            logger.warning("isUserExist 查询失败！", e=e)
-            return False
+
+        if g_pUserCache.m_pRegistered is None:
+            try:
+                g_pUserCache.m_pRegistered = set(await cls.getAllUsers())
+            except Exception as e:
+                logger.warning("isUserExist 查询失败！", e=e)
+                return False
+
+        return uid in g_pUserCache.m_pRegistered
 
     @classmethod
-    async def getUserInfoByUid(cls, uid: str) -> dict:
-        """获取指定用户完整信息
+    async def getUserInfoByUid(cls, uid: str) -> FarmUser | None:
+        """获取指定用户完整信息，优先读取缓存
 
         Args:
             uid (str): 用户Uid
 
         Returns:
-            dict: 包含所有用户字段的字典
+            FarmUser | None: 用户记录，与缓存共享不应修改，不存在或查询失败时返回 None
         """
         if not uid:
-            return {}
+            return None
+
+        user = g_pUserCache.get(uid)
+        if user is not None:
+            return user
+
+        g_pUserCache.beginLoad(uid)
         try:
             async with cls.m_pDB.execute(
                 "SELECT * FROM user WHERE uid = ?", (uid,)
             ) as cursor:
-                row = await cursor.fetchone()
-                if not row:
-                    return {}
-
-                result = dict(row)
-
-            return result
+                cursor.row_factory = FarmUser.rowFactory
+                user = await cursor.fetchone()
         except Exception as e:
+            g_pUserCache.abortLoad(uid)
             logger.warning("getUserInfoByUid 查询失败！", e=e)
-            return {}
+            return None
+
+        if user is None:
+            g_pUserCache.abortLoad(uid)
+        else:
+            g_pUserCache.endLoad(uid, user)
+
+        return user
 
     @classmethod
     async def getUserNameByUid(cls, uid: str) -> str:
@@ -120,17 +140,8 @@ class CUserDB(CSqlManager):
         Returns:
             str: 用户名，失败返回空字符串
         """
-        if not uid:
-            return ""
-        try:
-            async with cls.m_pDB.execute(
-                "SELECT name FROM user WHERE uid = ?", (uid,)
-            ) as cursor:
-                row = await cursor.fetchone()
-                return row["name"] if row else ""
-        except Exception as e:
-            logger.warning("getUserNameByUid 查询失败！", e=e)
-            return ""
+        user = await cls.getUserInfoByUid(uid)
+        return user.name if user else ""
 
     @classmethod
     async def updateUserNameByUid(cls, uid: str, name: str) -> bool:
@@ -150,6 +161,8 @@ class CUserDB(CSqlManager):
                 await cls.m_pDB.execute(
                     "UPDATE user SET name = ? WHERE uid = ?", (name, uid)
                 )
+
+            g_pUserCache.setFields(uid, name=name)
             return True
         except Exception as e:
             logger.warning("updateUserNameByUid 事务执行失败！", e=e)
@@ -165,17 +178,8 @@ class CUserDB(CSqlManager):
         Returns:
             int: 农场币数量，失败返回 -1
         """
-        if not uid:
-            return -1
-        try:
-            async with cls.m_pDB.execute(
-                "SELECT point FROM user WHERE uid = ?", (uid,)
-            ) as cursor:
-                row = await cursor.fetchone()
-                return int(row[0]) if row and row[0] is not None else -1
-        except Exception as e:
-            logger.warning("getUserPointByUid 查询失败！", e=e)
-            return -1
+        user = await cls.getUserInfoByUid(uid)
+        return int(user.point) if user else -1
 
     @classmethod
     async def updateUserPointByUid(cls, uid: str, point: int) -> bool:
@@ -196,6 +200,8 @@ class CUserDB(CSqlManager):
                 await cls.m_pDB.execute(
                     "UPDATE user SET point = ? WHERE uid = ?", (point, uid)
                 )
+
+            g_pUserCache.setFields(uid, point=point)
             return True
         except Exception as e:
             logger.error("updateUserPointByUid 事务执行失败！", e=e)
@@ -211,17 +217,8 @@ class CUserDB(CSqlManager):
         Returns:
             int: 点券数量，失败返回 -1
         """
-        if not uid:
-            return -1
-        try:
-            async with cls.m_pDB.execute(
-                "SELECT vipPoint FROM user WHERE uid = ?", (uid,)
-            ) as cursor:
-                row = await cursor.fetchone()
-                return int(row[0]) if row and row[0] is not None else -1
-        except Exception as e:
-            logger.warning("getUservipPointByUid 查询失败！", e=e)
-            return -1
+        user = await cls.getUserInfoByUid(uid)
+        return int(user.vipPoint) if user else -1
 
     @classmethod
     async def updateUserVipPointByUid(cls, uid: str, vipPoint: int) -> bool:
@@ -242,6 +239,8 @@ class CUserDB(CSqlManager):
                 await cls.m_pDB.execute(
                     "UPDATE user SET vipPoint = ? WHERE uid = ?", (vipPoint, uid)
                 )
+
+            g_pUserCache.setFields(uid, vipPoint=vipPoint)
             return True
         except Exception as e:
             logger.error("updateUservipPointByUid 事务执行失败！", e=e)
@@ -257,17 +256,8 @@ class CUserDB(CSqlManager):
         Returns:
             int: 经验值，失败返回 -1
         """
-        if not uid:
-            return -1
-        try:
-            async with cls.m_pDB.execute(
-                "SELECT exp FROM user WHERE uid = ?", (uid,)
-            ) as cursor:
-                row = await cursor.fetchone()
-                return int(row[0]) if row and row[0] is not None else -1
-        except Exception as e:
-            logger.warning("getUserExpByUid 查询失败！", e=e)
-            return -1
+        user = await cls.getUserInfoByUid(uid)
+        return int(user.exp) if user else -1
 
     @classmethod
     async def updateUserExpByUid(cls, uid: str, exp: int) -> bool:
@@ -287,6 +277,8 @@ class CUserDB(CSqlManager):
                 await cls.m_pDB.execute(
                     "UPDATE user SET exp = ? WHERE uid = ?", (exp, uid)
                 )
+
+            g_pUserCache.setFields(uid, exp=exp)
             return True
         except Exception as e:
             logger.warning("updateUserExpByUid 事务执行失败！", e=e)
@@ -306,36 +298,27 @@ class CUserDB(CSqlManager):
         if not uid:
             return -1, -1, -1
 
-        try:
-            async with cls.m_pDB.execute(
-                "SELECT exp FROM user WHERE uid = ?", (uid,)
-            ) as cursor:
-                row = await cursor.fetchone()
-                if not row or row[0] is None:
-                    return -1, -1, -1
-
-                expVal = int(row[0])
-                levelStep = 200  # 每级经验增量
+        user = await cls.getUserInfoByUid(uid)
+        if not user:
+            return -1, -1, -1
 
-                discriminant = 1 + 8 * expVal / levelStep
-                level = int((-1 + math.sqrt(discriminant)) // 2)
-                if level < 0:
-                    level = 0
+        expVal = int(user.exp)
+        levelStep = 200  # 每级经验增量
 
-                def cumExp(k: int) -> int:
-                    return levelStep * k * (k + 1) // 2
+        discriminant = 1 + 8 * expVal / levelStep
+        level = int((-1 + math.sqrt(discriminant)) // 2)
+        if level < 0:
+            level = 0
 
-                totalExpCurrentLevel = cumExp(level)
-                totalExpNextLevel = cumExp(level + 1)
+        def cumExp(k: int) -> int:
+            return levelStep * k * (k + 1) // 2
 
-                currentExp = expVal - totalExpCurrentLevel
+        totalExpCurrentLevel = cumExp(level)
+        totalExpNextLevel = cumExp(level + 1)
 
-                return level, totalExpNextLevel, currentExp
+        currentExp = expVal - totalExpCurrentLevel
 
-            return -1, -1, -1
-        except Exception as e:
-            logger.warning("getUserLevelByUid 查询失败！", e=e)
-            return -1, -1, -1
+        return level, totalExpNextLevel, currentExp
 
     @classmethod
     async def getUserSoilByUid(cls, uid: str) -> int:
@@ -347,17 +330,23 @@ class CUserDB(CSqlManager):
         Returns:
             int: 解锁土地块数，失败返回0
         """
-        if not uid:
-            return 0
-        try:
-            async with cls.m_pDB.execute(
-                "SELECT soil FROM user WHERE uid = ?", (uid,)
-            ) as cursor:
-                row = await cursor.fetchone()
-                return int(row[0]) if row and row[0] is not None else 0
-        except Exception as e:
-            logger.warning("getUserSoilByUid 查询失败！", e=e)
-            return 0
+        user = await cls.getUserInfoByUid(uid)
+        return int(user.soil) if user else 0
+
+    @classmethod
+    async def getSoilSummaryByUid(cls, uid: str) -> tuple[int, bool]:
+        """获取用户土地摘要，由 userSoil 的每次写入同步维护
+
+        Args:
+            uid (str): 用户Uid
+
+        Returns:
+            tuple[int, bool]: (最早成熟时间 没有生长中的作物为0, 是否有枯萎作物)
+        """
+        user = await cls.getUserInfoByUid(uid)
+        if not user:
+            return 0, False
+        return int(user.nextMatureTime), bool(user.hasWilted)
 
     @classmethod
     async def updateUserSoilByUid(cls, uid: str, soil: int) -> bool:
@@ -377,6 +366,8 @@ class CUserDB(CSqlManager):
                 await cls.m_pDB.execute(
                     "UPDATE user SET soil = ? WHERE uid = ?", (soil, uid)
                 )
+
+            g_pUserCache.setFields(uid, soil=soil)
             return True
         except Exception as e:
             logger.warning("updateUserSoilByUid 事务执行失败！", e=e)
@@ -392,17 +383,8 @@ class CUserDB(CSqlManager):
         Returns:
             str: 偷菜时间字符串，失败返回空字符串
         """
-        if not uid:
-            return ""
-        try:
-            async with cls.m_pDB.execute(
-                "SELECT stealTime FROM user WHERE uid = ?", (uid,)
-            ) as cursor:
-                row = await cursor.fetchone()
-                return row[0] if row and row[0] else ""
-        except Exception as e:
-            logger.warning("getStealTimeByUid 查询失败！", e=e)
-            return ""
+        user = await cls.getUserInfoByUid(uid)
+        return user.stealTime if user else ""
 
     @classmethod
     async def updateStealTimeByUid(cls, uid: str, stealTime: str) -> bool:
@@ -423,6 +405,8 @@ class CUserDB(CSqlManager):
                 await cls.m_pDB.execute(
                     "UPDATE user SET stealTime = ? WHERE uid = ?", (stealTime, uid)
                 )
+
+            g_pUserCache.setFields(uid, stealTime=stealTime)
             return True
         except Exception as e:
             logger.warning("updateStealTimeByUid 事务执行失败！", e=e)
@@ -438,17 +422,8 @@ class CUserDB(CSqlManager):
         Returns:
             int: 剩余偷菜次数，失败返回 -1
         """
-        if not uid:
-            return -1
-        try:
-            async with cls.m_pDB.execute(
-                "SELECT stealCount FROM user WHERE uid = ?", (uid,)
-            ) as cursor:
-                row = await cursor.fetchone()
-                return int(row[0]) if row and row[0] is not None else 0
-        except Exception as e:
-            logger.warning("getStealCountByUid 查询失败！", e=e)
-            return -1
+        user = await cls.getUserInfoByUid(uid)
+        return int(user.stealCount) if user else 0
 
     @classmethod
     async def updateStealCountByUid(
@@ -473,6 +448,8 @@ class CUserDB(CSqlManager):
                     "UPDATE user SET stealTime = ?, stealCount = ? WHERE uid = ?",
                     (stealTime, stealCount, uid),
                 )
+
+            g_pUserCache.setFields(uid, stealTime=stealTime, stealCount=stealCount)
             return True
         except Exception as e:
             logger.warning("updateStealCountByUid 事务执行失败！", e=e)
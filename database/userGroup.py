@@ -0,0 +1,125 @@
+from zhenxun.services.log import logger
+
+from .database import CSqlManager
+
+
+class CUserGroupDB(CSqlManager):
+    @classmethod
+    async def initDB(cls):
+        userGroup = {
+            "uid": "TEXT NOT NULL",  # 用户Uid
+            "groupId": "TEXT NOT NULL",  # 用户使用过农场指令的群号
+            "notify": "INTEGER DEFAULT 0",  # 是否在该群接收作物成熟提醒 0=否，1=是
+            "botId": "TEXT DEFAULT ''",  # 用户最近一次在该群使用指令时响应的Bot
+            "PRIMARY KEY": "(uid, groupId)",
+        }
+
+        await cls.ensureTableSchema("userGroup", userGroup)
+
+    @classmethod
+    async def addUserGroup(cls, uid: str, groupId: str, botId: str = "") -> bool:
+        """记录用户所在的群，已存在时更新响应的Bot
+
+        Args:
+            uid (str): 用户Uid
+            groupId (str): 群号
+            botId (str, optional): 响应指令的Bot
+
+        Returns:
+            bool: 是否成功
+        """
+        try:
+            async with cls._transaction():
+                await cls.m_pDB.execute(
+                    """
+                    INSERT INTO userGroup (uid, groupId, botId) VALUES (?, ?, ?)
+                    ON CONFLICT(uid, groupId) DO UPDATE SET botId = excluded.botId
+                    WHERE excluded.botId != ''
+                    """,
+                    (uid, groupId, botId),
+                )
+            return True
+        except Exception as e:
+            logger.warning("记录用户群失败", e=e)
+            return False
+
+    @classmethod
+    async def getAllUserGroups(cls) -> list[tuple[str, str, str]]:
+        """获取全部用户与群的对应关系
+
+        Returns:
+            list[tuple[str, str, str]]: (uid, groupId, botId) 列表
+        """
+        try:
+            cursor = await cls.m_pDB.execute(
+                "SELECT uid, groupId, botId FROM userGroup"
+            )
+            rows = await cursor.fetchall()
+            return [(row[0], row[1], row[2] or "") for row in rows]
+        except Exception as e:
+            logger.warning("获取用户群失败", e=e)
+            return []
+
+    @classmethod
+    async def setNotify(cls, uid: str, groupId: str, notify: bool) -> bool:
+        """设置用户在指定群是否接收作物成熟提醒
+
+        Args:
+            uid (str): 用户Uid
+            groupId (str): 群号
+            notify (bool): 是否接收提醒
+
+        Returns:
+            bool: 是否成功
+        """
+        try:
+            async with cls._transaction():
+                await cls.m_pDB.execute(
+                    """
+                    INSERT INTO userGroup (uid, groupId, notify) VALUES (?, ?, ?)
+                    ON CONFLICT(uid, groupId) DO UPDATE SET notify = excluded.notify
+                    """,
+                    (uid, groupId, int(notify)),
+                )
+            return True
+        except Exception as e:
+            logger.warning("设置成熟提醒失败", e=e)
+            return False
+
+    @classmethod
+    async def getNotifyGroups(cls) -> list[tuple[str, str]]:
+        """获取开启了成熟提醒的用户与群
+
+        Returns:
+            list[tuple[str, str]]: (uid, groupId) 列表
+        """
+        try:
+            cursor = await cls.m_pDB.execute(
+                "SELECT uid, groupId FROM userGroup WHERE notify = 1"
+            )
+            rows = await cursor.fetchall()
+            return [(row[0], row[1]) for row in rows]
+        except Exception as e:
+            logger.warning("获取成熟提醒用户失败", e=e)
+            return []
+
+    @classmethod
+    async def getGroupBots(cls, groupId: str) -> list[str]:
+        """获取群内用户使用指令时响应过的Bot
+
+        Args:
+            groupId (str): 群号
+
+        Returns:
+            list[str]: Bot 的 self_id 列表
+        """
+        try:
+            cursor = await cls.m_pDB.execute(
+                "SELECT DISTINCT botId FROM userGroup WHERE groupId = ? AND botId != ''",
+                (groupId,),
+            )
+            rows = await cursor.fetchall()
+            return [row[0] for row in rows]
+        except Exception as e:
+            logger.warning("获取群Bot失败", e=e)
+            return []
@@ -1,15 +1,16 @@
-import calendar
 from datetime import timedelta
 import random
 
+import aiosqlite
+
 from zhenxun.services.log import logger
-from zhenxun.utils._build_image import BuildImage
 
 from ..config import g_bIsDebug
 from ..dbService import g_pDBService
 from ..json import g_pJsonManager
 from ..tool import g_pToolManager
 from .database import CSqlManager
+from .farmCache import g_pUserCache
 
 
 class CUserSignDB(CSqlManager):
@@ -35,11 +36,42 @@ class CUserSignDB(CSqlManager):
             "lastSignDate": "DATE DEFAULT NULL",  # 上次签到日期
             "continuousDays": "INT NOT NULL DEFAULT 0",  # 连续签到天数
             "supplementCount": "INT NOT NULL DEFAULT 0",  # 补签次数
+            "monthSignMask": "INT NOT NULL DEFAULT 0",  # 当前月份签到位图 第n位为n+1日
             "updatedAt": "DATETIME NOT NULL DEFAULT (datetime(CURRENT_TIMESTAMP, 'localtime'))",  # 更新时间  # noqa: E501
         }
 
+        # userSignMonth 表结构，超过保留期的签到记录按用户按月压缩为一行
+        userSignMonth = {
+            "uid": "TEXT NOT NULL",  # 用户ID
+            "month": "CHAR(7) NOT NULL",  # 月份（如2025-05）
+            "signMask": "INT NOT NULL DEFAULT 0",  # 签到位图 第n位为n+1日
+            "signDays": "INT NOT NULL DEFAULT 0",  # 签到天数
+            "supplementDays": "INT NOT NULL DEFAULT 0",  # 补签天数
+            "exp": "INT NOT NULL DEFAULT 0",  # 当月签到经验合计
+            "point": "INT NOT NULL DEFAULT 0",  # 当月签到金币合计
+            "PRIMARY KEY": "(uid, month)",
+        }
+
         await cls.ensureTableSchema("userSignLog", userSignLog)
-        await cls.ensureTableSchema("userSignSummary", userSignSummary)
+        await cls.ensureTableSchema("userSignMonth", userSignMonth)
+
+        if await cls.ensureTableSchema("userSignSummary", userSignSummary):
+            # 新增签到位图字段后，根据签到记录回填当前月份的位图
+            async with cls._transaction():
+                await cls.m_pDB.execute(
+                    """
+                    UPDATE userSignSummary SET monthSignMask = (
+                        SELECT COALESCE(
+                            SUM(1 << (CAST(substr(signDate, 9, 2) AS INTEGER) - 1)), 0
+                        )
+                        FROM userSignLog
+                        WHERE userSignLog.uid = userSignSummary.uid
+                          AND signDate BETWEEN currentMonth || '-01'
+                                           AND currentMonth || '-31'
+                    )
+                    WHERE monthSignMask = 0 AND monthSignDays > 0
+                    """
+                )
 
     @classmethod
     async def getUserSignRewardByDate(cls, uid: str, date: str) -> tuple[int, int]:
@@ -71,6 +103,51 @@ class CUserSignDB(CSqlManager):
             logger.warning("获取用户签到数据失败", e=e)
             return 0, 0
 
+    @classmethod
+    def monthRange(cls, monthStr: str) -> tuple[str, str]:
+        """获取月份的日期范围，用于 signDate BETWEEN ? AND ? 范围查询
+
+        Args:
+            monthStr (str): 月份 示例: 2025-05
+
+        Returns:
+            tuple[str, str]: ('2025-05-01', '2025-05-31')
+        """
+        return f"{monthStr}-01", f"{monthStr}-31"
+
+    @classmethod
+    async def getArchivedMonth(cls, uid: str, monthStr: str) -> dict | None:
+        """获取已压缩归档的月份签到数据"""
+        try:
+            async with cls.m_pDB.execute(
+                "SELECT * FROM userSignMonth WHERE uid=? AND month=?", (uid, monthStr)
+            ) as cursor:
+                row = await cursor.fetchone()
+                return dict(row) if row else None
+        except Exception as e:
+            logger.warning("查询归档签到数据失败", e=e)
+            return None
+
+    @classmethod
+    async def getUserSignSummary(cls, uid: str) -> dict | None:
+        """获取用户签到汇总
+
+        Args:
+            uid (str): 用户Uid
+
+        Returns:
+            dict | None: 汇总行，从未签到时返回 None
+        """
+        try:
+            async with cls.m_pDB.execute(
+                "SELECT * FROM userSignSummary WHERE uid=?", (uid,)
+            ) as cursor:
+                row = await cursor.fetchone()
+                return dict(row) if row else None
+        except Exception as e:
+            logger.warning("查询用户签到汇总失败", e=e)
+            return None
+
     @classmethod
     async def getUserSignCountByDate(cls, uid: str, monthStr: str) -> int:
         """根据日期查询用户签到总天数
@@ -82,10 +159,22 @@ class CUserSignDB(CSqlManager):
         Returns:
             int: 查询月总签到天数
         """
+        summary = await cls.getUserSignSummary(uid)
+        if summary and summary["currentMonth"] == monthStr:
+            return summary["monthSignMask"].bit_count()
+
+        archived = await cls.getArchivedMonth(uid, monthStr)
+        if archived:
+            return archived["signDays"]
+
         try:
-            sql = "SELECT COUNT(*) FROM userSignLog WHERE uid=? AND signDate LIKE ?"
-            param = f"{monthStr}-%"
-            async with cls.m_pDB.execute(sql, (uid, param)) as cursor:
+            sql = (
+                "SELECT COUNT(*) FROM userSignLog "
+                "WHERE uid=? AND signDate BETWEEN ? AND ?"
+            )
+            async with cls.m_pDB.execute(
+                sql, (uid, *cls.monthRange(monthStr))
+            ) as cursor:
                 row = await cursor.fetchone()
                 return row[0] if row else 0
         except Exception as e:
@@ -103,6 +192,14 @@ class CUserSignDB(CSqlManager):
         Returns:
             bool: True=已签到，False=未签到
         """
+        summary = await cls.getUserSignSummary(uid)
+        if summary and summary["currentMonth"] == signDate[:7]:
+            return bool(summary["monthSignMask"] >> (int(signDate[8:10]) - 1) & 1)
+
+        archived = await cls.getArchivedMonth(uid, signDate[:7])
+        if archived:
+            return bool(archived["signMask"] >> (int(signDate[8:10]) - 1) & 1)
+
         try:
             sql = "SELECT 1 FROM userSignLog WHERE uid=? AND signDate=? LIMIT 1"
             async with cls.m_pDB.execute(sql, (uid, signDate)) as cursor:
@@ -123,29 +220,91 @@ class CUserSignDB(CSqlManager):
         Returns:
             bool: 0: 签到失败 1: 签到成功 2: 重复签到
         """
-        try:
-            if not signDate:
-                signDate = g_pToolManager.dateTime().date().today().strftime("%Y-%m-%d")
+        return (await cls.signIn(uid, signDate))["status"]
 
-            if await cls.hasSigned(uid, signDate):
-                return 2
+    @classmethod
+    async def signIn(cls, uid: str, signDate: str = "") -> dict:
+        """签到，读取一次签到汇总，签到记录、汇总与用户奖励在同一事务中写入
+
+        签到汇总中的位图只记录 currentMonth 当月，补签往月时才需要查询签到记录
 
+        Args:
+            uid (int): 用户ID
+            signDate (str): 日期字符串 'YYYY-MM-DD' 不传默认当前系统日期
+
+        Returns:
+            dict: {"status": 0失败 1成功 2重复签到, "monthSignDays": 当月签到天数,
+                "exp": 签到经验, "point": 签到金币, "reward": 累签奖励 SignReward | None}
+        """
+        result = {"status": 0, "monthSignDays": 0, "exp": 0, "point": 0, "reward": None}
+        try:
             todayStr = g_pToolManager.dateTime().date().today().strftime("%Y-%m-%d")
+            if not signDate:
+                signDate = todayStr
+
+            currentMonth = signDate[:7]
+            bit = 1 << (int(signDate[8:10]) - 1)
+
+            row = await cls.getUserSignSummary(uid)
+
+            if row is None:
+                row = {
+                    "totalSignDays": 0,
+                    "currentMonth": currentMonth,
+                    "monthSignMask": 0,
+                    "lastSignDate": None,
+                    "continuousDays": 0,
+                    "supplementCount": 0,
+                }
+
+            if row["currentMonth"] == currentMonth:
+                if row["monthSignMask"] & bit:
+                    result["status"] = 2
+                    result["monthSignDays"] = row["monthSignMask"].bit_count()
+                    return result
+
+                monthSignMask = row["monthSignMask"] | bit
+            elif row["currentMonth"] < currentMonth:
+                # 进入新的月份，位图重新计数
+                monthSignMask = bit
+            else:
+                # 补签往月，不影响当前月份的位图
+                if await cls.hasSigned(uid, signDate):
+                    result["status"] = 2
+                    return result
+
+                currentMonth = row["currentMonth"]
+                monthSignMask = row["monthSignMask"]
+
             isSupplement = 0 if signDate == todayStr else 1
 
-            expMax, expMin, pointMax, pointMin = [
-                g_pJsonManager.m_pSign.get(key, default)
-                for key, default in (
-                    ("exp_max", 50),
-                    ("exp_min", 5),
-                    ("point_max", 2000),
-                    ("point_min", 200),
-                )
-            ]
+            lastSignDate = row["lastSignDate"]
+            continuousDays = row["continuousDays"]
+            if not lastSignDate or signDate > lastSignDate:
+                prevDate = (
+                    g_pToolManager.dateTime().strptime(signDate, "%Y-%m-%d")
+                    - timedelta(days=1)
+                ).strftime("%Y-%m-%d")
+                continuousDays = continuousDays + 1 if lastSignDate == prevDate else 1
+                lastSignDate = signDate
+
+            signConfig = g_pJsonManager.m_pSign
 
-            exp = random.randint(expMin, expMax)
-            point = random.randint(pointMin, pointMax)
-            vipPoint = 0
+            exp = random.randint(signConfig.m_iExpMin, signConfig.m_iExpMax)
+            point = random.randint(signConfig.m_iPointMin, signConfig.m_iPointMax)
+
+            # 计算累签奖励，补签往月不计入当月累签
+            monthSignDays = monthSignMask.bit_count()
+            reward = None
+            if currentMonth == signDate[:7]:
+                reward = signConfig.reward(monthSignDays)
+
+            totalExp = exp + (reward.exp if reward else 0)
+            totalPoint = point + (reward.point if reward else 0)
+            vipPoint = reward.vipPoint if reward else 0
+
+            if g_bIsDebug:
+                totalExp += 9999
 
             async with cls._transaction():
                 await cls.m_pDB.execute(
@@ -153,138 +312,177 @@ class CUserSignDB(CSqlManager):
                     (uid, signDate, isSupplement, exp, point),
                 )
 
-                cursor = await cls.m_pDB.execute(
-                    "SELECT * FROM userSignSummary WHERE uid=?", (uid,)
+                await cls.m_pDB.execute(
+                    """
+                    INSERT INTO userSignSummary
+                    (uid, totalSignDays, currentMonth, monthSignDays, lastSignDate, continuousDays, supplementCount, monthSignMask)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(uid) DO UPDATE SET
+                        totalSignDays=excluded.totalSignDays,
+                        currentMonth=excluded.currentMonth,
+                        monthSignDays=excluded.monthSignDays,
+                        lastSignDate=excluded.lastSignDate,
+                        continuousDays=excluded.continuousDays,
+                        supplementCount=excluded.supplementCount,
+                        monthSignMask=excluded.monthSignMask
+                    """,
+                    (
+                        uid,
+                        row["totalSignDays"] + 1,
+                        currentMonth,
+                        monthSignMask.bit_count(),
+                        lastSignDate,
+                        continuousDays,
+                        row["supplementCount"] + isSupplement,
+                        monthSignMask,
+                    ),
                 )
-                row = await cursor.fetchone()
 
-                currentMonth = signDate[:7]
-                if row:
-                    monthSignDays = (
-                        row["monthSignDays"] + 1
-                        if row["currentMonth"] == currentMonth
-                        else 1
-                    )
-                    lastDate = row["lastSignDate"]
-                    prevDate = (
-                        g_pToolManager.dateTime().strptime(signDate, "%Y-%m-%d")
-                        - timedelta(days=1)
-                    ).strftime("%Y-%m-%d")
-                    continuousDays = (
-                        row["continuousDays"] + 1 if lastDate == prevDate else 1
-                    )
-                    supplementCount = (
-                        row["supplementCount"] + 1
-                        if isSupplement
-                        else row["supplementCount"]
-                    )
-                    await cls.m_pDB.execute(
-                        """
-                        UPDATE userSignSummary
-                        SET totalSignDays=totalSignDays+1,
-                            currentMonth=?,
-                            monthSignDays=?,
-                            lastSignDate=?,
-                            continuousDays=?,
-                            supplementCount=?
-                        WHERE uid=?
-                        """,
-                        (
-                            currentMonth,
-                            monthSignDays,
-                            signDate,
-                            continuousDays,
-                            supplementCount,
-                            uid,
-                        ),
-                    )
-                else:
-                    monthSignDays = 1
-                    await cls.m_pDB.execute(
-                        """
-                        INSERT INTO userSignSummary
-                        (uid, totalSignDays, currentMonth, monthSignDays, lastSignDate, continuousDays, supplementCount)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                        """,
-                        (
-                            uid,
-                            1,
-                            currentMonth,
-                            monthSignDays,
-                            signDate,
-                            1,
-                            1 if isSupplement else 0,
-                        ),
-                    )
+                await cls.m_pDB.execute(
+                    """
+                    UPDATE user
+                    SET exp = COALESCE(exp, 0) + ?,
+                        point = COALESCE(point, 0) + ?,
+                        vipPoint = COALESCE(vipPoint, 0) + ?
+                    WHERE uid = ?
+                    """,
+                    (totalExp, totalPoint, vipPoint, uid),
+                )
 
-            # 计算累签奖励
-            reward = g_pJsonManager.m_pSign["continuou"].get(f"{monthSignDays}", None)
-            if reward:
-                point += reward.get("point", 0)
-                exp += reward.get("exp", 0)
-                vipPoint = reward.get("vipPoint", 0)
+            g_pUserCache.invalidate(uid, "exp", "point", "vipPoint")
+
+            if reward and reward.plant:
+                for key, value in reward.plant.items():
+                    await g_pDBService.userSeed.addUserSeedByUid(uid, key, value)
+
+            result.update(
+                status=1,
+                monthSignDays=monthSignDays,
+                exp=exp,
+                point=point,
+                reward=reward,
+            )
+            return result
+        except aiosqlite.IntegrityError:
+            # 并发签到时签到记录主键冲突，视为重复签到
+            result["status"] = 2
+            return result
+        except Exception as e:
+            logger.warning("执行签到失败", e=e)
+            return result
 
-                plant = reward.get("plant", {})
-                if plant:
-                    for key, value in plant.items():
-                        await g_pDBService.userSeed.addUserSeedByUid(uid, key, value)
+    @classmethod
+    async def getUserSignMaskByMonth(cls, uid: str, year: int, month: int) -> int:
+        """获取用户指定月份的签到位图
 
-            if g_bIsDebug:
-                exp += 9999
+        Args:
+            uid (str): 用户Uid
+            year (int): 年
+            month (int): 月
 
-            # 向数据库更新
-            currentExp = await g_pDBService.user.getUserExpByUid(uid)
-            await g_pDBService.user.updateUserExpByUid(uid, currentExp + exp)
+        Returns:
+            int: 第 n 位为 1 表示 n + 1 日已签到
+        """
+        monthStr = f"{year:04d}-{month:02d}"
 
-            currentPoint = await g_pDBService.user.getUserPointByUid(uid)
-            await g_pDBService.user.updateUserPointByUid(uid, currentPoint + point)
+        summary = await cls.getUserSignSummary(uid)
+        if summary and summary["currentMonth"] == monthStr:
+            return summary["monthSignMask"]
 
-            if vipPoint > 0:
-                currentVipPoint = await g_pDBService.user.getUserVipPointByUid(uid)
-                await g_pDBService.user.updateUserVipPointByUid(
-                    uid, currentVipPoint + vipPoint
-                )
+        archived = await cls.getArchivedMonth(uid, monthStr)
+        if archived:
+            return archived["signMask"]
 
-            return 1
+        try:
+            sql = (
+                "SELECT signDate FROM userSignLog "
+                "WHERE uid=? AND signDate BETWEEN ? AND ?"
+            )
+            async with cls.m_pDB.execute(
+                sql, (uid, *cls.monthRange(monthStr))
+            ) as cursor:
+                rows = await cursor.fetchall()
         except Exception as e:
-            logger.warning("执行签到失败", e=e)
+            logger.warning("查询用户月签到记录失败", e=e)
             return 0
 
+        signMask = 0
+        for row in rows:
+            day = row[0][-2:]
+            if day.isdigit():
+                signMask |= 1 << (int(day) - 1)
+
+        return signMask
+
     @classmethod
-    async def drawSignCalendarImage(cls, uid: str, year: int, month: int):
-        # 绘制签到图，自动提取数据库中该用户该月的签到天数
-        cellSize = 80
-        padding = 40
-        titleHeight = 80
-        cols = 7
-        rows = 6
-        width = cellSize * cols + padding * 2
-        height = cellSize * rows + padding * 2 + titleHeight
-
-        img = BuildImage(width, height, color=(255, 255, 255))
-        await img.text((padding, 20), f"{year}年{month}月签到表", font_size=36)
-
-        firstWeekday, totalDays = calendar.monthrange(year, month)
-        monthStr = f"{year:04d}-{month:02d}"
+    async def drawSignCalendarImage(cls, uid: str, year: int, month: int) -> bytes:
+        """绘制用户指定月份的签到日历
+
+        Args:
+            uid (str): 用户Uid
+            year (int): 年
+            month (int): 月
+
+        Returns:
+            bytes: 签到日历 PNG
+        """
+        from ..farm.signCalendar import g_pSignCalendarManager
+
+        signMask = await cls.getUserSignMaskByMonth(uid, year, month)
+        return await g_pSignCalendarManager.drawCalendar(year, month, signMask)
+
+    @classmethod
+    async def rollupSignLog(cls, retainMonths: int) -> int:
+        """将超过保留期的签到记录按用户按月压缩到 userSignMonth 并删除原记录
+
+        Args:
+            retainMonths (int): 保留最近几个月（含当月）的逐日签到记录
+
+        Returns:
+            int: 被压缩的签到记录条数，失败返回 -1
+        """
+        if retainMonths < 1:
+            return 0
+
+        today = g_pToolManager.dateTime().date().today()
+        monthIndex = today.year * 12 + today.month - 1 - (retainMonths - 1)
+        cutoff = f"{monthIndex // 12:04d}-{monthIndex % 12 + 1:02d}-01"
+
         try:
-            sql = "SELECT signDate FROM userSignLog WHERE uid=? AND signDate LIKE ?"
-            async with cls.m_pDB.execute(sql, (uid, f"{monthStr}-%")) as cursor:
-                rows = await cursor.fetchall()
-                signedDays = {int(r[0][-2:]) for r in rows if r[0][-2:].isdigit()}
+            async with cls._transaction():
+                await cls.m_pDB.execute(
+                    """
+                    INSERT INTO userSignMonth
+                    (uid, month, signMask, signDays, supplementDays, exp, point)
+                    SELECT uid,
+                           substr(signDate, 1, 7),
+                           SUM(1 << (CAST(substr(signDate, 9, 2) AS INTEGER) - 1)),
+                           COUNT(*),
+                           SUM(isSupplement),
+                           SUM(exp),
+                           SUM(point)
+                    FROM userSignLog
+                    WHERE signDate < ?
+                    GROUP BY uid, substr(signDate, 1, 7)
+                    ON CONFLICT(uid, month) DO UPDATE SET
+                        signMask = signMask | excluded.signMask,
+                        signDays = signDays + excluded.signDays,
+                        supplementDays = supplementDays + excluded.supplementDays,
+                        exp = exp + excluded.exp,
+                        point = point + excluded.point
+                    """,
+                    (cutoff,),
+                )
+
+                cursor = await cls.m_pDB.execute(
+                    "DELETE FROM userSignLog WHERE signDate < ?", (cutoff,)
+                )
+                count = cursor.rowcount
+
+            if count > 0:
+                logger.info(f"签到记录压缩完成，共压缩{count}条 {cutoff} 之前的记录")
+
+            return count
         except Exception as e:
-            logger.warning("绘制签到图时数据库查询失败", e=e)
-            signedDays = set()
-
-        for day in range(1, totalDays + 1):
-            index = day + firstWeekday - 1
-            row = index // cols
-            col = index % cols
-            x1 = padding + col * cellSize
-            y1 = padding + titleHeight + row * cellSize
-            x2 = x1 + cellSize - 10
-            y2 = y1 + cellSize - 10
-            color = (112, 196, 112) if day in signedDays else (220, 220, 220)
-            await img.rectangle((x1, y1, x2, y2), fill=color, outline="black", width=2)
-            await img.text((x1 + 10, y1 + 10), str(day), font_size=24)
-
-        return img
+            logger.warning("签到记录压缩失败", e=e)
+            return -1
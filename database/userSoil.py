@@ -1,11 +1,15 @@
 import math
+import re
 
 from zhenxun.services.log import logger
 
 from ..config import g_bIsDebug
 from ..dbService import g_pDBService
+from ..event.event import g_pEventManager
 from ..tool import g_pToolManager
 from .database import CSqlManager
+from .farmCache import g_pFarmCache, g_pUserCache
+from .record import SoilPlot
 
 
 class CUserSoilDB(CSqlManager):
@@ -30,6 +34,67 @@ class CUserSoilDB(CSqlManager):
 
         await cls.ensureTableSchema("userSoil", userSoil)
 
+    # 影响 user 表土地摘要的字段
+    m_pSummaryFields = {"plantName", "matureTime", "wiltStatus", "isSoilPlanted"}
+
+    # 用户土地摘要：生长中作物的最早成熟时间，以及是否存在枯萎作物
+    m_sSummarySql = """
+        UPDATE user SET
+            nextMatureTime = COALESCE((
+                SELECT MIN(matureTime) FROM userSoil
+                WHERE userSoil.uid = user.uid
+                  AND COALESCE(plantName, '') != '' AND COALESCE(wiltStatus, 0) = 0
+            ), 0),
+            hasWilted = EXISTS (
+                SELECT 1 FROM userSoil
+                WHERE userSoil.uid = user.uid
+                  AND COALESCE(plantName, '') != '' AND wiltStatus = 1
+            )
+    """
+
+    @classmethod
+    async def _updateSoilSummary(cls, uid: str) -> tuple[int, int]:
+        """重新计算用户土地摘要，需在写入 userSoil 的同一事务中调用
+
+        Returns:
+            tuple[int, int]: (nextMatureTime, hasWilted)，提交后交给 _cacheSoilSummary
+        """
+        await cls.m_pDB.execute(cls.m_sSummarySql + " WHERE uid = ?", (uid,))
+
+        cursor = await cls.m_pDB.execute(
+            "SELECT nextMatureTime, hasWilted FROM user WHERE uid = ?", (uid,)
+        )
+        row = await cursor.fetchone()
+        return (int(row[0] or 0), int(row[1] or 0)) if row else (0, 0)
+
+    @classmethod
+    def _cacheSoilSummary(cls, uid: str, summary: tuple[int, int] | None):
+        """写穿：事务提交后把重新计算的土地摘要写入用户缓存，无需重新读取 user 表"""
+        if summary is None:
+            return
+
+        nextMatureTime, hasWilted = summary
+        g_pUserCache.setFields(uid, nextMatureTime=nextMatureTime, hasWilted=hasWilted)
+
+    @classmethod
+    async def updateAllSoilSummary(cls) -> bool:
+        """重新计算所有用户的土地摘要，启动时执行以修正直接修改数据库造成的偏差"""
+        try:
+            async with cls._transaction():
+                await cls.m_pDB.execute(cls.m_sSummarySql)
+
+            g_pUserCache.clear()
+            return True
+        except Exception as e:
+            logger.warning("更新用户土地摘要失败", e=e)
+            return False
+
+    @classmethod
+    async def onExecuteDB(cls, command: str):
+        # 自定义SQL修改 userSoil 后 user 表中的土地摘要会过期，重新计算并清空用户缓存
+        if re.search(r"\busersoil\b", command, re.IGNORECASE):
+            await cls.updateAllSoilSummary()
+
     @classmethod
     async def nextPhase(cls, uid: str, soilIndex: int):
         """将指定地块的作物进入下个阶段
@@ -45,22 +110,21 @@ class CUserSoilDB(CSqlManager):
         if not soilInfo:
             return
 
-        plantInfo = await g_pDBService.plant.getPlantByName(soilInfo["plantName"])
+        plantInfo = await g_pDBService.plant.getPlantByName(soilInfo.plantName)
 
         if not plantInfo:
             return
 
         currentTime = g_pToolManager.dateTime().now().timestamp()
-        phaseList = await g_pDBService.plant.getPlantPhaseByName(soilInfo["plantName"])
+        phaseList = plantInfo.phases
 
-        if currentTime >= soilInfo["matureTime"]:
+        if currentTime >= soilInfo.matureTime:
             return
 
-        elapsedTime = currentTime - soilInfo["plantTime"]
-        currentStage = currentStage = sum(1 for thr in phaseList if elapsedTime >= thr)
+        currentStage = soilInfo.stage(plantInfo, currentTime)
 
-        t = int(soilInfo["plantTime"]) - phaseList[currentStage]
-        s = int(soilInfo["matureTime"]) - phaseList[currentStage]
+        t = int(soilInfo.plantTime) - phaseList[currentStage]
+        s = int(soilInfo.matureTime) - phaseList[currentStage]
 
         await cls.updateUserSoilFields(
             uid, soilIndex, {"plantTime": t, "matureTime": s}
@@ -83,7 +147,7 @@ class CUserSoilDB(CSqlManager):
         if not soilInfo:
             return
 
-        plantName = soilInfo.get("plantName")
+        plantName = soilInfo.plantName
         if not plantName:
             return
 
@@ -93,79 +157,76 @@ class CUserSoilDB(CSqlManager):
 
         currentTime = int(g_pToolManager.dateTime().now().timestamp())
         # 如果当前时间已经超过或等于成熟时间，则作物已成熟或可收获
-        if currentTime >= soilInfo["matureTime"]:
+        if currentTime >= soilInfo.matureTime:
             return
 
         # 将作物成熟时间直接更新为当前时间，实现立即成熟
         await cls.updateUserSoilFields(uid, soilIndex, {"matureTime": currentTime})
 
     @classmethod
-    async def getUserFarmByUid(cls, uid: str) -> dict:
-        """获取指定用户的旧农场数据
+    async def migrateOldFarmBatch(cls, position: int, limit: int):
+        """迁移一批旧版 soil 表数据到 userSoil，由迁移管理器分批调用
 
         Args:
-            uid (str): 用户ID
+            position (int): 上一批最后处理的 rowid
+            limit (int): 本批最多处理的行数
 
         Returns:
-            dict: 包含字段名-值的字典; 若无数据则返回空字典
+            tuple[int, int] | None: (本批最后的 rowid, 本批行数)，没有剩余数据时返回 None
         """
-        cursor = await cls.m_pDB.execute("SELECT * FROM soil WHERE uid = ?", (uid,))
-        row = await cursor.fetchone()
+        if not await cls.getTableInfo("soil"):
+            return None
 
-        if not row:
-            return {}
-        columns = [description[0] for description in cursor.description]
-        return dict(zip(columns, row))
+        cursor = await cls.m_pDB.execute(
+            """
+            SELECT rowid AS soilRowid, * FROM soil
+            WHERE rowid > ? AND uid IN (SELECT uid FROM user)
+            ORDER BY rowid LIMIT ?
+            """,
+            (position, limit),
+        )
+        rows = await cursor.fetchall()
+        if not rows:
+            return None
 
-    @classmethod
-    async def migrateOldFarmData(cls) -> bool:
-        """迁移旧土地数据到新表 userSoil 并删除旧表
+        soils = []
+        for farmInfo in rows:
+            for i in range(1, 31):
+                key = f"soil{i}"
+                data = farmInfo[key] if key in farmInfo.keys() else None
+                if not data:
+                    continue
 
-        Returns:
-            bool: 如果旧表不存在则返回 False，否则迁移并删除后返回 True
-        """
-        # 检查旧表是否存在
-        cursor = await cls.m_pDB.execute(
-            "SELECT name FROM sqlite_master WHERE type='table' AND name='soil'"
+                if data == ",,,4,":
+                    continue
+
+                parts = data.split(",")
+                if len(parts) < 3:
+                    continue
+
+                try:
+                    pt, mt = int(parts[1]), int(parts[2])
+                except ValueError:
+                    logger.warning(f"跳过无法解析的旧土地数据: {farmInfo['uid']} {data}")
+                    continue
+
+                soils.append((farmInfo["uid"], i, parts[0], pt, mt, 0))
+
+        await cls.m_pDB.executemany(
+            """
+            INSERT OR IGNORE INTO userSoil
+            (uid,soilIndex,plantName,plantTime,matureTime,harvestCount)
+            VALUES (?,?,?,?,?,?)
+            """,
+            soils,
         )
-        if not await cursor.fetchone():
-            return False
 
-        async with cls._transaction():
-            users = await g_pDBService.user.getAllUsers()
-
-            for uid in users:
-                farmInfo = await cls.getUserFarmByUid(uid)
-                for i in range(1, 31):
-                    key = f"soil{i}"
-                    data = farmInfo.get(key)
-                    if not data:
-                        continue
-
-                    if data == ",,,4,":
-                        continue
-
-                    parts = data.split(",")
-                    if len(parts) < 3:
-                        continue
-
-                    name = parts[0]
-                    pt = int(parts[1])
-                    mt = int(parts[2])
-
-                    await cls.m_pDB.execute(
-                        """
-                        INSERT INTO userSoil
-                        (uid,soilIndex,plantName,plantTime,matureTime,harvestCount)
-                        VALUES (?,?,?,?,?,?)
-                        """,
-                        (uid, i, name, pt, mt, 0),
-                    )
-
-            await cls.m_pDB.execute("DROP TABLE soil")
-
-        logger.info("数据库迁移完毕！")
-        return True
+        return rows[-1]["soilRowid"], len(rows)
+
+    @classmethod
+    async def dropOldFarmTable(cls):
+        """旧版 soil 表迁移完成后删除"""
+        await cls.m_pDB.execute("DROP TABLE IF EXISTS soil")
 
     @classmethod
     async def insertUserSoil(cls, soilInfo: dict):
@@ -202,6 +263,17 @@ class CUserSoilDB(CSqlManager):
                     soilInfo.get("isSoilPlanted", 0),
                 ),
             )
+            summary = await cls._updateSoilSummary(soilInfo["uid"])
+
+        cls._cacheSoilSummary(soilInfo["uid"], summary)
+        g_pFarmCache.setPlot(
+            soilInfo["uid"],
+            soilInfo["soilIndex"],
+            SoilPlot(**{"isSoilPlanted": 0, **soilInfo}),
+        )
+        await g_pEventManager.m_afterSoilChange.emit(  # type: ignore
+            uid=soilInfo["uid"], soilIndex=soilInfo["soilIndex"]
+        )
 
     @classmethod
     async def _insertUserSoil(cls, soilInfo: dict):
@@ -239,29 +311,91 @@ class CUserSoilDB(CSqlManager):
         )
 
     @classmethod
-    async def getUserSoil(cls, uid: str, soilIndex: int) -> dict:
-        """获取指定用户某块土地的详细信息
+    async def getGrowingSoils(cls, uid: str = "") -> list[tuple[str, int, int]]:
+        """获取已种植且未枯萎的地块
+
+        Args:
+            uid (str, optional): 用户Uid，为空时获取全部用户
+
+        Returns:
+            list[tuple[str, int, int]]: (uid, soilIndex, matureTime) 列表
+        """
+        sql = """
+            SELECT uid, soilIndex, matureTime FROM userSoil
+            WHERE COALESCE(plantName, '') != '' AND COALESCE(wiltStatus, 0) = 0
+        """
+        params = ()
+        if uid:
+            sql += " AND uid = ?"
+            params = (uid,)
+
+        try:
+            cursor = await cls.m_pDB.execute(sql, params)
+            rows = await cursor.fetchall()
+            return [(row[0], row[1], int(row[2] or 0)) for row in rows]
+        except Exception as e:
+            logger.warning("获取已种植地块失败", e=e)
+            return []
+
+    @classmethod
+    async def getUserFarm(cls, uid: str) -> dict[int, SoilPlot]:
+        """获取指定用户的全部地块，优先读取缓存
 
         Args:
             uid (str): 用户ID
-            soilIndex (int): 土地索引
 
         Returns:
-            dict: 记录存在返回字段-值字典，否则返回 None
+            dict[int, SoilPlot]: 土地索引-地块，与缓存共享，调用方不应修改
         """
-        async with cls._transaction():
+        farm = g_pFarmCache.get(uid)
+        if farm is not None:
+            return farm
+
+        g_pFarmCache.beginLoad(uid)
+        try:
             cursor = await cls.m_pDB.execute(
-                "SELECT * FROM userSoil WHERE uid = ? AND soilIndex = ?",
-                (uid, soilIndex),
+                "SELECT * FROM userSoil WHERE uid = ?", (uid,)
             )
-            row = await cursor.fetchone()
-            if not row:
-                return {}
-            columns = [description[0] for description in cursor.description]
-            return dict(zip(columns, row))
+            cursor.row_factory = SoilPlot.rowFactory
+            farm = {plot.soilIndex: plot for plot in await cursor.fetchall()}
+        except Exception:
+            g_pFarmCache.abortLoad(uid)
+            raise
+
+        g_pFarmCache.endLoad(uid, farm)
+        return farm
 
     @classmethod
-    async def _getUserSoil(cls, uid: str, soilIndex: int) -> dict | None:
+    async def verifyFarmCache(cls) -> list[str]:
+        """校验地块缓存与数据库是否一致，不一致的用户会被移出缓存
+
+        Returns:
+            list[str]: 不一致的用户Uid
+        """
+        mismatched = []
+        for uid, farm in list(g_pFarmCache.m_pItems.items()):
+            cursor = await cls.m_pDB.execute(
+                "SELECT * FROM userSoil WHERE uid = ?", (uid,)
+            )
+            cursor.row_factory = SoilPlot.rowFactory
+            rows = {plot.soilIndex: plot.toDict() for plot in await cursor.fetchall()}
+
+            # 校验期间缓存可能已被写入或淘汰，以校验结束时的缓存为准
+            cached = g_pFarmCache.m_pItems.get(uid)
+            if cached is not farm:
+                continue
+
+            if rows != {index: plot.toDict() for index, plot in farm.items()}:
+                mismatched.append(uid)
+                g_pFarmCache.evict(uid)
+
+        if mismatched:
+            logger.warning(f"地块缓存与数据库不一致: {', '.join(mismatched)}")
+
+        return mismatched
+
+    @classmethod
+    async def getUserSoil(cls, uid: str, soilIndex: int) -> SoilPlot | None:
         """获取指定用户某块土地的详细信息
 
         Args:
@@ -269,17 +403,28 @@ class CUserSoilDB(CSqlManager):
             soilIndex (int): 土地索引
 
         Returns:
-            dict | None: 记录存在返回字段-值字典，否则返回 None
+            SoilPlot | None: 记录存在返回地块，否则返回 None
+        """
+        farm = await cls.getUserFarm(uid)
+        return farm.get(soilIndex)
+
+    @classmethod
+    async def _getUserSoil(cls, uid: str, soilIndex: int) -> SoilPlot | None:
+        """直接从数据库获取指定用户某块土地的详细信息，不经过缓存
+
+        Args:
+            uid (str): 用户ID
+            soilIndex (int): 土地索引
+
+        Returns:
+            SoilPlot | None: 记录存在返回地块，否则返回 None
         """
         cursor = await cls.m_pDB.execute(
             "SELECT * FROM userSoil WHERE uid = ? AND soilIndex = ?",
             (uid, soilIndex),
         )
-        row = await cursor.fetchone()
-        if not row:
-            return None
-        columns = [description[0] for description in cursor.description]
-        return dict(zip(columns, row))
+        cursor.row_factory = SoilPlot.rowFactory
+        return await cursor.fetchone()
 
     @classmethod
     async def countSoilByLevel(cls, uid: str, soilLevel: int) -> int:
@@ -292,13 +437,8 @@ class CUserSoilDB(CSqlManager):
         Returns:
             int: 符合条件的土地数量
         """
-        async with cls._transaction():
-            cursor = await cls.m_pDB.execute(
-                "SELECT COUNT(*) FROM userSoil WHERE uid = ? AND soilLevel = ?",
-                (uid, soilLevel),
-            )
-            row = await cursor.fetchone()
-            return row[0] if row else 0
+        farm = await cls.getUserFarm(uid)
+        return sum(1 for plot in farm.values() if plot.soilLevel == soilLevel)
 
     @classmethod
     async def updateUserSoil(cls, uid: str, soilIndex: int, field: str, value):
@@ -313,11 +453,18 @@ class CUserSoilDB(CSqlManager):
         Returns:
             None
         """
+        summary = None
         async with cls._transaction():
             await cls.m_pDB.execute(
                 f"UPDATE userSoil SET {field} = ? WHERE uid = ? AND soilIndex = ?",
                 (value, uid, soilIndex),
             )
+            if field in cls.m_pSummaryFields:
+                summary = await cls._updateSoilSummary(uid)
+
+        cls._cacheSoilSummary(uid, summary)
+        g_pFarmCache.updatePlot(uid, soilIndex, {field: value})
+        await g_pEventManager.m_afterSoilChange.emit(uid=uid, soilIndex=soilIndex)  # type: ignore
 
     @classmethod
     async def _updateUserSoil(cls, uid: str, soilIndex: int, field: str, value):
@@ -365,27 +512,31 @@ class CUserSoilDB(CSqlManager):
             "harvestCount",
             "isSoilPlanted",
         }
-        setClauses = []
-        values = []
-        for field, value in updates.items():
-            if field not in allowedFields:
-                continue
-            setClauses.append(f'"{field}" = ?')
-            values.append(value)
-        if not setClauses:
+        fields = {k: v for k, v in updates.items() if k in allowedFields}
+        if not fields:
             return False
 
+        setClauses = [f'"{field}" = ?' for field in fields]
+        values = list(fields.values())
+
         values.extend([uid, soilIndex])
         sql = f"UPDATE userSoil SET {', '.join(setClauses)} WHERE uid = ? AND soilIndex = ?"
 
+        summary = None
         try:
             async with cls._transaction():
                 await cls.m_pDB.execute(sql, tuple(values))
-            return True
+                if cls.m_pSummaryFields.intersection(updates):
+                    summary = await cls._updateSoilSummary(uid)
         except Exception as e:
             logger.error(f"批量更新土地字段失败: {e}")
             return False
 
+        cls._cacheSoilSummary(uid, summary)
+        g_pFarmCache.updatePlot(uid, soilIndex, fields)
+        await g_pEventManager.m_afterSoilChange.emit(uid=uid, soilIndex=soilIndex)  # type: ignore
+        return True
+
     @classmethod
     async def deleteUserSoil(cls, uid: str, soilIndex: int):
         """删除指定用户的土地记录
@@ -401,6 +552,11 @@ class CUserSoilDB(CSqlManager):
             await cls.m_pDB.execute(
                 "DELETE FROM userSoil WHERE uid = ? AND soilIndex = ?", (uid, soilIndex)
             )
+            summary = await cls._updateSoilSummary(uid)
+
+        cls._cacheSoilSummary(uid, summary)
+        g_pFarmCache.setPlot(uid, soilIndex, None)
+        await g_pEventManager.m_afterSoilChange.emit(uid=uid, soilIndex=soilIndex)  # type: ignore
 
     @classmethod
     async def _deleteUserSoil(cls, uid: str, soilIndex: int):
@@ -431,7 +587,7 @@ class CUserSoilDB(CSqlManager):
         """
         # 校验土地区是否已种植
         soilInfo = await cls.getUserSoil(uid, soilIndex)
-        if soilInfo and soilInfo.get("plantName"):
+        if soilInfo and soilInfo.plantName:
             return False
 
         # 获取植物配置
@@ -442,8 +598,10 @@ class CUserSoilDB(CSqlManager):
 
         nowTs = int(g_pToolManager.dateTime().now().timestamp())
 
-        time = int(plantCfg.get("time", 0))
-        percent = await cls.getSoilLevelTime(soilInfo.get("soilLevel", 0))
+        soilLevel = soilInfo.soilLevel if soilInfo else 0
+
+        time = int(plantCfg.time)
+        percent = await cls.getSoilLevelTime(soilLevel)
 
         # 处理土地等级带来的时间缩短
         time = math.floor(time * (100 + percent) // 100)
@@ -451,31 +609,28 @@ class CUserSoilDB(CSqlManager):
         matureTs = nowTs + time * 3600
 
         try:
+            plot = SoilPlot(
+                uid=uid,
+                soilIndex=soilIndex,
+                plantName=plantName,
+                plantTime=nowTs,
+                matureTime=matureTs,
+                soilLevel=soilLevel,
+                isSoilPlanted=1,
+            )
             async with cls._transaction():
-                prev = soilInfo or {}
                 await cls._deleteUserSoil(uid, soilIndex)
-                await cls._insertUserSoil(
-                    {
-                        "uid": uid,
-                        "soilIndex": soilIndex,
-                        "plantName": plantName,
-                        "plantTime": nowTs,
-                        "matureTime": matureTs,
-                        "soilLevel": prev.get("soilLevel", 0),
-                        "wiltStatus": 0,
-                        "fertilizerStatus": 0,
-                        "bugStatus": 0,
-                        "weedStatus": 0,
-                        "waterStatus": 0,
-                        "harvestCount": 0,
-                        "isSoilPlanted": 1,
-                    }
-                )
-            return True
+                await cls._insertUserSoil(plot.toDict())
+                summary = await cls._updateSoilSummary(uid)
         except Exception as e:
             logger.error("播种失败！", e=e)
             return False
 
+        cls._cacheSoilSummary(uid, summary)
+        g_pFarmCache.setPlot(uid, soilIndex, plot)
+        await g_pEventManager.m_afterSoilChange.emit(uid=uid, soilIndex=soilIndex)  # type: ignore
+        return True
+
     @classmethod
     async def getUserSoilStatus(cls, uid: str, soilIndex: int) -> str:
         status = []
@@ -484,21 +639,21 @@ class CUserSoilDB(CSqlManager):
         if not soilInfo:
             return ""
 
-        if soilInfo.get("wiltStatus", 0) == 1:
+        if soilInfo.isWilted:
             return "枯萎"
 
-        if soilInfo.get("fertilizerStatus", 0) == 1:
+        if soilInfo.fertilizerStatus == 1:
             status.append("施肥")
-        elif soilInfo.get("fertilizerStatus", 0) == 2:
+        elif soilInfo.fertilizerStatus == 2:
             status.append("增肥")
 
-        if soilInfo.get("bugStatus", 0) == 1:
+        if soilInfo.bugStatus == 1:
             status.append("虫害")
 
-        if soilInfo.get("weedStatus", 0) == 1:
+        if soilInfo.weedStatus == 1:
             status.append("杂草")
 
-        if soilInfo.get("waterStatus", 0) == 1:
+        if soilInfo.waterStatus == 1:
             status.append("缺水")
 
         return ",".join(status)
@@ -589,3 +744,6 @@ class CUserSoilDB(CSqlManager):
             return 20
 
         return 0
+
+
+g_pEventManager.m_afterExecuteDB.connect(CUserSoilDB.onExecuteDB)
@@ -1,9 +1,13 @@
 from zhenxun.services.log import logger
 
+from ..tool import g_pToolManager
 from .database import CSqlManager
 
 
 class CUserStealDB(CSqlManager):
+    # 上次清理时的记录数 {"time", "before", "pruned"}，用于统计表增长
+    m_pLastPrune: dict = {}
+
     @classmethod
     async def initDB(cls):
         userSteal = {
@@ -16,12 +20,24 @@ class CUserStealDB(CSqlManager):
         }
         await cls.ensureTableSchema("userSteal", userSteal)
 
+        # 数据库迁移预估模式下表可能尚未创建
+        if not await cls.getTableInfo("userSteal"):
+            return
+
+        # 按偷菜者查询（今天偷过谁）时使用
+        await cls.m_pDB.execute(
+            'CREATE INDEX IF NOT EXISTS "idx_userSteal_stealer" '
+            'ON "userSteal"(stealerUid, stealTime);'
+        )
+
     @classmethod
     async def addStealRecord(
         cls, uid: str, soilIndex: int, stealerUid: str, stealCount: int, stealTime: int
     ) -> bool:
         """添加偷菜记录
 
+        同一用户偷过上一轮作物时，作物再生后的记录会覆盖上一轮的记录
+
         Args:
             uid (str): 被偷用户Uid
             soilIndex (int): 被偷地块索引
@@ -35,7 +51,13 @@ class CUserStealDB(CSqlManager):
         try:
             async with cls._transaction():
                 await cls.m_pDB.execute(
-                    'INSERT INTO "userSteal"(uid, soilIndex, stealerUid, stealCount, stealTime) VALUES(?, ?, ?, ?, ?);',
+                    """
+                    INSERT INTO "userSteal"(uid, soilIndex, stealerUid, stealCount, stealTime)
+                    VALUES(?, ?, ?, ?, ?)
+                    ON CONFLICT(uid, soilIndex, stealerUid) DO UPDATE SET
+                        stealCount = excluded.stealCount,
+                        stealTime = excluded.stealTime;
+                    """,
                     (uid, soilIndex, stealerUid, stealCount, stealTime),
                 )
             return True
@@ -107,12 +129,15 @@ class CUserStealDB(CSqlManager):
             return []
 
     @classmethod
-    async def getTotalStolenCount(cls, uid: str, soilIndex: int) -> int:
+    async def getTotalStolenCount(
+        cls, uid: str, soilIndex: int, since: int = 0
+    ) -> int:
         """计算指定地块被偷的总数量（所有用户偷取数量之和）
 
         Args:
             uid (str): 被偷用户Uid
             soilIndex (int): 被偷地块索引
+            since (int, optional): 只统计该时间之后的记录，传入作物成熟时间即只统计本轮作物
 
         Returns:
             int: 被偷的总数量，如果无记录则返回 0
@@ -120,8 +145,8 @@ class CUserStealDB(CSqlManager):
         try:
             async with cls._transaction():
                 cursor = await cls.m_pDB.execute(
-                    'SELECT SUM(stealCount) FROM "userSteal" WHERE uid=? AND soilIndex=?;',
-                    (uid, soilIndex),
+                    'SELECT SUM(stealCount) FROM "userSteal" WHERE uid=? AND soilIndex=? AND stealTime>=?;',
+                    (uid, soilIndex, since),
                 )
                 row = await cursor.fetchone()
             return row[0] or 0  # type: ignore
@@ -153,13 +178,16 @@ class CUserStealDB(CSqlManager):
             return 0
 
     @classmethod
-    async def hasStealed(cls, uid: str, soilIndex: int, stealerUid: str) -> bool:
+    async def hasStealed(
+        cls, uid: str, soilIndex: int, stealerUid: str, since: int = 0
+    ) -> bool:
         """判断指定用户是否曾偷取过该地块
 
         Args:
             uid (str): 被偷用户Uid
             soilIndex (int): 被偷地块索引
             stealerUid (str): 偷菜用户Uid
+            since (int, optional): 只检查该时间之后的记录，传入作物成熟时间即只检查本轮作物
 
         Returns:
             bool: 若存在记录返回 True，否则返回 False
@@ -167,8 +195,8 @@ class CUserStealDB(CSqlManager):
         try:
             async with cls._transaction():
                 cursor = await cls.m_pDB.execute(
-                    'SELECT 1 FROM "userSteal" WHERE uid=? AND soilIndex=? AND stealerUid=? LIMIT 1;',
-                    (uid, soilIndex, stealerUid),
+                    'SELECT 1 FROM "userSteal" WHERE uid=? AND soilIndex=? AND stealerUid=? AND stealTime>=? LIMIT 1;',
+                    (uid, soilIndex, stealerUid, since),
                 )
                 row = await cursor.fetchone()
             return bool(row)
@@ -224,3 +252,119 @@ class CUserStealDB(CSqlManager):
         except Exception as e:
             logger.warning("删除偷菜记录失败", e=e)
             return False
+
+    @classmethod
+    async def getStealRecordsByStealer(cls, stealerUid: str, since: int = 0) -> list:
+        """获取偷菜用户在指定时间之后的偷菜记录
+
+        Args:
+            stealerUid (str): 偷菜用户Uid
+            since (int, optional): 起始时间（时间戳）
+
+        Returns:
+            list: 偷菜记录字典列表，按偷菜时间排序
+        """
+        try:
+            cursor = await cls.m_pDB.execute(
+                'SELECT uid, soilIndex, stealCount, stealTime FROM "userSteal" '
+                "WHERE stealerUid=? AND stealTime>=? ORDER BY stealTime;",
+                (stealerUid, since),
+            )
+            rows = await cursor.fetchall()
+            return [
+                {
+                    "uid": row[0],
+                    "soilIndex": row[1],
+                    "stealerUid": stealerUid,
+                    "stealCount": row[2],
+                    "stealTime": row[3],
+                }
+                for row in rows
+            ]
+        except Exception as e:
+            logger.warning("获取偷菜者记录失败", e=e)
+            return []
+
+    @classmethod
+    async def getAllStealers(cls) -> list[tuple[str, int, str]]:
+        """获取全部地块本轮作物的偷菜者
+
+        Returns:
+            list[tuple[str, int, str]]: (uid, soilIndex, stealerUid) 列表
+        """
+        try:
+            cursor = await cls.m_pDB.execute(
+                """
+                SELECT st.uid, st.soilIndex, st.stealerUid FROM "userSteal" st
+                JOIN "userSoil" s ON s.uid = st.uid AND s.soilIndex = st.soilIndex
+                WHERE st.stealTime >= s.matureTime;
+                """
+            )
+            rows = await cursor.fetchall()
+            return [(row[0], row[1], row[2]) for row in rows]
+        except Exception as e:
+            logger.warning("获取偷菜者失败", e=e)
+            return []
+
+    @classmethod
+    async def getStealStats(cls) -> dict:
+        """统计偷菜记录表规模
+
+        Returns:
+            dict: rows 记录数, stealers 偷菜用户数, plots 被偷地块数
+        """
+        try:
+            cursor = await cls.m_pDB.execute(
+                """
+                SELECT COUNT(*),
+                       COUNT(DISTINCT stealerUid),
+                       (SELECT COUNT(*) FROM (SELECT DISTINCT uid, soilIndex
+                                              FROM "userSteal"))
+                FROM "userSteal";
+                """
+            )
+            row = await cursor.fetchone()
+            return {"rows": row[0], "stealers": row[1], "plots": row[2]}  # type: ignore
+        except Exception as e:
+            logger.warning("统计偷菜记录失败", e=e)
+            return {"rows": 0, "stealers": 0, "plots": 0}
+
+    @classmethod
+    async def pruneStealRecords(cls) -> int:
+        """清理已失效的偷菜记录
+
+        地块被铲除、收获或偷光后重新生长时，新一轮作物的播种与成熟时间都晚于
+        之前的偷菜时间，这些记录不再影响当前作物，可以删除
+
+        Returns:
+            int: 删除的记录条数，失败返回 -1
+        """
+        before = (await cls.getStealStats())["rows"]
+
+        try:
+            async with cls._transaction():
+                cursor = await cls.m_pDB.execute(
+                    """
+                    DELETE FROM "userSteal"
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM "userSoil" s
+                        WHERE s.uid = "userSteal".uid
+                          AND s.soilIndex = "userSteal".soilIndex
+                          AND COALESCE(s.plantName, '') != ''
+                          AND s.plantTime <= "userSteal".stealTime
+                          AND s.matureTime <= "userSteal".stealTime
+                    );
+                    """
+                )
+                count = cursor.rowcount
+
+            cls.m_pLastPrune = {
+                "time": int(g_pToolManager.dateTime().now().timestamp()),
+                "before": before,
+                "pruned": count,
+            }
+            logger.info(f"偷菜记录清理完成，共{before}条，清理{count}条")
+            return count
+        except Exception as e:
+            logger.warning("清理偷菜记录失败", e=e)
+            return -1
@@ -1,17 +1,35 @@
 class CDBService:
     @classmethod
     async def init(cls):
+        await cls.initPlant()
+        await cls.initUserTables()
+
+    @classmethod
+    async def initPlant(cls) -> bool:
+        """初始化作物数据库，作物数据库使用独立连接，可与用户表初始化并发执行"""
         from .database.plant import CPlantManager
+
+        cls.plant = CPlantManager()
+        return await cls.plant.init()
+
+    @classmethod
+    async def initUserTables(cls) -> bool:
+        """初始化用户相关数据表，各表共用同一连接需依次执行"""
+        from .database.maintenance import CMaintenanceDB
+        from .database.migration import CMigrationManager
         from .database.user import CUserDB
+        from .database.userGroup import CUserGroupDB
         from .database.userItem import CUserItemDB
         from .database.userPlant import CUserPlantDB
         from .database.userSeed import CUserSeedDB
         from .database.userSign import CUserSignDB
         from .database.userSoil import CUserSoilDB
         from .database.userSteal import CUserStealDB
+        from .startup import CStartupStop
 
-        cls.plant = CPlantManager()
-        await cls.plant.init()
+        # 迁移记录表需先于其他表创建，重建表时依赖其记录进度
+        cls.migration = CMigrationManager()
+        await cls.migration.initDB()
 
         cls.user = CUserDB()
         await cls.user.initDB()
@@ -34,8 +52,32 @@ class CDBService:
         cls.userSign = CUserSignDB()
         await cls.userSign.initDB()
 
-        # 迁移旧数据库
-        await cls.userSoil.migrateOldFarmData()
+        cls.userGroup = CUserGroupDB()
+        await cls.userGroup.initDB()
+
+        cls.maintenance = CMaintenanceDB()
+
+        # 带编号的数据迁移，版本号一经发布不可修改
+        cls.migration.addStep(
+            1,
+            "旧版 soil 表迁移到 userSoil",
+            "soil",
+            cls.userSoil.migrateOldFarmBatch,
+            cls.userSoil.dropOldFarmTable,
+        )
+
+        if not await cls.migration.migrate():
+            return False
+
+        # 预估模式只报告待执行的迁移，不继续启动
+        if cls.migration.isDryRun():
+            cls.migration.report()
+            raise CStartupStop("数据库迁移预估模式，关闭 数据库迁移预估 后重启即可执行迁移")
+
+        # 用户土地摘要由 userSoil 写入时同步维护，启动时整体校正一次
+        await cls.userSoil.updateAllSoilSummary()
+
+        return True
 
     @classmethod
     async def cleanup(cls):
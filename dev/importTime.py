@@ -0,0 +1,152 @@
+"""真寻农场插件导入耗时基准
+
+通过 python -X importtime 在独立进程中导入插件，统计插件自身的累计导入耗时，
+以及各重量级依赖是否在导入阶段被加载。需要在已安装 zhenxun 的环境中运行。
+
+用法:
+    python dev/importTime.py --repeat 5
+    python dev/importTime.py --save importTime.json
+    python dev/importTime.py --baseline importTime.json
+
+--baseline 会与之前保存的结果对比，插件累计耗时超过基线的 --tolerance 倍时以非零状态退出，
+可用于 CI 中跟踪导入耗时的变化
+"""
+
+import argparse
+import json
+from pathlib import Path
+import re
+import statistics
+import subprocess
+import sys
+
+# 插件目录名即为包名
+PLUGIN_PATH = Path(__file__).resolve().parent.parent
+PLUGIN_NAME = PLUGIN_PATH.name
+
+# 这些模块应当在首次使用时才加载，导入阶段出现说明懒加载被破坏
+LAZY_MODULES = (
+    "httpx",
+    "rich.progress",
+    "jinja2",
+    "playwright.async_api",
+    "zhenxun.utils._build_image",
+)
+
+# 导入插件前需要先初始化 nonebot，插件会在导入时注册指令与定时任务
+SETUP_CODE = "import nonebot; nonebot.init()"
+
+LINE_PATTERN = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+def measure(setupCode: str, preload: tuple[str, ...]) -> dict[str, tuple[int, int]]:
+    """在子进程中导入插件并解析 -X importtime 输出
+
+    Args:
+        setupCode (str): 导入插件前执行的初始化代码
+        preload (tuple[str, ...]): 初始化阶段预先导入的模块，这部分耗时不计入插件
+
+    Returns:
+        dict[str, tuple[int, int]]: 模块名 -> (自身耗时us, 累计耗时us)，只包含导入插件阶段
+    """
+    code = "; ".join(
+        [
+            "import sys",
+            f"sys.path.insert(0, {str(PLUGIN_PATH.parent)!r})",
+            setupCode,
+            *(f"import {name}" for name in preload),
+            "sys.stderr.write('-- plugin --\\n')",
+            f"import {PLUGIN_NAME}",
+        ]
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        cwd=PLUGIN_PATH.parent,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"导入插件失败:\n{result.stderr[-2000:]}")
+
+    modules = {}
+    started = False
+    for line in result.stderr.splitlines():
+        if line == "-- plugin --":
+            started = True
+            continue
+
+        match = LINE_PATTERN.match(line)
+        if started and match:
+            modules[match.group(4)] = (int(match.group(1)), int(match.group(2)))
+
+    return modules
+
+
+def summarize(samples: list[dict[str, tuple[int, int]]]) -> dict:
+    last = samples[-1]
+    total = statistics.median(s.get(PLUGIN_NAME, (0, 0))[1] for s in samples)
+
+    # 插件导入阶段新加载的模块，按自身耗时排序
+    top = sorted(last.items(), key=lambda item: item[1][0], reverse=True)[:15]
+
+    return {
+        "plugin": PLUGIN_NAME,
+        "cumulativeUs": int(total),
+        "modules": len(last),
+        "eagerLazyModules": [name for name in LAZY_MODULES if name in last],
+        "top": [
+            {"module": name, "selfUs": t[0], "cumulativeUs": t[1]} for name, t in top
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="真寻农场插件导入耗时基准")
+    parser.add_argument("--repeat", type=int, default=3, help="重复测量次数取中位数")
+    parser.add_argument("--setup", default=SETUP_CODE, help="导入插件前执行的代码")
+    parser.add_argument(
+        "--preload",
+        nargs="*",
+        default=["zhenxun.services.log", "zhenxun.configs.config"],
+        help="预先导入、不计入插件耗时的模块（bot 启动时必然已加载的部分）",
+    )
+    parser.add_argument("--save", type=Path, help="保存本次结果为 JSON")
+    parser.add_argument("--baseline", type=Path, help="与之前保存的结果对比")
+    parser.add_argument(
+        "--tolerance", type=float, default=1.2, help="允许超过基线的倍数"
+    )
+    args = parser.parse_args()
+
+    samples = [measure(args.setup, tuple(args.preload)) for _ in range(args.repeat)]
+    report = summarize(samples)
+
+    print(f"{report['plugin']} 累计导入耗时: {report['cumulativeUs'] / 1000:.1f} ms")
+    print(f"导入阶段新加载模块数: {report['modules']}")
+    for item in report["top"]:
+        print(
+            f"  {item['selfUs'] / 1000:8.1f} ms  "
+            f"{item['cumulativeUs'] / 1000:8.1f} ms  {item['module']}"
+        )
+
+    exitCode = 0
+    if report["eagerLazyModules"]:
+        print(f"以下模块应懒加载却在导入阶段被加载: {report['eagerLazyModules']}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+        ratio = report["cumulativeUs"] / max(1, baseline["cumulativeUs"])
+        print(f"相对基线: {ratio:.2f}x（基线 {baseline['cumulativeUs'] / 1000:.1f} ms）")
+        if ratio > args.tolerance:
+            exitCode = 1
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=4)
+
+    sys.exit(exitCode)
+
+
+if __name__ == "__main__":
+    main()
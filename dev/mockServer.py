@@ -0,0 +1,338 @@
+"""真寻农场服务端本地替身
+
+在没有外网的机器上为 request.py 提供 服务地址:8998 下的全部接口，
+用于离线联调以及资源同步的吞吐、容错测试。该脚本独立运行，不依赖 nonebot/zhenxun。
+
+夹具目录结构:
+    <fixture>/
+        plant_version.json      {"version": 版本号}，缺省时返回 {"version": 0}
+        sign_in/<yyyymm>.json   按月份返回的签到文件，缺省时回退到 sign_in.json
+        sign_in.json
+        file/
+            plant.db
+            manifest.json       缺省时按 file/ 下的资源自动生成
+            <作物名>/<n>.png     作物资源，对应清单路径 plant/<作物名>/<n>.png
+            soil/...            土地资源
+            background/...      背景资源
+
+用法:
+    python dev/mockServer.py --fixture ./fixture --latency 0.05 --bandwidth 262144 \
+        --fail-rate 0.1 --drop-rate 0.05
+
+随后将插件配置 服务地址 改为 http://127.0.0.1 即可
+"""
+
+import argparse
+import asyncio
+from datetime import datetime
+import hashlib
+import json
+import logging
+from pathlib import Path
+import random
+import time
+
+from aiohttp import web
+
+logger = logging.getLogger("farmMockServer")
+
+# 清单中与作物资源同级的资源目录，其余一级目录视为作物名
+MANIFEST_DIRS = ("soil", "background")
+
+
+class CMockOptions:
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        bandwidth: int = 0,
+        chunkSize: int = 16 * 1024,
+        failRate: float = 0.0,
+        dropRate: float = 0.0,
+        seed: int | None = None,
+    ):
+        # 每个请求的基础延迟与随机抖动（秒）
+        self.m_fLatency = latency
+        self.m_fJitter = jitter
+        # 单个响应的带宽上限（字节/秒），0 为不限速
+        self.m_iBandwidth = bandwidth
+        self.m_iChunkSize = chunkSize
+        # 直接返回 503 的概率
+        self.m_fFailRate = failRate
+        # 文件传输中途断开连接的概率，用于测试断点续传
+        self.m_fDropRate = dropRate
+        self.m_pRandom = random.Random(seed)
+
+
+class CMockServer:
+    def __init__(self, fixturePath: Path, options: CMockOptions):
+        self.m_pFixture = fixturePath
+        self.m_pFilePath = fixturePath / "file"
+        self.m_pOptions = options
+        # 文件路径 -> (size, mtime_ns, sha256)
+        self.m_pHashCache: dict[Path, tuple[int, int, str]] = {}
+        self.m_pStats = {
+            "requests": 0,
+            "bytes": 0,
+            "failed": 0,
+            "dropped": 0,
+            "notModified": 0,
+            "partial": 0,
+        }
+        self.m_fStartTime = time.monotonic()
+
+    def application(self) -> web.Application:
+        app = web.Application(middlewares=[self.middleware])
+        app.router.add_route("*", "/sign_in", self.signIn)
+        app.router.add_get("/plant_version", self.plantVersion)
+        app.router.add_get("/file/manifest.json", self.manifest)
+        app.router.add_get("/file/{path:.+}", self.file)
+        app.router.add_get("/stats", self.stats)
+        app.on_shutdown.append(self.onShutdown)
+        return app
+
+    @web.middleware
+    async def middleware(self, request: web.Request, handler):
+        # /stats 不参与延迟与故障注入，方便压测脚本读取统计
+        if request.path == "/stats":
+            return await handler(request)
+
+        self.m_pStats["requests"] += 1
+        options = self.m_pOptions
+
+        delay = options.m_fLatency + options.m_pRandom.uniform(0, options.m_fJitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if options.m_pRandom.random() < options.m_fFailRate:
+            self.m_pStats["failed"] += 1
+            return web.json_response({"error": "injected failure"}, status=503)
+
+        return await handler(request)
+
+    def sha256(self, path: Path) -> str:
+        stat = path.stat()
+        cached = self.m_pHashCache.get(path)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+
+        hasher = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(65536), b""):
+                hasher.update(chunk)
+
+        sha256 = hasher.hexdigest()
+        self.m_pHashCache[path] = (stat.st_size, stat.st_mtime_ns, sha256)
+        return sha256
+
+    def etag(self, path: Path) -> str:
+        return f'"{self.sha256(path)[:32]}"'
+
+    def buildManifest(self) -> dict:
+        """按 file/ 目录下的资源生成清单"""
+        files = {}
+        for path in sorted(self.m_pFilePath.rglob("*")):
+            if not path.is_file() or path.parent == self.m_pFilePath:
+                continue
+
+            relative = path.relative_to(self.m_pFilePath).as_posix()
+            if relative.split("/")[0] not in MANIFEST_DIRS:
+                relative = f"plant/{relative}"
+
+            files[relative] = {"size": path.stat().st_size, "sha256": self.sha256(path)}
+
+        version = self.readJson(self.m_pFixture / "plant_version.json").get(
+            "version", 0
+        )
+        return {"version": version, "files": files}
+
+    def readJson(self, path: Path) -> dict:
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    async def signIn(self, request: web.Request) -> web.StreamResponse:
+        date = ""
+        if request.can_read_body:
+            try:
+                date = str((await request.json()).get("date", ""))
+            except Exception:
+                date = ""
+
+        if not date:
+            date = datetime.now().strftime("%Y%m")
+
+        path = self.m_pFixture / "sign_in" / f"{date}.json"
+        if not path.is_file():
+            path = self.m_pFixture / "sign_in.json"
+
+        if not path.is_file():
+            raise web.HTTPNotFound(text="sign_in fixture not found")
+
+        return await self.sendFile(request, path)
+
+    async def plantVersion(self, request: web.Request) -> web.Response:
+        info = self.readJson(self.m_pFixture / "plant_version.json")
+        return await self.sendJson(request, {"version": info.get("version", 0)})
+
+    async def manifest(self, request: web.Request) -> web.StreamResponse:
+        path = self.m_pFilePath / "manifest.json"
+        if path.is_file():
+            return await self.sendFile(request, path)
+
+        data = await asyncio.to_thread(self.buildManifest)
+        return await self.sendJson(request, data)
+
+    async def file(self, request: web.Request) -> web.StreamResponse:
+        root = self.m_pFilePath.resolve()
+        path = (root / request.match_info["path"]).resolve()
+
+        if root not in path.parents or not path.is_file():
+            raise web.HTTPNotFound()
+
+        return await self.sendFile(request, path)
+
+    async def stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.summary())
+
+    def summary(self) -> dict:
+        elapsed = time.monotonic() - self.m_fStartTime
+        return {
+            **self.m_pStats,
+            "elapsed": round(elapsed, 3),
+            "throughput": round(self.m_pStats["bytes"] / elapsed, 1) if elapsed else 0,
+        }
+
+    async def sendJson(self, request: web.Request, data: dict) -> web.Response:
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+        if request.headers.get("If-None-Match") == etag:
+            self.m_pStats["notModified"] += 1
+            return web.Response(status=304, headers={"ETag": etag})
+
+        self.m_pStats["bytes"] += len(body)
+        return web.Response(
+            body=body, content_type="application/json", headers={"ETag": etag}
+        )
+
+    async def sendFile(self, request: web.Request, path: Path) -> web.StreamResponse:
+        """发送文件，支持 ETag、If-None-Match、Range/If-Range，并按配置限速和断流"""
+        size = path.stat().st_size
+        etag = await asyncio.to_thread(self.etag, path)
+
+        if request.headers.get("If-None-Match") == etag:
+            self.m_pStats["notModified"] += 1
+            return web.Response(status=304, headers={"ETag": etag})
+
+        start = 0
+        status = 200
+        rangeHeader = request.headers.get("Range", "")
+        ifRange = request.headers.get("If-Range")
+
+        if rangeHeader.startswith("bytes=") and (ifRange is None or ifRange == etag):
+            # 客户端只会请求 bytes=<offset>- 形式的续传范围
+            try:
+                start = int(rangeHeader[len("bytes=") :].split("-")[0])
+            except ValueError:
+                start = 0
+
+            if start >= size:
+                return web.Response(
+                    status=416, headers={"Content-Range": f"bytes */{size}"}
+                )
+
+            status = 206
+            self.m_pStats["partial"] += 1
+
+        headers = {
+            "ETag": etag,
+            "Accept-Ranges": "bytes",
+            "Content-Length": str(size - start),
+        }
+        if status == 206:
+            headers["Content-Range"] = f"bytes {start}-{size - 1}/{size}"
+
+        response = web.StreamResponse(status=status, headers=headers)
+        response.content_type = "application/octet-stream"
+        await response.prepare(request)
+
+        options = self.m_pOptions
+        dropAt = -1
+        if options.m_pRandom.random() < options.m_fDropRate and size - start > 1:
+            dropAt = start + options.m_pRandom.randrange(1, size - start)
+
+        with open(path, "rb") as f:
+            f.seek(start)
+            position = start
+
+            while True:
+                chunk = f.read(options.m_iChunkSize)
+                if not chunk:
+                    break
+
+                if 0 <= dropAt < position + len(chunk):
+                    chunk = chunk[: dropAt - position]
+                    await response.write(chunk)
+                    self.m_pStats["bytes"] += len(chunk)
+                    self.m_pStats["dropped"] += 1
+
+                    # 不发送剩余内容直接断开，客户端会得到一个不完整的响应
+                    if request.transport is not None:
+                        request.transport.close()
+                    return response
+
+                await response.write(chunk)
+                position += len(chunk)
+                self.m_pStats["bytes"] += len(chunk)
+
+                if options.m_iBandwidth > 0:
+                    await asyncio.sleep(len(chunk) / options.m_iBandwidth)
+
+        await response.write_eof()
+        return response
+
+    async def onShutdown(self, app: web.Application):
+        logger.info(f"请求统计: {json.dumps(self.summary(), ensure_ascii=False)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="真寻农场服务端本地替身")
+    parser.add_argument("--fixture", type=Path, required=True, help="夹具目录")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8998)
+    parser.add_argument("--latency", type=float, default=0.0, help="每个请求的延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="额外随机延迟上限（秒）")
+    parser.add_argument(
+        "--bandwidth", type=int, default=0, help="单个响应带宽上限（字节/秒），0 不限速"
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=16 * 1024, help="发送文件的分块大小"
+    )
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="返回 503 的概率")
+    parser.add_argument(
+        "--drop-rate", type=float, default=0.0, help="文件传输中途断开的概率"
+    )
+    parser.add_argument("--seed", type=int, default=None, help="故障注入随机种子")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    options = CMockOptions(
+        latency=args.latency,
+        jitter=args.jitter,
+        bandwidth=args.bandwidth,
+        chunkSize=args.chunk_size,
+        failRate=args.fail_rate,
+        dropRate=args.drop_rate,
+        seed=args.seed,
+    )
+    server = CMockServer(args.fixture, options)
+
+    web.run_app(server.application(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+"""userSoil 打包存储的转换与基准工具
+
+打包格式见 database/soilPack.py：每个用户一行 userFarmPack(uid, version, data)，
+data 为全部地块的定长打包数据。该脚本独立运行，直接操作 SQLite 文件，
+操作前请先停止 bot 并备份数据库。
+
+插件运行时只读写 userSoil，userFarmPack 仅用于评估打包格式的体积与读写耗时，
+因此 pack 只生成打包副本，不会删除 userSoil 中的数据。
+
+用法:
+    python dev/soilPack.py pack --db farm.db           userSoil -> userFarmPack 副本
+    python dev/soilPack.py unpack --db farm.db         userFarmPack -> userSoil
+    python dev/soilPack.py verify --db farm.db         比对两种存储是否一致
+    python dev/soilPack.py bench --users 2000 --soils 30
+
+unpack 加 --drop 在恢复成功后删除 userFarmPack
+"""
+
+import argparse
+import importlib.util
+import os
+from pathlib import Path
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+PLUGIN_PATH = Path(__file__).resolve().parent.parent
+
+# 直接按文件加载，避免导入插件包时依赖 nonebot/zhenxun
+_spec = importlib.util.spec_from_file_location(
+    "soilPack", PLUGIN_PATH / "database" / "soilPack.py"
+)
+soilPack = importlib.util.module_from_spec(_spec)  # type: ignore
+_spec.loader.exec_module(soilPack)  # type: ignore
+
+SOIL_COLUMNS = ("uid", *soilPack.PLOT_FIELDS)
+
+CREATE_SOIL = """
+CREATE TABLE IF NOT EXISTS userSoil (
+    uid TEXT NOT NULL,
+    soilIndex INTEGER NOT NULL,
+    plantName TEXT DEFAULT '',
+    plantTime INTEGER DEFAULT 0,
+    matureTime INTEGER DEFAULT 0,
+    soilLevel INTEGER DEFAULT 0,
+    wiltStatus INTEGER DEFAULT 0,
+    fertilizerStatus INTEGER DEFAULT 0,
+    bugStatus INTEGER DEFAULT 0,
+    weedStatus INTEGER DEFAULT 0,
+    waterStatus INTEGER DEFAULT 0,
+    harvestCount INTEGER DEFAULT 0,
+    isSoilPlanted INTEGER DEFAULT NULL,
+    PRIMARY KEY (uid, soilIndex)
+)
+"""
+
+CREATE_PACK = """
+CREATE TABLE IF NOT EXISTS userFarmPack (
+    uid TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    data BLOB NOT NULL
+)
+"""
+
+INSERT_SOIL = (
+    f"INSERT OR REPLACE INTO userSoil ({', '.join(SOIL_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * len(SOIL_COLUMNS))})"
+)
+
+
+def readSoilRows(db: sqlite3.Connection) -> dict[str, list[dict]]:
+    db.row_factory = sqlite3.Row
+    farms: dict[str, list[dict]] = {}
+    for row in db.execute("SELECT * FROM userSoil ORDER BY uid, soilIndex"):
+        farms.setdefault(row["uid"], []).append(dict(row))
+    db.row_factory = None
+    return farms
+
+
+def readPackRows(db: sqlite3.Connection) -> dict[str, list[dict]]:
+    return {
+        uid: soilPack.decodeFarm(uid, data)
+        for uid, data in db.execute("SELECT uid, data FROM userFarmPack")
+    }
+
+
+def pack(db: sqlite3.Connection) -> int:
+    farms = readSoilRows(db)
+    with db:
+        db.execute(CREATE_PACK)
+        db.executemany(
+            "INSERT OR REPLACE INTO userFarmPack (uid, version, data) VALUES (?, ?, ?)",
+            (
+                (uid, soilPack.PACK_VERSION, soilPack.encodeFarm(soils))
+                for uid, soils in farms.items()
+            ),
+        )
+
+    return len(farms)
+
+
+def unpack(db: sqlite3.Connection, drop: bool) -> int:
+    farms = readPackRows(db)
+    with db:
+        db.execute(CREATE_SOIL)
+        db.executemany(
+            INSERT_SOIL,
+            (
+                tuple(soil[column] for column in SOIL_COLUMNS)
+                for soils in farms.values()
+                for soil in soils
+            ),
+        )
+        if drop:
+            db.execute("DROP TABLE userFarmPack")
+
+    return len(farms)
+
+
+def verify(db: sqlite3.Connection) -> list[str]:
+    """比对两种存储，返回不一致的用户"""
+    rows = readSoilRows(db)
+    packs = readPackRows(db)
+
+    mismatched = []
+    for uid in sorted(set(rows) | set(packs)):
+        left = [
+            {key: soil.get(key) for key in SOIL_COLUMNS} for soil in rows.get(uid, [])
+        ]
+        right = [
+            {key: soil.get(key) for key in SOIL_COLUMNS} for soil in packs.get(uid, [])
+        ]
+        if left != right:
+            mismatched.append(uid)
+
+    return mismatched
+
+
+def randomFarms(users: int, soils: int, seed: int) -> dict[str, list[dict]]:
+    rand = random.Random(seed)
+    plants = [f"作物{i}" for i in range(80)]
+    now = int(time.time())
+
+    farms = {}
+    for u in range(users):
+        uid = str(100000000 + u)
+        farms[uid] = []
+        for index in range(1, soils + 1):
+            planted = rand.random() < 0.8
+            plantTime = now - rand.randint(0, 86400) if planted else 0
+            farms[uid].append(
+                {
+                    "uid": uid,
+                    "soilIndex": index,
+                    "plantName": rand.choice(plants) if planted else "",
+                    "plantTime": plantTime,
+                    "matureTime": plantTime + rand.randint(3600, 86400)
+                    if planted
+                    else 0,
+                    "soilLevel": rand.randint(0, 3),
+                    "wiltStatus": int(rand.random() < 0.1),
+                    "fertilizerStatus": 0,
+                    "bugStatus": 0,
+                    "weedStatus": 0,
+                    "waterStatus": 0,
+                    "harvestCount": rand.randint(0, 3),
+                    "isSoilPlanted": int(planted),
+                }
+            )
+
+    return farms
+
+
+def timeit(func, repeat: int) -> float:
+    """返回单次调用耗时的中位数（微秒）"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1_000_000)
+
+    return statistics.median(samples)
+
+
+def bench(users: int, soils: int, repeat: int, seed: int):
+    farms = randomFarms(users, soils, seed)
+    uids = list(farms)
+    rand = random.Random(seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        rowPath = os.path.join(tmp, "rows.db")
+        packPath = os.path.join(tmp, "pack.db")
+
+        rowDB = sqlite3.connect(rowPath, isolation_level=None)
+        rowDB.execute(CREATE_SOIL)
+        with rowDB:
+            rowDB.execute("BEGIN")
+            rowDB.executemany(
+                INSERT_SOIL,
+                (
+                    tuple(soil[column] for column in SOIL_COLUMNS)
+                    for farm in farms.values()
+                    for soil in farm
+                ),
+            )
+
+        packDB = sqlite3.connect(packPath, isolation_level=None)
+        packDB.execute(CREATE_PACK)
+        with packDB:
+            packDB.execute("BEGIN")
+            packDB.executemany(
+                "INSERT INTO userFarmPack (uid, version, data) VALUES (?, ?, ?)",
+                (
+                    (uid, soilPack.PACK_VERSION, soilPack.encodeFarm(farm))
+                    for uid, farm in farms.items()
+                ),
+            )
+
+        for db in (rowDB, packDB):
+            db.execute("VACUUM")
+
+        def readRows():
+            uid = rand.choice(uids)
+            cursor = rowDB.execute(
+                "SELECT * FROM userSoil WHERE uid = ? ORDER BY soilIndex", (uid,)
+            )
+            columns = [description[0] for description in cursor.description]
+            [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+        def readPack():
+            uid = rand.choice(uids)
+            (data,) = packDB.execute(
+                "SELECT data FROM userFarmPack WHERE uid = ?", (uid,)
+            ).fetchone()
+            soilPack.decodeFarm(uid, data)
+
+        def writeRows():
+            uid = rand.choice(uids)
+            rowDB.execute(
+                "UPDATE userSoil SET matureTime = ? WHERE uid = ? AND soilIndex = ?",
+                (int(time.time()), uid, rand.randint(1, soils)),
+            )
+
+        def writePack():
+            uid = rand.choice(uids)
+            (data,) = packDB.execute(
+                "SELECT data FROM userFarmPack WHERE uid = ?", (uid,)
+            ).fetchone()
+            farm = soilPack.decodeFarm(uid, data)
+            farm[rand.randint(0, soils - 1)]["matureTime"] = int(time.time())
+            packDB.execute(
+                "UPDATE userFarmPack SET data = ? WHERE uid = ?",
+                (soilPack.encodeFarm(farm), uid),
+            )
+
+        results = {
+            "读取整个农场": (timeit(readRows, repeat), timeit(readPack, repeat)),
+            "修改单块土地": (timeit(writeRows, repeat), timeit(writePack, repeat)),
+        }
+
+        rowDB.close()
+        packDB.close()
+        sizes = (os.path.getsize(rowPath), os.path.getsize(packPath))
+
+    print(f"用户 {users}，每人 {soils} 块地，重复 {repeat} 次取中位数")
+    print(f"{'':<12}{'逐块存储':>12}{'打包存储':>12}{'比值':>8}")
+    for name, (rows, packed) in results.items():
+        print(f"{name:<10}{rows:>10.1f}us{packed:>10.1f}us{packed / rows:>8.2f}")
+    print(
+        f"{'数据库大小':<9}{sizes[0] / 1024:>10.0f}KB{sizes[1] / 1024:>10.0f}KB"
+        f"{sizes[1] / sizes[0]:>8.2f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="userSoil 打包存储的迁移与基准工具")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    for name in ("pack", "unpack", "verify"):
+        command = sub.add_parser(name)
+        command.add_argument("--db", type=Path, required=True, help="farm.db 路径")
+        if name == "unpack":
+            command.add_argument(
+                "--drop", action="store_true", help="恢复成功后删除 userFarmPack"
+            )
+
+    command = sub.add_parser("bench")
+    command.add_argument("--users", type=int, default=2000)
+    command.add_argument("--soils", type=int, default=30)
+    command.add_argument("--repeat", type=int, default=2000)
+    command.add_argument("--seed", type=int, default=0)
+
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        bench(args.users, args.soils, args.repeat, args.seed)
+        return
+
+    db = sqlite3.connect(args.db)
+    try:
+        if args.command == "pack":
+            print(f"已打包 {pack(db)} 个用户的农场，userSoil 保持不变")
+        elif args.command == "unpack":
+            print(f"已展开 {unpack(db, args.drop)} 个用户的农场")
+        else:
+            mismatched = verify(db)
+            if mismatched:
+                print(f"{len(mismatched)} 个用户不一致: {', '.join(mismatched[:20])}")
+                sys.exit(1)
+            print("两种存储一致")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -116,8 +116,40 @@ class FarmEventManager:
     m_afterExpand = Signal()
     m_beforeSteal = Signal()
     m_afterSteal = Signal()
+    """偷菜后信号 每块地偷取成功都会触发该信号
+
+    Args:
+        uid (str): 偷菜用户Uid
+        target (str): 被偷用户Uid
+        soilIndex (int): 被偷地块索引 从1开始
+        num (int): 偷取数量
+        remain (int): 本轮作物剩余可偷数量 为0时作物已被偷完
+    """
+
+    m_afterSoilChange = Signal()
+    """地块数据写入后信号 播种、收获、铲除、偷菜、升级等修改 userSoil 时都会触发
+
+    Args:
+        uid (str): 用户Uid
+        soilIndex (int): 地块索引 从1开始
+    """
+
+    m_afterExecuteDB = Signal()
+    """执行自定义SQL成功后信号 用于使数据库缓存失效
+
+    Args:
+        command (str): 执行的SQL语句
+    """
 
     m_dit = Signal()
 
+    m_afterConfigReload = Signal()
+    """配置文件热重载后信号 用于使依赖配置的缓存失效
+
+    Args:
+        name (str): 配置名称 item/level/soil/sign
+        config: 重新编译后的配置对象
+    """
+
 
 g_pEventManager = FarmEventManager()
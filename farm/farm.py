@@ -17,6 +17,34 @@ from ..tool import g_pToolManager
 
 
 class CFarmManager:
+    # 按土地尺寸缩放好的土地图层 资源路径 -> 图片，soil.json 重载后清空
+    m_pSoilLayers: dict[str, BuildImage] = {}
+
+    @classmethod
+    async def getSoilLayer(cls, soilUrl: str) -> BuildImage:
+        """获取缩放至土地尺寸的土地图层，绘制时只读取不修改
+
+        Args:
+            soilUrl (str): 相对资源目录的土地图片路径
+
+        Returns:
+            BuildImage: 土地图层
+        """
+        layer = cls.m_pSoilLayers.get(soilUrl)
+        if layer is None:
+            soilSize = g_pJsonManager.m_pSoil.m_pSize
+
+            layer = BuildImage(background=g_sResourcePath / soilUrl)
+            await layer.resize(0, soilSize[0], soilSize[1])
+            cls.m_pSoilLayers[soilUrl] = layer
+
+        return layer
+
+    @classmethod
+    def onConfigReload(cls, name: str, config):
+        if name == "soil":
+            cls.m_pSoilLayers.clear()
+
     @classmethod
     async def buyPointByUid(cls, uid: str, num: int) -> str:
         if num <= 0:
@@ -63,15 +91,14 @@ class CFarmManager:
         """
         img = BuildImage(background=g_sResourcePath / "background/background.jpg")
 
-        soilSize = g_pJsonManager.m_pSoil["size"]
+        soilSize = g_pJsonManager.m_pSoil.m_pSize
 
-        grass = BuildImage(background=g_sResourcePath / "soil/草土地.png")
-        await grass.resize(0, soilSize[0], soilSize[1])
+        grass = await cls.getSoilLayer("soil/草土地.png")
 
-        soilPos = g_pJsonManager.m_pSoil["soil"]
+        soilPos = g_pJsonManager.m_pSoil.m_pPos
 
         userInfo = await g_pDBService.user.getUserInfoByUid(uid)
-        soilUnlock = int(userInfo["soil"])
+        soilUnlock = int(userInfo.soil)
 
         x = 0
         y = 0
@@ -79,8 +106,7 @@ class CFarmManager:
         isFirstRipe = True
         plant = None
         for index in range(0, 30):
-            x = soilPos[str(index + 1)]["x"]
-            y = soilPos[str(index + 1)]["y"]
+            x, y = soilPos[index]
 
             # 如果土地已经到达对应等级
             if index < soilUnlock:
@@ -91,7 +117,7 @@ class CFarmManager:
                 if not soilInfo:
                     soilUrl = "soil/普通土地.png"
                 else:
-                    soilLevel = soilInfo.get("soilLevel", 0)
+                    soilLevel = soilInfo.soilLevel
 
                     if soilLevel == 1:
                         soilUrl = "soil/红土地.png"
@@ -102,8 +128,7 @@ class CFarmManager:
                     else:
                         soilUrl = "soil/普通土地.png"
 
-                soil = BuildImage(background=g_sResourcePath / soilUrl)
-                await soil.resize(0, soilSize[0], soilSize[1])
+                soil = await cls.getSoilLayer(soilUrl)
 
                 await img.paste(soil, (x, y))
 
@@ -168,7 +193,7 @@ class CFarmManager:
 
         # 用户名
         nameImg = await BuildImage.build_text_image(
-            userInfo["name"], size=24, font_color=(77, 35, 4)
+            userInfo.name, size=24, font_color=(77, 35, 4)
         )
         await img.paste(nameImg, (300, 92))
 
@@ -194,7 +219,7 @@ class CFarmManager:
 
         # 金币
         pointImg = await BuildImage.build_text_image(
-            str(userInfo["point"]), size=24, font_color=(253, 253, 253)
+            str(userInfo.point), size=24, font_color=(253, 253, 253)
         )
         await img.paste(pointImg, (330, 255))
 
@@ -244,7 +269,7 @@ class CFarmManager:
             soilInfo = await g_pDBService.userSoil.getUserSoil(uid, i)
 
             if soilInfo:
-                match soilInfo.get("soilLevel", 0):
+                match soilInfo.soilLevel:
                     case 1:
                         name = "红土地.png"
                     case 2:
@@ -258,7 +283,7 @@ class CFarmManager:
                 if iconPath.exists():
                     icon = (iconPath, 33, 33)
 
-                plantName = soilInfo.get("plantName", "-")
+                plantName = soilInfo.plantName or "-"
 
                 if plantName == "-":
                     matureTime = "-"
@@ -268,27 +293,27 @@ class CFarmManager:
                 else:
                     matureTime = (
                         g_pToolManager.dateTime()
-                        .fromtimestamp(int(soilInfo.get("matureTime", 0)))
+                        .fromtimestamp(int(soilInfo.matureTime))
                         .strftime("%Y-%m-%d %H:%M:%S")
                     )
                     soilStatus = await g_pDBService.userSoil.getUserSoilStatus(uid, i)
 
                     totalNumber = await g_pDBService.userSteal.getTotalStolenCount(
-                        uid, i
+                        uid, i, int(soilInfo.matureTime)
                     )
                     planInfo = await g_pDBService.plant.getPlantByName(plantName)
 
                     if not planInfo:
                         plantNumber = "None"
                     else:
-                        plantNumber = f"{planInfo['harvest'] - totalNumber}"
+                        plantNumber = f"{planInfo.harvest - totalNumber}"
 
                 dataList.append(
                     [
                         icon,
                         i,
                         await g_pDBService.userSoil.getSoilLevelText(
-                            soilInfo["soilLevel"]
+                            soilInfo.soilLevel
                         ),
                         plantName,
                         matureTime,
@@ -336,73 +361,35 @@ class CFarmManager:
             tuple[bool, BuildImage]: [绘制是否成功，资源图片, 是否成熟]
         """
 
-        plant = None
         soilInfo = await g_pDBService.userSoil.getUserSoil(uid, soilIndex)
 
-        if not soilInfo:
+        if not soilInfo or not soilInfo.plantName:
             return False, None, False, 0, 0  # type: ignore
 
         # 是否枯萎
-        if int(soilInfo.get("wiltStatus", 0)) == 1:
-            plant = BuildImage(background=g_sResourcePath / "plant/basic/9.png")
+        if soilInfo.isWilted:
+            plant = BuildImage(background=soilInfo.m_sWiltImage)
             await plant.resize(0, 150, 212)
             return True, plant, False, 0, 0
 
         # 获取作物详细信息
-        plantInfo = await g_pDBService.plant.getPlantByName(soilInfo["plantName"])
+        plantInfo = await g_pDBService.plant.getPlantByName(soilInfo.plantName)
         if not plantInfo:
-            logger.error(f"绘制植物资源失败: {soilInfo['plantName']}")
+            logger.error(f"绘制植物资源失败: {soilInfo.plantName}")
             return False, None, False, 0, 0  # type: ignore
 
-        offsetX = plantInfo.get("officX", 0)
-        offsetY = plantInfo.get("officY", 0)
-        offsetW = plantInfo.get("officW", 0)
-        offsetH = plantInfo.get("officH", 0)
-
         currentTime = g_pToolManager.dateTime().now().timestamp()
-        phaseList = await g_pDBService.plant.getPlantPhaseByName(soilInfo["plantName"])
+        plant = BuildImage(background=soilInfo.stageImage(plantInfo, currentTime))
 
         # 如果当前时间大于成熟时间 说明作物成熟
-        if currentTime >= soilInfo["matureTime"]:
-            plant = BuildImage(
-                background=g_sResourcePath
-                / f"plant/{soilInfo['plantName']}/{len(phaseList)}.png"
-            )
+        if currentTime >= soilInfo.matureTime:
+            return True, plant, True, plantInfo.officX, plantInfo.officY
 
-            return True, plant, True, offsetX, offsetY
-        else:
-            # 如果是多阶段作物 且没有成熟 #早期思路 多阶段作物 直接是倒数第二阶段图片
-            # if soilInfo["harvestCount"] >= 1:
-            #     plant = BuildImage(
-            #         background=g_sResourcePath
-            #         / f"plant/{soilInfo['plantName']}/{plantInfo['phase'] - 1}.png"
-            #     )
-
-            #     return True, plant, False, offsetX, offsetY
-
-            # 如果没有成熟 则根据当前阶段进行绘制
-            elapsedTime = currentTime - soilInfo["plantTime"]
-            currentStage = currentStage = sum(
-                1 for thr in phaseList if elapsedTime >= thr
-            )
+        # 第 0 阶段的幼苗图片按作物偏移缩放
+        if soilInfo.stage(plantInfo, currentTime) <= 0:
+            await plant.resize(0, 35 + plantInfo.officW, 58 + plantInfo.officH)
 
-            if currentStage <= 0:
-                if not plantInfo["general"]:
-                    plant = BuildImage(
-                        background=g_sResourcePath
-                        / f"plant/{soilInfo['plantName']}/0.png"
-                    )
-                else:
-                    plant = BuildImage(background=g_sResourcePath / "plant/basic/0.png")
-
-                await plant.resize(0, 35 + offsetW, 58 + offsetH)
-            else:
-                plant = BuildImage(
-                    background=g_sResourcePath
-                    / f"plant/{soilInfo['plantName']}/{currentStage}.png"
-                )
-
-        return True, plant, False, offsetX, offsetY
+        return True, plant, False, plantInfo.officX, plantInfo.officY
 
     @classmethod
     async def getUserSeedByUid(cls, uid: str) -> bytes:
@@ -432,30 +419,27 @@ class CFarmManager:
             return result.pic2bytes()
 
         for seedName, count in seedRecords.items():
-            try:
-                plantInfo = await g_pDBService.plant.getPlantByName(seedName)
-                if not plantInfo:
-                    continue
-
-                iconPath = g_sResourcePath / f"plant/{seedName}/icon.png"
-                icon = (iconPath, 33, 33) if iconPath.exists() else ""
-                sellable = "可以" if plantInfo["sell"] else "不可以"
-
-                dataList.append(
-                    [
-                        icon,
-                        seedName,
-                        count,
-                        plantInfo["experience"],
-                        plantInfo["harvest"],
-                        plantInfo["time"],
-                        plantInfo["crop"],
-                        sellable,
-                    ]
-                )
-            except KeyError:
+            plantInfo = await g_pDBService.plant.getPlantByName(seedName)
+            if not plantInfo:
                 continue
 
+            iconPath = plantInfo.iconPath
+            icon = (iconPath, 33, 33) if iconPath.exists() else ""
+            sellable = "可以" if plantInfo.sell else "不可以"
+
+            dataList.append(
+                [
+                    icon,
+                    seedName,
+                    count,
+                    plantInfo.experience,
+                    plantInfo.harvest,
+                    plantInfo.time,
+                    plantInfo.crop,
+                    sellable,
+                ]
+            )
+
         result = await ImageTemplate.table_page(
             "种子仓库",
             "播种示例：@小真寻 播种 大白菜 [数量]",
@@ -546,6 +530,12 @@ class CFarmManager:
         try:
             await g_pEventManager.m_beforeHarvest.emit(uid=uid)  # type: ignore
 
+            # 多数收获请求没有成熟作物，先用用户土地摘要判断，避免逐块读取
+            nextMatureTime, _ = await g_pDBService.user.getSoilSummaryByUid(uid)
+            now = int(g_pToolManager.dateTime().now().timestamp())
+            if nextMatureTime <= 0 or nextMatureTime > now:
+                return g_sTranslation["harvest"]["no"]
+
             soilNumber = await g_pDBService.user.getUserSoilByUid(uid)
 
             harvestRecords = []  # 收获日志记录
@@ -558,31 +548,33 @@ class CFarmManager:
                     continue
 
                 # 如果没有种植
-                if soilInfo.get("isSoilPlanted", 1) == 0:
+                if soilInfo.isSoilPlanted == 0:
                     continue
 
-                level = soilInfo.get("soilLevel", 0)
+                level = soilInfo.soilLevel
 
                 # 如果是枯萎状态
-                if soilInfo.get("wiltStatus", 1) == 1:
+                if soilInfo.isWilted:
                     continue
 
                 plantInfo = await g_pDBService.plant.getPlantByName(
-                    soilInfo["plantName"]
+                    soilInfo.plantName
                 )
                 if not plantInfo:
                     continue
 
                 currentTime = g_pToolManager.dateTime().now()
                 matureTime = g_pToolManager.dateTime().fromtimestamp(
-                    int(soilInfo["matureTime"])
+                    int(soilInfo.matureTime)
                 )
 
                 if currentTime >= matureTime:
-                    number = plantInfo["harvest"]
+                    number = plantInfo.harvest
 
                     # 处理偷菜扣除数量
-                    stealNum = await g_pDBService.userSteal.getTotalStolenCount(uid, i)
+                    stealNum = await g_pDBService.userSteal.getTotalStolenCount(
+                        uid, i, int(soilInfo.matureTime)
+                    )
                     number -= stealNum
 
                     # 处理土地等级带来的数量增长 向下取整
@@ -595,7 +587,7 @@ class CFarmManager:
                         continue
 
                     harvestCount += 1
-                    experience += plantInfo["experience"]
+                    experience += plantInfo.experience
 
                     # 处理土地等级带来的经验增长 向下取整
                     percent = await g_pDBService.userSoil.getSoilLevelHarvestExp(level)
@@ -603,29 +595,27 @@ class CFarmManager:
 
                     harvestRecords.append(
                         g_sTranslation["harvest"]["append"].format(
-                            name=soilInfo["plantName"],
+                            name=soilInfo.plantName,
                             num=number,
-                            exp=plantInfo["experience"],
+                            exp=plantInfo.experience,
                         )
                     )
 
                     await g_pDBService.userPlant.addUserPlantByUid(
-                        uid, soilInfo["plantName"], number
+                        uid, soilInfo.plantName, number
                     )
 
                     # 如果到达收获次数上限
-                    if soilInfo["harvestCount"] + 1 >= plantInfo["crop"]:
+                    if soilInfo.harvestCount + 1 >= plantInfo.crop:
                         await g_pDBService.userSoil.updateUserSoil(
                             uid, i, "wiltStatus", 1
                         )
                     else:
-                        phase = await g_pDBService.plant.getPlantPhaseByName(
-                            soilInfo["plantName"]
-                        )
+                        phase = plantInfo.phases
 
                         ts, hc = (
                             int(currentTime.timestamp()),
-                            soilInfo["harvestCount"] + 1,
+                            soilInfo.harvestCount + 1,
                         )
                         p1, p2, *rest = phase
 
@@ -640,7 +630,7 @@ class CFarmManager:
                         )
 
                     await g_pEventManager.m_afterHarvest.emit(  # type: ignore
-                        uid=uid, name=soilInfo["plantName"], num=number, soilIndex=i
+                        uid=uid, name=soilInfo.plantName, num=number, soilIndex=i
                     )
 
             if experience > 0:
@@ -671,10 +661,14 @@ class CFarmManager:
         Returns:
             str: 返回
         """
-        soilNumber = await g_pDBService.user.getUserSoilByUid(uid)
-
         await g_pEventManager.m_beforeEradicate.emit(uid=uid)  # type: ignore
 
+        _, hasWilted = await g_pDBService.user.getSoilSummaryByUid(uid)
+        if not hasWilted:
+            return g_sTranslation["eradicate"]["error"]
+
+        soilNumber = await g_pDBService.user.getUserSoilByUid(uid)
+
         experience = 0
         for i in range(1, soilNumber + 1):
             soilInfo = await g_pDBService.userSoil.getUserSoil(uid, i)
@@ -682,11 +676,11 @@ class CFarmManager:
                 continue
 
             # 如果没有种植
-            if soilInfo.get("isSoilPlanted", 1) == 0:
+            if soilInfo.isSoilPlanted == 0:
                 continue
 
             # 如果不是枯萎状态
-            if soilInfo.get("wiltStatus", 0) == 0:
+            if not soilInfo.isWilted:
                 continue
 
             experience += 3
@@ -761,16 +755,16 @@ class CFarmManager:
                 continue
 
             icon = ""
-            icon_path = g_sResourcePath / f"plant/{name}/icon.png"
+            icon_path = plantInfo.iconPath
             if icon_path.exists():
                 icon = (icon_path, 33, 33)
 
-            if plantInfo["sell"]:
+            if plantInfo.sell:
                 sell = "可以"
             else:
                 sell = "不可以"
 
-            number = int(count) * plantInfo["price"]
+            number = int(count) * plantInfo.price
 
             isLock = await g_pDBService.userPlant.checkPlantLockByName(uid, name)
             if isLock:
@@ -779,7 +773,7 @@ class CFarmManager:
                 lock = "未上锁"
 
             data_list.append(
-                [icon, name, count, plantInfo["price"], number, lock, sell]
+                [icon, name, count, plantInfo.price, number, lock, sell]
             )
 
         result = await ImageTemplate.table_page(
@@ -830,8 +824,8 @@ class CFarmManager:
         # 用户信息
         userInfo = await g_pDBService.user.getUserInfoByUid(uid)
 
-        stealTime = userInfo.get("stealTime", "")
-        stealCount = int(userInfo["stealCount"])
+        stealTime = userInfo.stealTime
+        stealCount = int(userInfo.stealCount)
 
         if stealTime == "" or not stealTime:
             stealTime = g_pToolManager.dateTime().date().today().strftime("%Y-%m-%d")
@@ -846,6 +840,12 @@ class CFarmManager:
         if stealCount <= 0:
             return g_sTranslation["stealing"]["max"]
 
+        # 目标没有成熟作物时直接返回，无需读取地块与偷菜记录
+        nextMatureTime, _ = await g_pDBService.user.getSoilSummaryByUid(target)
+        now = int(g_pToolManager.dateTime().now().timestamp())
+        if nextMatureTime <= 0 or nextMatureTime > now:
+            return g_sTranslation["stealing"]["noPlant"]
+
         # 获取用户解锁地块数量
         soilNumber = await g_pDBService.user.getUserSoilByUid(target)
         harvestRecords: list[str] = []
@@ -858,91 +858,96 @@ class CFarmManager:
                 continue
 
             # 如果没有种植
-            if soilInfo.get("isSoilPlanted", 1) == 0:
+            if soilInfo.isSoilPlanted == 0:
                 continue
 
             # 如果是枯萎状态
-            if soilInfo.get("wiltStatus", 1) == 1:
+            if soilInfo.isWilted:
                 continue
 
             # 作物信息
-            plantInfo = await g_pDBService.plant.getPlantByName(soilInfo["plantName"])
+            plantInfo = await g_pDBService.plant.getPlantByName(soilInfo.plantName)
             if not plantInfo:
                 continue
 
             currentTime = g_pToolManager.dateTime().now()
             matureTime = g_pToolManager.dateTime().fromtimestamp(
-                int(soilInfo["matureTime"])
+                int(soilInfo.matureTime)
             )
 
             if currentTime >= matureTime:
+                # 只统计本轮作物成熟后的偷菜记录，再生前的记录不影响新一轮作物
+                matureTs = int(soilInfo.matureTime)
+
                 # 如果偷过，则跳过该土地
-                if await g_pDBService.userSteal.hasStealed(target, i, uid):
+                if await g_pDBService.userSteal.hasStealed(target, i, uid, matureTs):
                     isStealingNumber += 1
                     continue
 
-                stealingNumber = plantInfo[
-                    "harvest"
-                ] - await g_pDBService.userSteal.getTotalStolenCount(target, i)
+                stealingNumber = (
+                    plantInfo.harvest
+                    - await g_pDBService.userSteal.getTotalStolenCount(
+                        target, i, matureTs
+                    )
+                )
                 randomNumber = random.choice([1, 2])
-                randomNumber = min(randomNumber, stealingNumber)
+                randomNumber = max(min(randomNumber, stealingNumber), 0)
 
                 if randomNumber > 0:
+                    # 先写入偷菜记录再发放作物，记录写入失败时不发放，避免重复偷取
+                    if not await g_pDBService.userSteal.addStealRecord(
+                        target,
+                        i,
+                        uid,
+                        randomNumber,
+                        int(currentTime.timestamp()),
+                    ):
+                        continue
+
                     await g_pDBService.userPlant.addUserPlantByUid(
-                        uid, soilInfo["plantName"], randomNumber
+                        uid, soilInfo.plantName, randomNumber
                     )
 
                     harvestRecords.append(
                         g_sTranslation["stealing"]["info"].format(
-                            name=soilInfo["plantName"], num=randomNumber
+                            name=soilInfo.plantName, num=randomNumber
                         )
                     )
 
                     isStealingPlant += 1
 
-                    # 如果将作物偷完，就直接更新状态 并记录用户偷取过
-                    if plantInfo["harvest"] - randomNumber + stealingNumber == 0:
-                        # 如果作物 是最后一阶段作物且偷完 则直接枯萎
-                        if soilInfo["harvestCount"] + 1 >= plantInfo["crop"]:
-                            await g_pDBService.userSoil.updateUserSoil(
-                                target, i, "wiltStatus", 1
-                            )
-                        else:
-                            phase = await g_pDBService.plant.getPlantPhaseByName(
-                                soilInfo["plantName"]
-                            )
-
-                            ts, hc = (
-                                int(currentTime.timestamp()),
-                                soilInfo["harvestCount"] + 1,
-                            )
-                            p1, p2, *rest = phase
-
-                            await g_pDBService.userSoil.updateUserSoilFields(
-                                uid,
-                                i,
-                                {
-                                    "harvestCount": hc,
-                                    "plantTime": ts - p1 - p2,
-                                    "matureTime": ts + p2 + sum(rest),
-                                },
-                            )
-
-                            await g_pDBService.userSteal.addStealRecord(
-                                target,
-                                i,
-                                uid,
-                                randomNumber,
-                                int(g_pToolManager.dateTime().now().timestamp()),
-                            )
+                    await g_pEventManager.m_afterSteal.emit(  # type: ignore
+                        uid=uid,
+                        target=target,
+                        soilIndex=i,
+                        num=randomNumber,
+                        remain=stealingNumber - randomNumber,
+                    )
 
+                # 如果将作物偷完（含此前已被偷完的地块），就直接更新状态
+                if stealingNumber - randomNumber <= 0:
+                    # 如果作物 是最后一阶段作物且偷完 则直接枯萎
+                    if soilInfo.harvestCount + 1 >= plantInfo.crop:
+                        await g_pDBService.userSoil.updateUserSoil(
+                            target, i, "wiltStatus", 1
+                        )
                     else:
-                        await g_pDBService.userSteal.addStealRecord(
+                        phase = plantInfo.phases
+
+                        ts, hc = (
+                            int(currentTime.timestamp()),
+                            soilInfo.harvestCount + 1,
+                        )
+                        p1, p2, *rest = phase
+
+                        await g_pDBService.userSoil.updateUserSoilFields(
                             target,
                             i,
-                            uid,
-                            randomNumber,
-                            int(g_pToolManager.dateTime().now().timestamp()),
+                            {
+                                "harvestCount": hc,
+                                "plantTime": ts - p1 - p2,
+                                "matureTime": ts + p2 + sum(rest),
+                            },
                         )
 
         if isStealingPlant <= 0 and isStealingNumber <= 0:
@@ -967,17 +972,18 @@ class CFarmManager:
             str: 返回条件文本信息
         """
         userInfo = await g_pDBService.user.getUserInfoByUid(uid)
-        rec = g_pJsonManager.m_pLevel["reclamation"]
 
         try:
-            if userInfo["soil"] >= 30:
+            if userInfo.soil >= 30:
                 return g_sTranslation["reclamation"]["perfect"]
 
-            rec = rec[f"{userInfo['soil'] + 1}"]
+            rec = g_pJsonManager.m_pLevel.reclamationRule(userInfo.soil + 1)
+            if rec is None:
+                return g_sTranslation["reclamation"]["error"]
 
-            level = rec["level"]
-            point = rec["point"]
-            item = rec["item"]
+            level = rec.level
+            point = rec.point
+            item = rec.item
 
             str = ""
             if len(item) == 0:
@@ -1006,29 +1012,29 @@ class CFarmManager:
         userInfo = await g_pDBService.user.getUserInfoByUid(uid)
         level = await g_pDBService.user.getUserLevelByUid(uid)
 
-        rec = g_pJsonManager.m_pLevel["reclamation"]
-
         try:
-            if userInfo["soil"] >= 30:
+            if userInfo.soil >= 30:
                 return g_sTranslation["reclamation"]["perfect"]
 
-            rec = rec[f"{userInfo['soil'] + 1}"]
+            rec = g_pJsonManager.m_pLevel.reclamationRule(userInfo.soil + 1)
+            if rec is None:
+                return g_sTranslation["reclamation"]["error1"]
 
-            levelFileter = rec["level"]
-            point = rec["point"]
-            # item = rec["item"]
+            levelFileter = rec.level
+            point = rec.point
+            # item = rec.item
 
             if level[0] < levelFileter:
                 return g_sTranslation["reclamation"]["nextLevel"].format(
                     level=level[0], next=levelFileter
                 )
 
-            if userInfo["point"] < point:
+            if userInfo.point < point:
                 return g_sTranslation["reclamation"]["noNum"].format(num=point)
 
             # TODO 缺少判断消耗的item
-            await g_pDBService.user.updateUserPointByUid(uid, userInfo["point"] - point)
-            await g_pDBService.user.updateUserSoilByUid(uid, userInfo["soil"] + 1)
+            await g_pDBService.user.updateUserPointByUid(uid, userInfo.point - point)
+            await g_pDBService.user.updateUserSoilByUid(uid, userInfo.soil + 1)
 
             return g_sTranslation["reclamation"]["success"]
         except Exception:
@@ -1050,7 +1056,7 @@ class CFarmManager:
         if not soilInfo:
             return g_sTranslation["soilInfo"]["error"]
 
-        soilLevel = soilInfo.get("soilLevel", 0) + 1
+        soilLevel = soilInfo.soilLevel + 1
         if soilLevel >= g_iSoilLevelMax:
             return g_sTranslation["soilInfo"]["error1"]
 
@@ -1058,8 +1064,9 @@ class CFarmManager:
         countSoil = await g_pDBService.userSoil.countSoilByLevel(uid, soilLevel)
 
         # 获取升级所需
-        soilLevelText = await g_pDBService.userSoil.getSoilLevel(soilLevel)
-        fileter = g_pJsonManager.m_pSoil["upgrade"][soilLevelText][countSoil]
+        fileter = g_pJsonManager.m_pSoil.upgradeRule(soilLevel, countSoil)
+        if fileter is None:
+            return g_sTranslation["soilInfo"]["error1"]
 
         nextLevel = await g_pDBService.userSoil.getSoilLevelText(soilLevel)
 
@@ -1070,12 +1077,11 @@ class CFarmManager:
             ("vipPoint", "点券"),
         ]
         for key, label in fields:
-            value = fileter.get(key, 0)
+            value = getattr(fileter, key)
             if value > 0:
                 lines.append(f"{label}：{value}")
 
-        items = fileter.get("item", {})
-        for name, qty in items.items():
+        for name, qty in fileter.item.items():
             if qty:
                 lines.append(f"{name}：{qty}")
 
@@ -1100,19 +1106,21 @@ class CFarmManager:
         if not soilInfo:
             return g_sTranslation["soilInfo"]["error"]
 
-        soilLevel = soilInfo.get("soilLevel", 0) + 1
+        soilLevel = soilInfo.soilLevel + 1
         if soilLevel >= g_iSoilLevelMax:
             return g_sTranslation["soilInfo"]["error1"]
 
         countSoil = await g_pDBService.userSoil.countSoilByLevel(uid, soilLevel)
 
-        soilLevelText = await g_pDBService.userSoil.getSoilLevel(soilLevel)
-        fileter = g_pJsonManager.m_pSoil["upgrade"][soilLevelText][countSoil]
+        soilLevelText = g_pJsonManager.m_pSoil.levelKey(soilLevel)
+        fileter = g_pJsonManager.m_pSoil.upgradeRule(soilLevel, countSoil)
+        if fileter is None:
+            return g_sTranslation["soilInfo"]["error1"]
 
         getters = {
             "level": (await g_pDBService.user.getUserLevelByUid(uid))[0],
-            "point": userInfo.get("point", 0),
-            "vipPoint": userInfo.get("vipPoint", 0),
+            "point": userInfo.point,
+            "vipPoint": userInfo.vipPoint,
         }
 
         requirements = {
@@ -1122,7 +1130,7 @@ class CFarmManager:
         }
 
         for key, val in getters.items():
-            need = fileter.get(key, 0)
+            need = getattr(fileter, key)
             if val < need:
                 return f"你的{requirements[key]}不够哦~"
 
@@ -1137,10 +1145,10 @@ class CFarmManager:
         await g_pDBService.userSoil.matureNow(uid, soilIndex)
 
         # 更新数据库字段
-        point = userInfo.get("point", 0) - fileter.get("point", 0)
+        point = userInfo.point - fileter.point
         await g_pDBService.user.updateUserPointByUid(uid, point)
 
-        vipPoint = userInfo.get("vipPoint", 0) - fileter.get("vipPoint", 0)
+        vipPoint = userInfo.vipPoint - fileter.vipPoint
         await g_pDBService.user.updateUserVipPointByUid(uid, vipPoint)
 
         return g_sTranslation["soilInfo"]["success"].format(
@@ -1199,3 +1207,5 @@ class CFarmManager:
 
 
 g_pFarmManager = CFarmManager()
+
+g_pEventManager.m_afterConfigReload.connect(g_pFarmManager.onConfigReload)
@@ -1,117 +1,239 @@
+import asyncio
+import os
 from pathlib import Path
 
-from jinja2 import Template
-from playwright.async_api import async_playwright
-
 from zhenxun.configs.path_config import DATA_PATH
 from zhenxun.services.log import logger
+from zhenxun.utils.image_utils import ImageTemplate
 
 from ..config import g_sResourcePath
+from ..event.event import g_pEventManager
 
 
-def rendeerHtmlToFile(path: Path | str, context: dict, output: Path | str) -> None:
-    """
-    使用 Jinja2 渲染 HTML 模板并保存到指定文件，会自动创建父目录
-
-    Args:
-        path (str): 模板 HTML 路径
-        context (dict): 用于渲染的上下文字典
-        output (str): 输出 HTML 文件路径
-    """
-    templatePath = str(path)
-    outputPath = str(output)
-
-    templateStr = Path(templatePath).read_text(encoding="utf-8")
-    template = Template(templateStr)
-    rendered = template.render(**context)
-
-    # 自动创建目录
-    Path(outputPath).parent.mkdir(parents=True, exist_ok=True)
-
-    Path(outputPath).write_text(rendered, encoding="utf-8")
-
+class CHelpManager:
+    """农场帮助图片
 
-async def screenshotHtmlToBytes(path: str) -> bytes:
+    启动时渲染一次并缓存为 PNG，帮助指令只读取缓存文件；
+    模板或配置变更后重新渲染。HTML 渲染复用同一个常驻浏览器上下文，
+    未安装 Chromium 时退回到 PIL 绘制的表格
     """
-    使用 Playwright 截图本地 HTML 文件并返回 PNG 图片字节数据
 
-    Args:
-        path (str): 本地 HTML 文件路径
-
-    Returns:
-        bytes: PNG 图片的原始字节内容
-    """
-    async with async_playwright() as p:
-        browser = await p.chromium.launch()
-        page = await browser.new_page()
-        file_url = Path(path).resolve().as_uri()
-        await page.goto(file_url)
-        image_bytes = await page.screenshot(full_page=True)
-        await browser.close()
-
-        return image_bytes
-
-
-async def screenshotSave(path: str, save: str) -> None:
-    """
-    使用 Playwright 渲染本地 HTML 并将截图保存到指定路径
-
-    Args:
-        path (str): HTML 文件路径
-        save (str): PNG 保存路径（如 output/image.png）
-    """
-    async with async_playwright() as p:
-        browser = await p.chromium.launch()
-        page = await browser.new_page()
-
-        file_url = Path(path).resolve().as_uri()
-        await page.goto(file_url)
-
-        # 确保保存目录存在
-        Path(save).parent.mkdir(parents=True, exist_ok=True)
-
-        # 截图并保存到本地文件
-        await page.screenshot(path=save, full_page=True)
-        await browser.close()
-
-
-async def createHelpImage() -> bool:
-    templatePath = g_sResourcePath / "html/help.html"
-    outputPath = DATA_PATH / "farm_res/html/help.html"
-
-    context = {
-        "title": "功能指令总览",
-        "data": [
-            {
-                "command": "开通农场",
-                "description": "首次进入游戏开通农场",
-                "tip": "",
-            },
-            {
-                "command": "购买种子",
-                "description": "从商店中购买可用种子",
-                "tip": "",
-            },
-            {"command": "播种", "description": "将种子种入土地中", "tip": "先开垦土地"},
-            {
-                "command": "收获",
-                "description": "收获成熟作物获得收益",
-                "tip": "",
-            },
-            {
-                "command": "偷菜",
-                "description": "从好友农场中偷取成熟作物",
-                "tip": "1",
-            },
-        ],
-    }
-
-    try:
-        rendeerHtmlToFile(templatePath, context, outputPath)
-
-        image_bytes = await screenshot_html_to_bytes(html_output_path)
-    except Exception as e:
-        logger.warning("绘制农场帮助菜单失败", e=e)
-        return False
-
-    return True
+    m_sTemplatePath = g_sResourcePath / "html/help.html"
+    m_sHtmlPath = DATA_PATH / "farm_res/html/help.html"
+    m_sImagePath = DATA_PATH / "farm_res/help.png"
+
+    # 渲染缓存图片时模板的 mtime，模板改动后需要重新渲染
+    m_iTemplateMtime = 0
+    m_bStale = True
+
+    m_pPlaywright = None
+    m_pBrowser = None
+    m_pContext = None
+    # 浏览器不可用时不再反复尝试启动
+    m_bBrowserUnavailable = False
+    m_pBrowserLock = asyncio.Lock()
+    m_pRenderLock = asyncio.Lock()
+
+    m_pCommands = [
+        ("开通农场", "首次进入游戏开通农场", "需要at小真寻"),
+        ("我的农场", "查看农场", ""),
+        ("农场详述", "查看每块土地的详细信息", ""),
+        ("我的农场币", "查看农场币", ""),
+        ("种子商店", "查看可购买的种子", "种子商店 [筛选关键字] [页数]"),
+        ("购买种子", "从商店中购买可用种子", "购买种子 [种子名称] [数量]"),
+        ("我的种子", "查看仓库中的种子", ""),
+        ("播种", "将种子种入土地中", "不填数量将尽可能多地播种"),
+        ("收获", "收获成熟作物获得收益", ""),
+        ("铲除", "铲除枯萎的作物", ""),
+        ("我的作物", "查看仓库中的作物", ""),
+        ("出售作物", "出售仓库中的作物", "不填作物名将出售全部作物"),
+        ("偷菜", "从好友农场中偷取成熟作物", "每人每天只能偷5次"),
+        ("随机偷菜", "在本群已成熟的农场中随机偷取", "消耗一次偷菜次数"),
+        ("开启成熟提醒", "作物成熟后在本群提醒", "关闭成熟提醒 可取消"),
+        ("开垦", "开垦新的土地", ""),
+        ("购买农场币", "使用金币兑换农场币", "数量为消耗金币的数量"),
+        ("更改农场名", "修改农场名称", ""),
+        ("农场签到", "每日签到领取奖励", ""),
+        ("签到日历", "查看本月签到情况", ""),
+        ("土地升级", "升级指定土地", "地块ID通过农场详述获取"),
+    ]
+
+    @classmethod
+    def helpContext(cls) -> dict:
+        return {
+            "title": "功能指令总览",
+            "data": [
+                {"command": command, "description": description, "tip": tip}
+                for command, description, tip in cls.m_pCommands
+            ],
+        }
+
+    @classmethod
+    def templateMtime(cls) -> int:
+        try:
+            return os.stat(cls.m_sTemplatePath).st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    @classmethod
+    def renderHtmlToFile(cls, path: Path | str, context: dict, output: Path | str):
+        """
+        使用 Jinja2 渲染 HTML 模板并保存到指定文件，会自动创建父目录
+
+        Args:
+            path (str): 模板 HTML 路径
+            context (dict): 用于渲染的上下文字典
+            output (str): 输出 HTML 文件路径
+        """
+        from jinja2 import Template
+
+        templateStr = Path(path).read_text(encoding="utf-8")
+        rendered = Template(templateStr).render(**context)
+
+        # 自动创建目录
+        Path(output).parent.mkdir(parents=True, exist_ok=True)
+        Path(output).write_text(rendered, encoding="utf-8")
+
+    @classmethod
+    async def getContext(cls):
+        """获取常驻浏览器上下文，首次调用时启动 Chromium
+
+        Returns:
+            BrowserContext | None: 浏览器不可用时返回 None
+        """
+        if cls.m_pContext is not None or cls.m_bBrowserUnavailable:
+            return cls.m_pContext
+
+        async with cls.m_pBrowserLock:
+            if cls.m_pContext is not None or cls.m_bBrowserUnavailable:
+                return cls.m_pContext
+
+            try:
+                from playwright.async_api import async_playwright
+
+                cls.m_pPlaywright = await async_playwright().start()
+                cls.m_pBrowser = await cls.m_pPlaywright.chromium.launch()
+                cls.m_pContext = await cls.m_pBrowser.new_context()
+            except Exception as e:
+                logger.warning(f"启动 Chromium 失败，农场帮助改用 PIL 绘制: {e}")
+                cls.m_bBrowserUnavailable = True
+                await cls.closeBrowser()
+
+        return cls.m_pContext
+
+    @classmethod
+    async def closeBrowser(cls):
+        for attr, method in (
+            ("m_pContext", "close"),
+            ("m_pBrowser", "close"),
+            ("m_pPlaywright", "stop"),
+        ):
+            obj = getattr(cls, attr)
+            setattr(cls, attr, None)
+            if obj is None:
+                continue
+
+            try:
+                await getattr(obj, method)()
+            except Exception as e:
+                logger.debug(f"关闭浏览器资源失败: {e}")
+
+    @classmethod
+    async def screenshotHtmlToBytes(cls, path: Path | str) -> bytes | None:
+        """
+        使用常驻浏览器上下文截图本地 HTML 文件
+
+        Args:
+            path (str): 本地 HTML 文件路径
+
+        Returns:
+            bytes | None: PNG 图片字节内容，浏览器不可用时返回 None
+        """
+        context = await cls.getContext()
+        if context is None:
+            return None
+
+        page = await context.new_page()
+        try:
+            await page.goto(Path(path).resolve().as_uri())
+            return await page.screenshot(full_page=True)
+        finally:
+            await page.close()
+
+    @classmethod
+    async def drawHelpByPIL(cls, context: dict) -> bytes:
+        result = await ImageTemplate.table_page(
+            context["title"],
+            "",
+            ["指令", "描述", "Tip"],
+            [
+                [entry["command"], entry["description"], entry["tip"]]
+                for entry in context["data"]
+            ],
+        )
+        return result.pic2bytes()
+
+    @classmethod
+    async def createHelpImage(cls) -> bool:
+        """渲染帮助图片并原子写入缓存文件
+
+        Returns:
+            bool: 是否渲染成功
+        """
+        async with cls.m_pRenderLock:
+            templateMtime = cls.templateMtime()
+            context = cls.helpContext()
+
+            image = None
+            try:
+                await asyncio.to_thread(
+                    cls.renderHtmlToFile, cls.m_sTemplatePath, context, cls.m_sHtmlPath
+                )
+                image = await cls.screenshotHtmlToBytes(cls.m_sHtmlPath)
+            except Exception as e:
+                logger.warning("HTML 渲染农场帮助失败，改用 PIL 绘制", e=e)
+
+            try:
+                if image is None:
+                    image = await cls.drawHelpByPIL(context)
+
+                await asyncio.to_thread(cls.saveImage, image)
+            except Exception as e:
+                logger.warning("绘制农场帮助菜单失败", e=e)
+                return False
+
+            cls.m_iTemplateMtime = templateMtime
+            cls.m_bStale = False
+            return True
+
+    @classmethod
+    def saveImage(cls, image: bytes):
+        cls.m_sImagePath.parent.mkdir(parents=True, exist_ok=True)
+
+        tempPath = cls.m_sImagePath.with_suffix(".png.tmp")
+        tempPath.write_bytes(image)
+        os.replace(tempPath, cls.m_sImagePath)
+
+    @classmethod
+    async def getHelpImage(cls) -> bytes | None:
+        """获取帮助图片，缓存有效时直接读取文件
+
+        Returns:
+            bytes | None: 帮助图片，渲染失败时返回 None
+        """
+        if cls.m_bStale or cls.templateMtime() != cls.m_iTemplateMtime:
+            await cls.createHelpImage()
+
+        try:
+            return await asyncio.to_thread(cls.m_sImagePath.read_bytes)
+        except FileNotFoundError:
+            return None
+
+    @classmethod
+    def onConfigReload(cls, name: str, config):
+        cls.m_bStale = True
+
+
+g_pHelpManager = CHelpManager()
+
+g_pEventManager.m_afterConfigReload.connect(g_pHelpManager.onConfigReload)
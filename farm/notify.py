@@ -0,0 +1,212 @@
+import asyncio
+import heapq
+
+from zhenxun.configs.config import Config
+from zhenxun.services.log import logger
+
+from ..dbService import g_pDBService
+from ..event.event import g_pEventManager
+from ..tool import g_pToolManager
+
+
+class CRipeNotifyManager:
+    """作物成熟提醒
+
+    开启提醒的用户的地块按成熟时间组成最小堆，后台任务睡眠到最近的成熟时间。
+    地块成熟后不立即发送，而是计入所在群的批次，合并窗口结束后
+    每个群只发送一条消息，同一用户的多块地合并为一次提及
+    """
+
+    # 没有待成熟地块时的最长睡眠时间（秒）
+    m_iIdleInterval = 3600
+
+    def __init__(self):
+        # uid -> {groupId}，开启提醒的群
+        self.m_pSubscribers: dict[str, set[str]] = {}
+        # uid -> {soilIndex: matureTime}，只记录开启提醒的用户
+        self.m_pSoils: dict[str, dict[int, int]] = {}
+        # [(matureTime, uid, soilIndex)]，过期条目在出堆时丢弃
+        self.m_pTimer: list[tuple[int, str, int]] = []
+
+        # 群 -> {uid: 成熟地块数}，等待合并发送
+        self.m_pBatch: dict[str, dict[str, int]] = {}
+        # 群 -> 批次发送时间
+        self.m_pFlushTime: dict[str, int] = {}
+
+        self.m_pWakeEvent = asyncio.Event()
+        self.m_pTask: asyncio.Task | None = None
+
+    def now(self) -> int:
+        return int(g_pToolManager.dateTime().now().timestamp())
+
+    def coalesceWindow(self) -> int:
+        window = Config.get_config("zhenxun_plugin_farm", "成熟提醒合并时间")
+        return max(0, int(window or 0))
+
+    async def load(self) -> bool:
+        """加载开启提醒的用户及其地块，并启动后台任务"""
+        self.m_pSubscribers.clear()
+        self.m_pSoils.clear()
+        self.m_pTimer.clear()
+
+        for uid, groupId in await g_pDBService.userGroup.getNotifyGroups():
+            self.m_pSubscribers.setdefault(uid, set()).add(groupId)
+
+        # 启动前已成熟的地块不再提醒
+        now = self.now()
+        soils = await g_pDBService.userSoil.getGrowingSoils()
+        for uid, soilIndex, matureTime in soils:
+            if uid in self.m_pSubscribers:
+                self.m_pSoils.setdefault(uid, {})[soilIndex] = matureTime
+                if matureTime > now:
+                    self.m_pTimer.append((matureTime, uid, soilIndex))
+
+        heapq.heapify(self.m_pTimer)
+
+        if self.m_pTask is None or self.m_pTask.done():
+            self.m_pTask = asyncio.create_task(self.run())
+
+        return True
+
+    def stop(self):
+        if self.m_pTask is not None:
+            self.m_pTask.cancel()
+            self.m_pTask = None
+
+    async def subscribe(self, uid: str, groupId: str, enable: bool) -> bool:
+        """开启或关闭用户在指定群的成熟提醒
+
+        Args:
+            uid (str): 用户Uid
+            groupId (str): 群号
+            enable (bool): 是否开启
+
+        Returns:
+            bool: 是否成功
+        """
+        if not await g_pDBService.userGroup.setNotify(uid, groupId, enable):
+            return False
+
+        groups = self.m_pSubscribers.setdefault(uid, set())
+        if enable:
+            groups.add(groupId)
+        else:
+            groups.discard(groupId)
+
+        if not groups:
+            self.m_pSubscribers.pop(uid, None)
+            self.m_pSoils.pop(uid, None)
+        elif uid not in self.m_pSoils:
+            now = self.now()
+            soils = self.m_pSoils.setdefault(uid, {})
+            rows = await g_pDBService.userSoil.getGrowingSoils(uid)
+            for _, soilIndex, matureTime in rows:
+                soils[soilIndex] = matureTime
+                if matureTime > now:
+                    self.schedule(uid, soilIndex, matureTime)
+
+        return True
+
+    def schedule(self, uid: str, soilIndex: int, matureTime: int):
+        wake = not self.m_pTimer or matureTime < self.m_pTimer[0][0]
+        heapq.heappush(self.m_pTimer, (matureTime, uid, soilIndex))
+
+        # 新地块比当前等待的更早成熟，唤醒后台任务重新计算睡眠时间
+        if wake:
+            self.m_pWakeEvent.set()
+
+    async def onSoilChange(self, uid: str, soilIndex: int):
+        if uid not in self.m_pSubscribers:
+            return
+
+        soilInfo = await g_pDBService.userSoil.getUserSoil(uid, soilIndex)
+
+        soils = self.m_pSoils.setdefault(uid, {})
+        if not soilInfo or not soilInfo.plantName or soilInfo.isWilted:
+            soils.pop(soilIndex, None)
+            return
+
+        matureTime = int(soilInfo.matureTime)
+        if soils.get(soilIndex) == matureTime:
+            return
+
+        soils[soilIndex] = matureTime
+        if matureTime > self.now():
+            self.schedule(uid, soilIndex, matureTime)
+
+    def collect(self, now: int):
+        """将已到成熟时间的地块计入所在群的批次"""
+        window = self.coalesceWindow()
+        while self.m_pTimer and self.m_pTimer[0][0] <= now:
+            matureTime, uid, soilIndex = heapq.heappop(self.m_pTimer)
+            if self.m_pSoils.get(uid, {}).get(soilIndex) != matureTime:
+                continue
+
+            for groupId in self.m_pSubscribers.get(uid, ()):
+                batch = self.m_pBatch.setdefault(groupId, {})
+                batch[uid] = batch.get(uid, 0) + 1
+                self.m_pFlushTime.setdefault(groupId, matureTime + window)
+
+    async def flush(self, now: int):
+        """发送合并窗口已结束的批次"""
+        for groupId, flushTime in list(self.m_pFlushTime.items()):
+            if flushTime > now:
+                continue
+
+            del self.m_pFlushTime[groupId]
+            batch = self.m_pBatch.pop(groupId, {})
+            if batch:
+                await self.send(groupId, batch)
+
+    async def groupBot(self, groupId: str):
+        """选择在该群响应过指令且当前在线的Bot，没有记录时使用任意在线Bot"""
+        from nonebot import get_bot, get_bots
+
+        bots = get_bots()
+        for botId in await g_pDBService.userGroup.getGroupBots(groupId):
+            if botId in bots:
+                return bots[botId]
+
+        return get_bot()
+
+    async def send(self, groupId: str, batch: dict[str, int]):
+        from nonebot_plugin_alconna import At, Target, Text, UniMessage
+
+        segments = [Text("⏰ 你的作物成熟了，快来收获吧 🌾\n")]
+        for uid, count in batch.items():
+            segments += [At("user", uid), Text(f" {count}块地 ")]
+
+        try:
+            bot = await self.groupBot(groupId)
+            await UniMessage(segments).send(target=Target(groupId), bot=bot)
+        except Exception as e:
+            logger.warning(f"发送群{groupId}作物成熟提醒失败", e=e)
+
+    async def run(self):
+        while True:
+            try:
+                now = self.now()
+                self.collect(now)
+                await self.flush(now)
+
+                wake = [now + self.m_iIdleInterval, *self.m_pFlushTime.values()]
+                if self.m_pTimer:
+                    wake.append(self.m_pTimer[0][0])
+
+                self.m_pWakeEvent.clear()
+                try:
+                    await asyncio.wait_for(
+                        self.m_pWakeEvent.wait(), timeout=max(1, min(wake) - now)
+                    )
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("作物成熟提醒出错", e=e)
+                await asyncio.sleep(60)
+
+
+g_pRipeNotifyManager = CRipeNotifyManager()
+
+g_pEventManager.m_afterSoilChange.connect(g_pRipeNotifyManager.onSoilChange)
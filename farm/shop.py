@@ -2,7 +2,7 @@ import math
 
 from zhenxun.utils.image_utils import ImageTemplate
 
-from ..config import g_sResourcePath, g_sTranslation
+from ..config import g_sTranslation
 from ..dbService import g_pDBService
 
 
@@ -48,10 +48,10 @@ class CShopManager:
         filteredPlants = []
         for plant in plants:
             # 跳过未解锁购买的种子
-            if plant["isBuy"] == 0:
+            if plant.isBuy == 0:
                 continue
             # 字符串筛选
-            if filterStr and filterStr not in plant["name"]:
+            if filterStr and filterStr not in plant.name:
                 continue
             filteredPlants.append(plant)
 
@@ -66,25 +66,25 @@ class CShopManager:
         for plant in pageItems:
             # 图标处理
             icon = ""
-            iconPath = g_sResourcePath / f"plant/{plant['name']}/icon.png"
+            iconPath = plant.iconPath
             if iconPath.exists():
                 icon = (iconPath, 33, 33)
 
             # 交易行标记
-            sell = "可以" if plant["sell"] else "不可以"
+            sell = "可以" if plant.sell else "不可以"
 
             dataList.append(
                 [
                     icon,
-                    plant["name"],  # 种子名称
-                    plant["buy"],  # 农场币种子单价
-                    plant["vipBuy"],  # 点券种子单价
-                    plant["level"],  # 解锁等级
-                    plant["price"],  # 果实单价
-                    plant["experience"],  # 收获经验
-                    plant["harvest"],  # 收获数量
-                    plant["time"],  # 成熟时间（小时）
-                    plant["crop"],  # 收获次数
+                    plant.name,  # 种子名称
+                    plant.buy,  # 农场币种子单价
+                    plant.vipBuy,  # 点券种子单价
+                    plant.level,  # 解锁等级
+                    plant.price,  # 果实单价
+                    plant.experience,  # 收获经验
+                    plant.harvest,  # 收获数量
+                    plant.time,  # 成熟时间（小时）
+                    plant.crop,  # 收获次数
                     sell,  # 是否可上架交易行
                 ]
             )
@@ -123,7 +123,7 @@ class CShopManager:
 
         level = await g_pDBService.user.getUserLevelByUid(uid)
 
-        if level[0] < int(plantInfo["level"]):
+        if level[0] < int(plantInfo.level):
             return g_sTranslation["buySeed"]["noLevel"]
 
         """
@@ -131,15 +131,15 @@ class CShopManager:
             f"用户：{uid}购买{name}，数量为{num}。用户农场币为{point}，购买需要{total}"
         )
         """
-        if plantInfo["isVip"] == 1:
+        if plantInfo.isVip == 1:
             vipPoint = await g_pDBService.user.getUserVipPointByUid(uid)
-            total = int(plantInfo["vipBuy"]) * num
+            total = int(plantInfo.vipBuy) * num
             if vipPoint < total:
                 return g_sTranslation["buySeed"]["noVipPoint"]
             await g_pDBService.user.updateUserVipPointByUid(uid, vipPoint - total)
         else:
             point = await g_pDBService.user.getUserPointByUid(uid)
-            total = int(plantInfo["buy"]) * num
+            total = int(plantInfo.buy) * num
             if point < total:
                 return g_sTranslation["buySeed"]["noPoint"]
             await g_pDBService.user.updateUserPointByUid(uid, point - total)
@@ -147,7 +147,7 @@ class CShopManager:
         if not await g_pDBService.userSeed.addUserSeedByUid(uid, name, num):
             return g_sTranslation["buySeed"]["errorSql"]
 
-        if plantInfo["isVip"] == 1:
+        if plantInfo.isVip == 1:
             return g_sTranslation["buySeed"]["vipSuccess"].format(
                 name=name, total=total, point=vipPoint - total
             )
@@ -190,7 +190,7 @@ class CShopManager:
                 if not plantInfo:
                     continue
 
-                point += plantInfo["price"] * count
+                point += plantInfo.price * count
                 await g_pDBService.userPlant.updateUserPlantByName(uid, plantName, 0)
         else:
             if name not in plant:
@@ -211,7 +211,7 @@ class CShopManager:
             if not plantInfo:
                 price = 0
             else:
-                price = plantInfo["price"]
+                price = plantInfo.price
 
             totalPoint = totalSold * price
 
@@ -0,0 +1,148 @@
+import asyncio
+import calendar
+from collections import OrderedDict
+from io import BytesIO
+
+from zhenxun.services.log import logger
+
+
+class CSignCalendarManager:
+    """签到日历绘制
+
+    每个月份的底图（标题、格子、日期）只绘制一次，
+    之后按签到位图把已签到日期的高亮格子贴到底图副本上。
+    绘制结果只与月份和位图有关，按 (月份, 位图) 缓存
+    """
+
+    m_iCellSize = 80
+    m_iPadding = 40
+    m_iTitleHeight = 80
+    m_iCols = 7
+    m_iRows = 6
+
+    m_pSignedColor = (112, 196, 112)
+    m_pUnsignedColor = (220, 220, 220)
+
+    # 最近使用的月份底图 "YYYY-MM" -> BuildImage
+    m_iTemplateCacheSize = 3
+    m_pTemplates: OrderedDict = OrderedDict()
+
+    # 已签到格子 日期 -> BuildImage，与月份无关
+    m_pSignedCells: dict = {}
+
+    # 绘制结果 (月份, 位图) -> PNG bytes
+    m_iImageCacheSize = 256
+    m_pImages: OrderedDict = OrderedDict()
+
+    @classmethod
+    def cellBox(cls, firstWeekday: int, day: int) -> tuple[int, int, int, int]:
+        index = day + firstWeekday - 1
+        row, col = divmod(index, cls.m_iCols)
+        x1 = cls.m_iPadding + col * cls.m_iCellSize
+        y1 = cls.m_iPadding + cls.m_iTitleHeight + row * cls.m_iCellSize
+        return x1, y1, x1 + cls.m_iCellSize - 10, y1 + cls.m_iCellSize - 10
+
+    @classmethod
+    async def drawCell(cls, img, box: tuple, day: int, color: tuple):
+        await img.rectangle(box, fill=color, outline="black", width=2)
+        await img.text((box[0] + 10, box[1] + 10), str(day), font_size=24)
+
+    @classmethod
+    async def getTemplate(cls, year: int, month: int):
+        """获取月份底图，所有日期均绘制为未签到状态"""
+        from zhenxun.utils._build_image import BuildImage
+
+        key = f"{year:04d}-{month:02d}"
+        template = cls.m_pTemplates.get(key)
+        if template is not None:
+            cls.m_pTemplates.move_to_end(key)
+            return template
+
+        width = cls.m_iCellSize * cls.m_iCols + cls.m_iPadding * 2
+        height = (
+            cls.m_iCellSize * cls.m_iRows + cls.m_iPadding * 2 + cls.m_iTitleHeight
+        )
+
+        template = BuildImage(width, height, color=(255, 255, 255))
+        await template.text(
+            (cls.m_iPadding, 20), f"{year}年{month}月签到表", font_size=36
+        )
+
+        firstWeekday, totalDays = calendar.monthrange(year, month)
+        for day in range(1, totalDays + 1):
+            await cls.drawCell(
+                template, cls.cellBox(firstWeekday, day), day, cls.m_pUnsignedColor
+            )
+
+        cls.m_pTemplates[key] = template
+        while len(cls.m_pTemplates) > cls.m_iTemplateCacheSize:
+            cls.m_pTemplates.popitem(last=False)
+
+        return template
+
+    @classmethod
+    async def getSignedCell(cls, day: int):
+        """获取已签到日期的高亮格子"""
+        from zhenxun.utils._build_image import BuildImage
+
+        cell = cls.m_pSignedCells.get(day)
+        if cell is None:
+            size = cls.m_iCellSize - 10
+            cell = BuildImage(size + 1, size + 1, color=(255, 255, 255))
+            await cls.drawCell(cell, (0, 0, size, size), day, cls.m_pSignedColor)
+            cls.m_pSignedCells[day] = cell
+
+        return cell
+
+    @classmethod
+    def compose(cls, template, cells: list[tuple]) -> bytes:
+        """在底图副本上贴上已签到格子并编码为 PNG"""
+        image = template.markImg.copy()
+        for cell, position in cells:
+            image.paste(cell.markImg, position)
+
+        buffer = BytesIO()
+        image.save(buffer, format="PNG")
+        return buffer.getvalue()
+
+    @classmethod
+    async def drawCalendar(cls, year: int, month: int, signMask: int) -> bytes:
+        """绘制签到日历
+
+        Args:
+            year (int): 年
+            month (int): 月
+            signMask (int): 签到位图，第 n 位为 1 表示 n + 1 日已签到
+
+        Returns:
+            bytes: 签到日历 PNG
+        """
+        key = (f"{year:04d}-{month:02d}", signMask)
+        image = cls.m_pImages.get(key)
+        if image is not None:
+            cls.m_pImages.move_to_end(key)
+            return image
+
+        template = await cls.getTemplate(year, month)
+
+        firstWeekday, totalDays = calendar.monthrange(year, month)
+        cells = []
+        for day in range(1, totalDays + 1):
+            if signMask >> (day - 1) & 1:
+                box = cls.cellBox(firstWeekday, day)
+                cells.append((await cls.getSignedCell(day), (box[0], box[1])))
+
+        try:
+            image = await asyncio.to_thread(cls.compose, template, cells)
+        except Exception as e:
+            logger.warning("绘制签到日历失败", e=e)
+            return b""
+
+        cls.m_pImages[key] = image
+        while len(cls.m_pImages) > cls.m_iImageCacheSize:
+            cls.m_pImages.popitem(last=False)
+
+        return image
+
+
+g_pSignCalendarManager = CSignCalendarManager()
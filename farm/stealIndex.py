@@ -0,0 +1,218 @@
+import heapq
+import random
+
+from nonebot_plugin_uninfo import Uninfo
+
+from zhenxun.services.log import logger
+
+from ..dbService import g_pDBService
+from ..event.event import g_pEventManager
+from ..tool import g_pToolManager
+
+
+class CStealIndexManager:
+    """群内可偷地块索引
+
+    每个群维护两部分：未成熟地块按成熟时间组成的最小堆，以及已成熟地块列表。
+    随机偷菜时先把堆顶已到成熟时间的地块移入成熟列表（每块 O(log n)），
+    再从成熟列表中不放回地随机抽取，无需逐个扫描群内农场。
+    作物被偷完后立即移出成熟列表；
+    地块变化时不在堆中查找删除，出堆时与当前地块数据比对，过期条目直接丢弃
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        # uid -> {soilIndex: matureTime}，只包含已种植且未枯萎的地块
+        self.m_pSoils: dict[str, dict[int, int]] = {}
+        # (uid, soilIndex) -> 本轮作物已偷过的用户
+        self.m_pStealers: dict[tuple[str, int], set[str]] = {}
+
+        self.m_pGroupUsers: dict[str, set[str]] = {}
+        self.m_pUserGroups: dict[str, set[str]] = {}
+        # (uid, groupId) -> 已记录的响应Bot
+        self.m_pUserBots: dict[tuple[str, str], str] = {}
+
+        # 群 -> [(matureTime, uid, soilIndex)] 未成熟地块最小堆
+        self.m_pPending: dict[str, list[tuple[int, str, int]]] = {}
+        # 群 -> [(uid, soilIndex)] 已成熟地块，配合位置表实现 O(1) 删除
+        self.m_pRipe: dict[str, list[tuple[str, int]]] = {}
+        self.m_pRipePos: dict[str, dict[tuple[str, int], int]] = {}
+
+    async def load(self) -> bool:
+        """从数据库构建索引，启动时调用"""
+        self.clear()
+
+        soils = await g_pDBService.userSoil.getGrowingSoils()
+        for uid, soilIndex, matureTime in soils:
+            self.m_pSoils.setdefault(uid, {})[soilIndex] = matureTime
+
+        stealers = await g_pDBService.userSteal.getAllStealers()
+        for uid, soilIndex, stealerUid in stealers:
+            if soilIndex in self.m_pSoils.get(uid, {}):
+                self.m_pStealers.setdefault((uid, soilIndex), set()).add(stealerUid)
+
+        for uid, groupId, botId in await g_pDBService.userGroup.getAllUserGroups():
+            self._addUserToGroup(uid, groupId)
+            self.m_pUserBots[(uid, groupId)] = botId
+
+        logger.debug(
+            f"偷菜索引加载完成，群{len(self.m_pGroupUsers)}个，"
+            f"地块{sum(len(soils) for soils in self.m_pSoils.values())}块"
+        )
+        return True
+
+    def _addUserToGroup(self, uid: str, groupId: str):
+        self.m_pGroupUsers.setdefault(groupId, set()).add(uid)
+        self.m_pUserGroups.setdefault(uid, set()).add(groupId)
+
+        pending = self.m_pPending.setdefault(groupId, [])
+        for soilIndex, matureTime in self.m_pSoils.get(uid, {}).items():
+            heapq.heappush(pending, (matureTime, uid, soilIndex))
+
+    def _removeRipe(self, groupId: str, key: tuple[str, int]):
+        positions = self.m_pRipePos.get(groupId)
+        if not positions or key not in positions:
+            return
+
+        ripe = self.m_pRipe[groupId]
+        index = positions.pop(key)
+        last = ripe.pop()
+        if index < len(ripe):
+            ripe[index] = last
+            positions[last] = index
+
+    def _promote(self, groupId: str, now: int):
+        """将堆顶已到成熟时间的地块移入成熟列表"""
+        pending = self.m_pPending.get(groupId)
+        if not pending:
+            return
+
+        ripe = self.m_pRipe.setdefault(groupId, [])
+        positions = self.m_pRipePos.setdefault(groupId, {})
+        while pending and pending[0][0] <= now:
+            matureTime, uid, soilIndex = heapq.heappop(pending)
+
+            key = (uid, soilIndex)
+            if self.m_pSoils.get(uid, {}).get(soilIndex) != matureTime:
+                continue
+
+            if key not in positions:
+                positions[key] = len(ripe)
+                ripe.append(key)
+
+    async def joinGroup(self, uid: str, groupId: str, botId: str = ""):
+        """记录用户所在的群与响应的Bot，随机偷菜只会在同群用户中挑选"""
+        key = (uid, groupId)
+        if groupId in self.m_pUserGroups.get(uid, ()):
+            if not botId or self.m_pUserBots.get(key) == botId:
+                return
+        else:
+            self._addUserToGroup(uid, groupId)
+
+        if botId:
+            self.m_pUserBots[key] = botId
+        await g_pDBService.userGroup.addUserGroup(uid, groupId, botId)
+
+    async def recordSession(self, session: Uninfo, uid: str):
+        """记录指令所在的群及响应的Bot，私聊时忽略"""
+        if session.scene.is_group:
+            await self.joinGroup(uid, str(session.scene.id), str(session.self_id))
+
+    def setSoil(self, uid: str, soilIndex: int, matureTime: int | None):
+        """更新地块的成熟时间
+
+        Args:
+            uid (str): 用户Uid
+            soilIndex (int): 地块索引
+            matureTime (int | None): 成熟时间，地块为空或已枯萎时为 None
+        """
+        key = (uid, soilIndex)
+        soils = self.m_pSoils.setdefault(uid, {})
+        if soils.get(soilIndex) == matureTime:
+            return
+
+        # 新一轮作物，之前的偷菜者可以再次偷取
+        self.m_pStealers.pop(key, None)
+
+        if matureTime is None:
+            soils.pop(soilIndex, None)
+        else:
+            soils[soilIndex] = matureTime
+
+        for groupId in self.m_pUserGroups.get(uid, ()):
+            self._removeRipe(groupId, key)
+            if matureTime is not None:
+                heapq.heappush(
+                    self.m_pPending.setdefault(groupId, []),
+                    (matureTime, uid, soilIndex),
+                )
+
+    def pickTarget(self, groupId: str, stealerUid: str) -> str | None:
+        """从群内已成熟且未被自己偷过的地块中随机挑选偷菜目标
+
+        Args:
+            groupId (str): 群号
+            stealerUid (str): 偷菜用户Uid
+
+        Returns:
+            str | None: 被偷用户Uid，没有可偷的地块时返回 None
+        """
+        now = int(g_pToolManager.dateTime().now().timestamp())
+        self._promote(groupId, now)
+
+        ripe = self.m_pRipe.get(groupId)
+        if not ripe:
+            return None
+
+        # 在列表内原地洗牌实现不放回抽样，成熟列表的顺序本身没有意义，
+        # 只要群内存在可偷的地块就一定能选中
+        positions = self.m_pRipePos[groupId]
+        for i in range(len(ripe)):
+            j = random.randrange(i, len(ripe))
+            if i != j:
+                ripe[i], ripe[j] = ripe[j], ripe[i]
+                positions[ripe[i]] = i
+                positions[ripe[j]] = j
+
+            uid, soilIndex = ripe[i]
+            if uid == stealerUid or stealerUid in self.m_pStealers.get(
+                (uid, soilIndex), ()
+            ):
+                continue
+
+            return uid
+
+        return None
+
+    async def onSoilChange(self, uid: str, soilIndex: int):
+        soilInfo = await g_pDBService.userSoil.getUserSoil(uid, soilIndex)
+
+        matureTime = None
+        if soilInfo and soilInfo.plantName and not soilInfo.isWilted:
+            matureTime = int(soilInfo.matureTime)
+
+        self.setSoil(uid, soilIndex, matureTime)
+
+    def onSteal(self, uid: str, target: str, soilIndex: int, num: int, remain: int):
+        key = (target, soilIndex)
+        soils = self.m_pSoils.get(target, {})
+        if soilIndex not in soils:
+            return
+
+        if remain > 0:
+            self.m_pStealers.setdefault(key, set()).add(uid)
+            return
+
+        # 作物已被偷完，不再作为随机偷菜的目标，之后的枯萎或再生由 setSoil 处理
+        soils.pop(soilIndex)
+        self.m_pStealers.pop(key, None)
+        for groupId in self.m_pUserGroups.get(target, ()):
+            self._removeRipe(groupId, key)
+
+
+g_pStealIndexManager = CStealIndexManager()
+
+g_pEventManager.m_afterSoilChange.connect(g_pStealIndexManager.onSoilChange)
+g_pEventManager.m_afterSteal.connect(g_pStealIndexManager.onSteal)
@@ -1,17 +1,34 @@
+import asyncio
 import json
+import os
 
 from zhenxun.services.log import logger
 
 from . import config
+from .event.event import g_pEventManager
+from .jsonModel import (
+    CItemConfig,
+    CLevelConfig,
+    ConfigError,
+    CSignConfig,
+    CSoilConfig,
+)
 from .request import g_pRequestManager
 
 
 class CJsonManager:
+    # 配置文件变更检查间隔（秒）
+    m_fWatchInterval = 5.0
+
     def __init__(self):
-        self.m_pItem = {}
-        self.m_pLevel = {}
-        self.m_pSoil = {}
-        self.m_pSign = {}
+        self.m_pItem: CItemConfig | None = None
+        self.m_pLevel: CLevelConfig | None = None
+        self.m_pSoil: CSoilConfig | None = None
+        self.m_pSign: CSignConfig | None = None
+
+        # 配置文件路径 -> 加载时的 (mtime_ns, size)
+        self.m_pStat: dict[str, tuple[int, int]] = {}
+        self.m_pWatchTask: asyncio.Task | None = None
 
     async def init(self) -> bool:
         if not await self.initItem():
@@ -23,83 +40,156 @@ class CJsonManager:
         if not await self.initSoil():
             return False
 
-        return await self.initSignInFile()
+        # 启动时只读取本地签到文件，签到文件的检查更新放到后台进行
+        config.g_bSignStatus = await self.initSign()
 
-    async def initItem(self) -> bool:
-        try:
-            with open(
-                config.g_sConfigPath / "item.json",
-                encoding="utf-8",
-            ) as file:
-                self.m_pItem = json.load(file)
+        return True
 
-                return True
-        except FileNotFoundError:
-            logger.warning("item.json 打开失败")
-            return False
-        except json.JSONDecodeError as e:
-            logger.warning(f"item.json JSON格式错误: {e}")
-            return False
+    def load(self, path, model):
+        """读取配置文件并编译为对应的配置结构
 
-    async def initLevel(self) -> bool:
+        Args:
+            path: 配置文件路径
+            model: 配置结构类型
+
+        Returns:
+            编译后的配置，文件缺失或格式错误时返回 None
+        """
         try:
-            with open(
-                config.g_sConfigPath / "level.json",
-                encoding="utf-8",
-            ) as file:
-                self.m_pLevel = json.load(file)
+            stat = os.stat(path)
+            with open(path, encoding="utf-8") as file:
+                result = model(json.load(file))
 
-                return True
+            self.m_pStat[str(path)] = (stat.st_mtime_ns, stat.st_size)
+            return result
         except FileNotFoundError:
-            logger.warning("level.json 打开失败")
-            return False
+            logger.warning(f"{path.name} 打开失败")
         except json.JSONDecodeError as e:
-            logger.warning(f"level.json JSON格式错误: {e}")
+            logger.warning(f"{path.name} JSON格式错误: {e}")
+        except ConfigError as e:
+            logger.warning(f"{path.name} 配置校验失败: {e}")
+
+        return None
+
+    async def initItem(self) -> bool:
+        item = self.load(config.g_sConfigPath / "item.json", CItemConfig)
+        if item is None:
             return False
 
-    async def initSoil(self) -> bool:
-        try:
-            with open(
-                config.g_sConfigPath / "soil.json",
-                encoding="utf-8",
-            ) as file:
-                self.m_pSoil = json.load(file)
+        self.m_pItem = item
+        return True
 
-                return True
-        except FileNotFoundError:
-            logger.warning("soil.json 打开失败")
+    async def initLevel(self) -> bool:
+        level = self.load(config.g_sConfigPath / "level.json", CLevelConfig)
+        if level is None:
             return False
-        except json.JSONDecodeError as e:
-            logger.warning(f"soil.json JSON格式错误: {e}")
+
+        self.m_pLevel = level
+        return True
+
+    async def initSoil(self) -> bool:
+        soil = self.load(config.g_sConfigPath / "soil.json", CSoilConfig)
+        if soil is None:
             return False
 
+        self.m_pSoil = soil
+        return True
+
     async def initSignInFile(self) -> bool:
-        if not await g_pRequestManager.initSignInFile():
-            config.g_bSignStatus = False
+        if await g_pRequestManager.initSignInFile() and await self.reload("sign"):
+            return True
 
-            return False
-        else:
-            result = await self.initSign()
+        # 更新失败时若已有可用的签到文件则继续使用
+        if self.m_pSign:
+            return config.g_bSignStatus
 
-            config.g_bSignStatus = result
+        config.g_bSignStatus = False
 
-            return result
+        return False
 
     async def initSign(self) -> bool:
-        try:
-            with open(
-                config.g_sSignInPath,
-                encoding="utf-8",
-            ) as file:
-                self.m_pSign = json.load(file)
-
-                return True
-        except FileNotFoundError:
-            logger.warning("sign_in.json 打开失败")
+        sign = self.load(config.g_sSignInPath, CSignConfig)
+        if sign is None:
             return False
-        except json.JSONDecodeError as e:
-            logger.warning(f"sign_in.json JSON格式错误: {e}")
+
+        self.m_pSign = sign
+        return True
+
+    def watchFiles(self) -> dict:
+        """参与热重载的配置文件 名称 -> (路径, 配置结构, 属性名)"""
+        return {
+            "item": (config.g_sConfigPath / "item.json", CItemConfig, "m_pItem"),
+            "level": (config.g_sConfigPath / "level.json", CLevelConfig, "m_pLevel"),
+            "soil": (config.g_sConfigPath / "soil.json", CSoilConfig, "m_pSoil"),
+            "sign": (config.g_sSignInPath, CSignConfig, "m_pSign"),
+        }
+
+    def changedFiles(self) -> list[str]:
+        """对比加载时记录的 mtime 与大小，返回发生变化的配置名称"""
+        changed = []
+        for name, (path, _, _) in self.watchFiles().items():
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+
+            if self.m_pStat.get(str(path)) != (stat.st_mtime_ns, stat.st_size):
+                changed.append(name)
+
+        return changed
+
+    async def reload(self, name: str) -> bool:
+        """重新解析并校验配置文件，校验通过后整体替换配置对象
+
+        校验失败时保留旧配置继续使用
+
+        Args:
+            name (str): 配置名称 item/level/soil/sign
+
+        Returns:
+            bool: 是否替换成功
+        """
+        path, model, attr = self.watchFiles()[name]
+
+        result = await asyncio.to_thread(self.load, path, model)
+        if result is None:
+            # 记录本次文件状态，避免对同一个错误文件反复报错
+            try:
+                stat = os.stat(path)
+                self.m_pStat[str(path)] = (stat.st_mtime_ns, stat.st_size)
+            except FileNotFoundError:
+                pass
+
+            logger.warning(f"{path.name} 重载失败，继续使用旧配置")
             return False
 
+        setattr(self, attr, result)
+        if name == "sign":
+            config.g_bSignStatus = True
+
+        logger.info(f"{path.name} 已重新加载")
+        await g_pEventManager.m_afterConfigReload.emit(name=name, config=result)
+        return True
+
+    async def watch(self):
+        """后台轮询配置文件变更并热重载"""
+        while True:
+            await asyncio.sleep(self.m_fWatchInterval)
+
+            try:
+                for name in await asyncio.to_thread(self.changedFiles):
+                    await self.reload(name)
+            except Exception as e:
+                logger.warning("配置文件热重载检查出错", e=e)
+
+    def startWatch(self):
+        if self.m_pWatchTask is None or self.m_pWatchTask.done():
+            self.m_pWatchTask = asyncio.create_task(self.watch())
+
+    def stopWatch(self):
+        if self.m_pWatchTask is not None:
+            self.m_pWatchTask.cancel()
+            self.m_pWatchTask = None
+
 
 g_pJsonManager = CJsonManager()
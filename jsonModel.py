@@ -0,0 +1,251 @@
+from typing import NamedTuple
+
+
+class ConfigError(ValueError):
+    """配置文件结构校验失败"""
+
+
+class SoilPos(NamedTuple):
+    x: int
+    y: int
+
+
+class CostRule(NamedTuple):
+    """开垦/土地升级所需条件"""
+
+    level: int
+    point: int
+    vipPoint: int
+    item: dict[str, int]
+
+
+class SignReward(NamedTuple):
+    """累计签到奖励"""
+
+    point: int
+    exp: int
+    vipPoint: int
+    plant: dict[str, int]
+
+
+def _require(data: dict, key: str, kind, name: str):
+    value = data.get(key) if isinstance(data, dict) else None
+
+    # bool 是 int 的子类，需要单独排除
+    if not isinstance(value, kind) or (kind is int and isinstance(value, bool)):
+        raise ConfigError(f"{name} 缺少字段或类型错误: {key}")
+
+    return value
+
+
+def _number(data: dict, key: str, name: str, default: int | None = None) -> int:
+    if default is not None and key not in data:
+        return default
+
+    value = _require(data, key, (int, float), name)
+    if value < 0:
+        raise ConfigError(f"{name} 字段不能为负数: {key}")
+
+    return int(value)
+
+
+def _version(data: dict, name: str) -> float:
+    if not isinstance(data, dict):
+        raise ConfigError(f"{name} 格式错误")
+
+    try:
+        return float(data.get("version", 0))
+    except (TypeError, ValueError):
+        raise ConfigError(f"{name} version 字段格式错误") from None
+
+
+def _itemDict(value, name: str) -> dict[str, int]:
+    """道具条件兼容 [] 与 {道具名: 数量} 两种写法"""
+    if value is None or value == []:
+        return {}
+
+    if not isinstance(value, dict) or not all(
+        isinstance(k, str) and isinstance(v, int) for k, v in value.items()
+    ):
+        raise ConfigError(f"{name} item 字段格式错误")
+
+    return dict(value)
+
+
+def _costRule(data: dict, name: str) -> CostRule:
+    if not isinstance(data, dict):
+        raise ConfigError(f"{name} 格式错误")
+
+    return CostRule(
+        level=_number(data, "level", name),
+        point=_number(data, "point", name),
+        vipPoint=_number(data, "vipPoint", name, 0),
+        item=_itemDict(data.get("item"), name),
+    )
+
+
+class CSoilConfig:
+    """soil.json 编译结果
+
+    m_pPos[i] 为第 i + 1 块土地的坐标，m_pUpgrade[土地等级][已有数量] 为升级条件
+    """
+
+    # 土地等级与 soil.json 中升级表名称的对应关系
+    m_pUpgradeKeys = (None, "red", "black", "gold")
+
+    def __init__(self, data: dict, soilCount: int = 30):
+        name = "soil.json"
+
+        self.m_fVersion = _version(data, name)
+
+        size = _require(data, "size", list, name)
+        if len(size) != 2 or not all(isinstance(v, int) and v > 0 for v in size):
+            raise ConfigError(f"{name} size 应为 [宽, 高]")
+        self.m_pSize: tuple[int, int] = (size[0], size[1])
+
+        soil = _require(data, "soil", dict, name)
+        positions = []
+        for index in range(1, soilCount + 1):
+            pos = soil.get(str(index))
+            if not isinstance(pos, dict):
+                raise ConfigError(f"{name} 缺少第{index}块土地坐标")
+
+            positions.append(
+                SoilPos(_number(pos, "x", name), _number(pos, "y", name))
+            )
+        self.m_pPos: tuple[SoilPos, ...] = tuple(positions)
+
+        upgrade = _require(data, "upgrade", dict, name)
+        tables: list[tuple[CostRule, ...]] = [()]
+        for key in self.m_pUpgradeKeys[1:]:
+            rules = upgrade.get(key, [])
+            if not isinstance(rules, list):
+                raise ConfigError(f"{name} upgrade.{key} 应为数组")
+
+            tables.append(
+                tuple(
+                    _costRule(rule, f"{name} upgrade.{key}[{i}]")
+                    for i, rule in enumerate(rules)
+                )
+            )
+        self.m_pUpgrade: tuple[tuple[CostRule, ...], ...] = tuple(tables)
+
+    def levelKey(self, soilLevel: int) -> str:
+        """土地等级对应的英文名称，与升级表及文本配置的键一致"""
+        if 0 < soilLevel < len(self.m_pUpgradeKeys):
+            return self.m_pUpgradeKeys[soilLevel]  # type: ignore
+
+        return "default"
+
+    def upgradeRule(self, soilLevel: int, count: int) -> CostRule | None:
+        """获取升级到指定土地等级的条件
+
+        Args:
+            soilLevel (int): 目标土地等级
+            count (int): 用户已拥有该等级土地的数量
+
+        Returns:
+            CostRule | None: 没有对应配置时返回 None
+        """
+        if not 0 < soilLevel < len(self.m_pUpgrade):
+            return None
+
+        rules = self.m_pUpgrade[soilLevel]
+        return rules[count] if 0 <= count < len(rules) else None
+
+
+class CLevelConfig:
+    """level.json 编译结果
+
+    m_pReclamation[n] 为开垦第 n 块土地的条件，初始土地对应位置为 None
+    """
+
+    def __init__(self, data: dict, soilCount: int = 30):
+        name = "level.json"
+
+        soil = _require(data, "soil", list, name)
+        if not all(isinstance(v, int) for v in soil):
+            raise ConfigError(f"{name} soil 应为整数数组")
+        self.m_pSoil: tuple[int, ...] = tuple(soil)
+
+        reclamation = _require(data, "reclamation", dict, name)
+        rules: list[CostRule | None] = [None] * (soilCount + 1)
+        for key, rule in reclamation.items():
+            if not key.isdigit() or not 0 < int(key) <= soilCount:
+                raise ConfigError(f"{name} reclamation 土地编号非法: {key}")
+
+            rules[int(key)] = _costRule(rule, f"{name} reclamation.{key}")
+        self.m_pReclamation: tuple[CostRule | None, ...] = tuple(rules)
+
+    def reclamationRule(self, soilIndex: int) -> CostRule | None:
+        """获取开垦第 soilIndex 块土地的条件"""
+        if 0 <= soilIndex < len(self.m_pReclamation):
+            return self.m_pReclamation[soilIndex]
+
+        return None
+
+
+class CItemConfig:
+    """item.json 编译结果"""
+
+    def __init__(self, data: dict):
+        name = "item.json"
+
+        items = _require(data, "item", dict, name)
+        for key, item in items.items():
+            _require(item, "name", str, f"{name} item.{key}")
+            _number(item, "price", f"{name} item.{key}")
+
+        self.m_pItem: dict[str, dict] = items
+        # 道具中文名 -> 道具key
+        self.m_pNameIndex: dict[str, str] = {
+            item["name"]: key for key, item in items.items()
+        }
+
+
+class CSignConfig:
+    """sign_in.json 编译结果
+
+    m_pReward[n] 为当月累计签到 n 天的奖励，没有奖励的天数为 None
+    """
+
+    m_iMaxDay = 31
+
+    def __init__(self, data: dict):
+        name = "sign_in.json"
+
+        self.m_iExpMax = _number(data, "exp_max", name, 50)
+        self.m_iExpMin = _number(data, "exp_min", name, 5)
+        self.m_iPointMax = _number(data, "point_max", name, 2000)
+        self.m_iPointMin = _number(data, "point_min", name, 200)
+
+        if self.m_iExpMin > self.m_iExpMax or self.m_iPointMin > self.m_iPointMax:
+            raise ConfigError(f"{name} 奖励区间下限大于上限")
+
+        continuou = data.get("continuou", {})
+        if not isinstance(continuou, dict):
+            raise ConfigError(f"{name} continuou 格式错误")
+
+        rewards: list[SignReward | None] = [None] * (self.m_iMaxDay + 1)
+        for key, reward in continuou.items():
+            if not key.isdigit() or not 0 < int(key) <= self.m_iMaxDay:
+                raise ConfigError(f"{name} continuou 天数非法: {key}")
+
+            rewardName = f"{name} continuou.{key}"
+            if not isinstance(reward, dict):
+                raise ConfigError(f"{rewardName} 格式错误")
+
+            rewards[int(key)] = SignReward(
+                point=_number(reward, "point", rewardName, 0),
+                exp=_number(reward, "exp", rewardName, 0),
+                vipPoint=_number(reward, "vipPoint", rewardName, 0),
+                plant=_itemDict(reward.get("plant"), rewardName),
+            )
+        self.m_pReward: tuple[SignReward | None, ...] = tuple(rewards)
+
+    def reward(self, day: int) -> SignReward | None:
+        """获取当月累计签到 day 天的奖励"""
+        if 0 <= day < len(self.m_pReward):
+            return self.m_pReward[day]
+
+        return None
@@ -0,0 +1,226 @@
+import asyncio
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from zhenxun.configs.config import Config
+from zhenxun.services.log import logger
+
+from .config import g_sManifestDirs, g_sManifestPath, g_sResourcePath
+from .request import g_pRequestManager
+
+
+class CManifestManager:
+    """资源清单同步
+
+    服务端在 plant.db 同目录提供 manifest.json，格式为:
+        {"version": 版本号, "files": {"plant/胡萝卜/1.png": {"size": 字节数, "sha256": "..."}}}
+    path 为相对 resource 目录的路径，统一使用 / 分隔
+
+    本地缓存同格式的清单，并额外记录文件的 mtime，
+    只有清单变更或本地文件被改动过的条目才会重新校验或下载
+    """
+
+    @classmethod
+    def loadLocal(cls) -> dict:
+        """读取本地清单缓存
+
+        Returns:
+            dict: 本地清单，读取失败返回空清单
+        """
+        try:
+            with open(g_sManifestPath, encoding="utf-8") as f:
+                manifest = json.load(f)
+
+            if isinstance(manifest.get("files"), dict):
+                return manifest
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"读取本地资源清单失败: {e}")
+
+        return {"version": 0, "files": {}}
+
+    @classmethod
+    def saveLocal(cls, manifest: dict) -> bool:
+        """原子写入本地清单缓存
+
+        Args:
+            manifest (dict): 清单内容
+
+        Returns:
+            bool: 是否写入成功
+        """
+        tempPath = f"{g_sManifestPath}.tmp"
+        try:
+            os.makedirs(os.path.dirname(g_sManifestPath), exist_ok=True)
+            with open(tempPath, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, ensure_ascii=False)
+
+            os.replace(tempPath, g_sManifestPath)
+            return True
+        except Exception as e:
+            logger.warning(f"写入本地资源清单失败: {e}")
+            return False
+
+    @classmethod
+    async def fetchRemote(cls) -> dict:
+        """获取服务端资源清单
+
+        Returns:
+            dict: 服务端清单，获取失败返回空字典
+        """
+        manifest = await g_pRequestManager.get("file/manifest.json", name="资源清单")
+
+        if not isinstance(manifest.get("files"), dict):
+            return {}
+
+        return manifest
+
+    @classmethod
+    def isSafePath(cls, path: str) -> bool:
+        """判断清单路径是否合法，仅允许同步目录下的相对路径"""
+        if not path or path.startswith("/") or "\\" in path:
+            return False
+
+        parts = path.split("/")
+        if any(part in ("", ".", "..") for part in parts):
+            return False
+
+        return len(parts) >= 2 and parts[0] in g_sManifestDirs
+
+    @classmethod
+    def fileUrl(cls, path: str) -> str:
+        """根据清单路径获取下载地址
+
+        作物资源沿用 /file/<作物名>/<文件名> 的地址格式，其余资源为 /file/<path>
+        """
+        baseUrl = Config.get_config("zhenxun_plugin_farm", "服务地址")
+        baseUrl = baseUrl.rstrip("/") + ":8998/file"
+
+        if path.startswith("plant/"):
+            return f"{baseUrl}/{path[len('plant/') :]}"
+
+        return f"{baseUrl}/{path}"
+
+    @classmethod
+    def fileSha256(cls, path: Path) -> str:
+        hasher = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(65536), b""):
+                hasher.update(chunk)
+
+        return hasher.hexdigest()
+
+    @classmethod
+    def diff(cls, remoteFiles: dict, cachedFiles: dict) -> tuple[dict, list]:
+        """对比服务端清单与本地文件
+
+        Args:
+            remoteFiles (dict): 服务端清单 files 字段
+            cachedFiles (dict): 本地清单缓存 files 字段
+
+        Returns:
+            tuple[dict, list]: (已是最新的文件清单, 需要下载的清单路径列表)
+        """
+        verified = {}
+        stale = []
+
+        for path, entry in remoteFiles.items():
+            if not cls.isSafePath(path) or not isinstance(entry, dict):
+                logger.warning(f"资源清单条目非法，已跳过: {path}")
+                continue
+
+            size = entry.get("size")
+            sha256 = entry.get("sha256")
+            if not isinstance(size, int) or not isinstance(sha256, str):
+                logger.warning(f"资源清单条目缺少 size/sha256，已跳过: {path}")
+                continue
+
+            fullPath = g_sResourcePath.joinpath(*path.split("/"))
+            try:
+                stat = fullPath.stat()
+            except FileNotFoundError:
+                stale.append(path)
+                continue
+
+            if stat.st_size != size:
+                stale.append(path)
+                continue
+
+            cached = cachedFiles.get(path, {})
+            if (
+                cached.get("sha256") == sha256
+                and cached.get("size") == size
+                and cached.get("mtime") == stat.st_mtime_ns
+            ):
+                verified[path] = cached
+                continue
+
+            # 本地清单中没有记录或文件被改动过，重新计算哈希
+            if cls.fileSha256(fullPath) == sha256:
+                verified[path] = {
+                    "size": size,
+                    "sha256": sha256,
+                    "mtime": stat.st_mtime_ns,
+                }
+            else:
+                stale.append(path)
+
+        return verified, stale
+
+    @classmethod
+    async def sync(cls) -> dict | None:
+        """按服务端清单增量同步 plant、soil、background 资源
+
+        Returns:
+            dict | None: 下载报告，服务端未提供清单时返回 None
+        """
+        remote = await cls.fetchRemote()
+        if not remote:
+            return None
+
+        remoteFiles = remote["files"]
+        cachedFiles = cls.loadLocal()["files"]
+
+        verified, stale = await asyncio.to_thread(cls.diff, remoteFiles, cachedFiles)
+
+        tasks = []
+        for path in stale:
+            fullPath = g_sResourcePath.joinpath(*path.split("/"))
+            tasks.append(
+                (
+                    cls.fileUrl(path),
+                    str(fullPath.parent),
+                    fullPath.name,
+                    remoteFiles[path]["sha256"],
+                )
+            )
+
+        report = await g_pRequestManager.downloadFiles(tasks, name="资源文件")
+
+        failed = {item["path"] for item in report["failed"]}
+        for path in stale:
+            fullPath = g_sResourcePath.joinpath(*path.split("/"))
+            if str(fullPath) in failed:
+                continue
+
+            try:
+                verified[path] = {
+                    "size": remoteFiles[path]["size"],
+                    "sha256": remoteFiles[path]["sha256"],
+                    "mtime": fullPath.stat().st_mtime_ns,
+                }
+            except FileNotFoundError:
+                continue
+
+        cls.saveLocal({"version": remote.get("version", 0), "files": verified})
+
+        logger.debug(
+            f"资源清单同步完毕，已校验{len(verified)}个，更新{report['success']}个"
+        )
+        return report
+
+
+g_pManifestManager = CManifestManager()
@@ -1,26 +1,176 @@
+import asyncio
+from contextlib import ExitStack
+import hashlib
 import json
 import os
+import time
+from typing import TYPE_CHECKING
+from urllib.parse import urlsplit
 
-import httpx
-from rich.progress import (
-    BarColumn,
-    DownloadColumn,
-    Progress,
-    TextColumn,
-    TimeRemainingColumn,
-    TransferSpeedColumn,
-)
 from zhenxun.configs.config import Config
 from zhenxun.services.log import logger
 
-from .config import g_sPlantPath, g_sSignInPath
+from .config import g_sHttpCachePath, g_sPlantPath, g_sSignInPath
 from .dbService import g_pDBService
 from .tool import g_pToolManager
 
+# httpx 与 rich.progress 只在访问服务端时才需要，首次使用时再导入以减少插件导入耗时
+if TYPE_CHECKING:
+    import httpx
+
+
+class CCircuitBreaker:
+    """单个服务接口的熔断器
+
+    closed: 正常请求，连续失败达到阈值后进入 open
+    open: 直接拒绝请求，冷却时间过后进入 halfOpen
+    halfOpen: 只放行一次试探请求，成功则恢复 closed，失败则重新 open
+    """
+
+    def __init__(self, failureThreshold: int = 3, recoveryTimeout: float = 60.0):
+        self.m_iFailureThreshold = failureThreshold
+        self.m_fRecoveryTimeout = recoveryTimeout
+        self.m_sState = "closed"
+        self.m_iFailures = 0
+        self.m_fOpenedAt = 0.0
+        self.m_bTrialRunning = False
+
+    def allow(self) -> tuple[bool, bool]:
+        """当前是否允许发起请求
+
+        Returns:
+            tuple[bool, bool]: (是否允许, 是否占用了试探名额)，
+            占用试探名额的调用负责记录结果或释放名额
+        """
+        if self.m_sState == "closed":
+            return True, False
+
+        if self.m_sState == "open":
+            if time.monotonic() - self.m_fOpenedAt < self.m_fRecoveryTimeout:
+                return False, False
+
+            self.m_sState = "halfOpen"
+
+        # halfOpen 同一时间只放行一个试探请求
+        if self.m_bTrialRunning:
+            return False, False
+
+        self.m_bTrialRunning = True
+        return True, True
+
+    def releaseTrial(self):
+        """结束试探请求，请求未记录结果（如被取消）时避免一直占用试探名额"""
+        self.m_bTrialRunning = False
+
+    def recordSuccess(self, trial: bool):
+        """记录请求成功，halfOpen 状态只由试探请求恢复 closed
+
+        Args:
+            trial (bool): 是否为试探请求
+        """
+        if trial:
+            self.m_bTrialRunning = False
+        elif self.m_sState != "closed":
+            return
+
+        self.m_sState = "closed"
+        self.m_iFailures = 0
+
+    def recordFailure(self, trial: bool):
+        """记录请求失败，熔断期间放行前发出的请求失败不重复计数
+
+        Args:
+            trial (bool): 是否为试探请求
+        """
+        if trial:
+            self.m_bTrialRunning = False
+        elif self.m_sState != "closed":
+            return
+
+        self.m_iFailures += 1
+        if trial or self.m_iFailures >= self.m_iFailureThreshold:
+            self.m_sState = "open"
+            self.m_fOpenedAt = time.monotonic()
+
 
 class CRequestManager:
     m_sTokens = "xZ%?z5LtWV7H:0-Xnwp+bNRNQ-jbfrxG"
 
+    # 批量下载默认并发数
+    m_iDownloadConcurrency = 8
+
+    # 批量下载单个文件最大重试次数
+    m_iDownloadRetries = 3
+
+    # 批量下载重试退避基数 单位:秒
+    m_fDownloadBackoff = 0.5
+
+    # 下载读取块大小 单位:字节
+    m_iDownloadChunkSize = 64 * 1024
+
+    # 下载写盘缓冲大小 缓冲满后才在线程中写入文件 单位:字节
+    m_iDownloadWriteBuffer = 1024 * 1024
+
+    # 下载进度条最短刷新间隔 单位:秒
+    m_fProgressInterval = 0.2
+
+    # 正在执行的后台任务
+    m_pTasks: set[asyncio.Task] = set()
+
+    # GET 响应缓存默认有效期 单位:秒
+    m_fCacheTTL = 300.0
+
+    # 请求失败时允许使用旧缓存的时长 单位:秒
+    m_fStaleIfError = 7 * 24 * 3600.0
+
+    # GET 响应缓存 url -> {data, etag, lastModified, fetchedAt}
+    m_pCache: dict | None = None
+
+    # 正在进行中的合并请求
+    m_pInflight: dict[str, asyncio.Future] = {}
+
+    # 各接口熔断器 接口名 -> 熔断器
+    m_pBreakers: dict[str, CCircuitBreaker] = {}
+
+    @classmethod
+    def isOffline(cls) -> bool:
+        """是否开启离线模式，离线模式下不访问服务端，仅使用本地文件"""
+        return bool(Config.get_config("zhenxun_plugin_farm", "离线模式"))
+
+    @classmethod
+    def breaker(cls, url: str) -> CCircuitBreaker:
+        """根据请求地址获取对应接口的熔断器，以路径第一段区分接口"""
+        endpoint = urlsplit(url).path.strip("/").split("/")[0]
+
+        breaker = cls.m_pBreakers.get(endpoint)
+        if breaker is None:
+            breaker = CCircuitBreaker()
+            cls.m_pBreakers[endpoint] = breaker
+
+        return breaker
+
+    @classmethod
+    def allowRequest(cls, url: str, name: str = "") -> tuple[bool, bool]:
+        """判断是否可以向服务端发起请求
+
+        Args:
+            url (str): 请求地址
+            name (str, optional): 操作名称用于日志记录
+
+        Returns:
+            tuple[bool, bool]: (是否允许, 是否为熔断恢复的试探请求)，
+            离线模式或接口熔断时不允许
+        """
+        if cls.isOffline():
+            logger.debug(f"{name}跳过：农场处于离线模式")
+            return False, False
+
+        allowed, trial = cls.breaker(url).allow()
+        if not allowed:
+            logger.debug(f"{name}跳过：服务接口已熔断")
+
+        return allowed, trial
+
     @classmethod
     async def download(
         cls,
@@ -29,8 +179,16 @@ class CRequestManager:
         fileName: str,
         params: dict | None = None,
         jsonData: dict | None = None,
+        client: "httpx.AsyncClient | None" = None,
+        showProgress: bool = True,
+        sha256: str | None = None,
+        chunkSize: int | None = None,
+        resume: bool = True,
     ) -> bool:
-        """下载文件到指定路径并覆盖已存在的文件
+        """流式下载文件到指定路径并原子覆盖已存在的文件
+
+        数据先写入同目录的 .part 文件，完成后 fsync 并原子重命名。
+        下载中断时保留 .part 文件，下次通过 HTTP Range 续传
 
         Args:
             url (str): 文件的下载链接
@@ -38,56 +196,352 @@ class CRequestManager:
             fileName (str): 保存后的文件名
             params (dict | None): 可选的 URL 查询参数
             jsonData (dict | None): 可选的 JSON 请求体
+            client (httpx.AsyncClient | None): 复用的客户端，不传则临时创建
+            showProgress (bool): 是否显示单文件下载进度条
+            sha256 (str | None): 期望的文件sha256，传入时校验不通过视为失败
+            chunkSize (int | None): 读取块大小，不传使用默认值
+            resume (bool): 是否允许断点续传
 
         Returns:
             bool: 是否下载成功
         """
-        headers = {"token": cls.m_sTokens}
+        options = {
+            "params": params,
+            "jsonData": jsonData,
+            "showProgress": showProgress,
+            "sha256": sha256,
+            "chunkSize": chunkSize or cls.m_iDownloadChunkSize,
+            "resume": resume,
+        }
+
+        allowed, trial = cls.allowRequest(url, f"下载{fileName}")
+        if not allowed:
+            return False
+
+        import httpx
 
+        breaker = cls.breaker(url)
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                requestArgs: dict = {"headers": headers}
-                if params:
-                    requestArgs["params"] = params
-                if jsonData:
-                    requestArgs["json"] = jsonData
-
-                response = await client.request(
-                    "GET", url, **requestArgs, follow_redirects=True
+            if client is None:
+                async with httpx.AsyncClient(timeout=30.0) as newClient:
+                    result = await cls._download(
+                        newClient, url, savePath, fileName, **options
+                    )
+            else:
+                result = await cls._download(client, url, savePath, fileName, **options)
+
+            # 校验失败、HTTP 4xx 等不代表服务不可用，不影响熔断状态
+            if result:
+                breaker.recordSuccess(trial)
+            return result
+        except httpx.RequestError as e:
+            breaker.recordFailure(trial)
+            logger.warning(f"下载文件异常: {e}")
+            return False
+        except Exception as e:
+            # 写盘等本地错误与服务端无关，不影响熔断状态
+            logger.warning(f"下载文件异常: {e}")
+            return False
+        finally:
+            if trial:
+                breaker.releaseTrial()
+
+    @classmethod
+    def _readPartMeta(cls, metaPath: str, url: str) -> str:
+        """读取 .part 文件对应的校验标识，地址不一致时视为无效
+
+        Returns:
+            str: ETag 或 Last-Modified，无法续传时返回空字符串
+        """
+        try:
+            with open(metaPath, encoding="utf-8") as f:
+                meta = json.load(f)
+
+            if meta.get("url") == url:
+                return meta.get("validator", "")
+        except Exception:
+            pass
+
+        return ""
+
+    @classmethod
+    def _writePartMeta(cls, metaPath: str, url: str, validator: str):
+        with open(metaPath, "w", encoding="utf-8") as f:
+            json.dump({"url": url, "validator": validator}, f)
+
+    @classmethod
+    def _removeFiles(cls, *paths: str):
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    @classmethod
+    def _hashFile(cls, path: str, hasher):
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                hasher.update(chunk)
+
+    @classmethod
+    def _commitFile(cls, file, partPath: str, fullPath: str):
+        """落盘并原子替换目标文件"""
+        file.flush()
+        os.fsync(file.fileno())
+        file.close()
+        os.replace(partPath, fullPath)
+
+    @classmethod
+    async def _download(
+        cls,
+        client: "httpx.AsyncClient",
+        url: str,
+        savePath: str,
+        fileName: str,
+        *,
+        params: dict | None,
+        jsonData: dict | None,
+        showProgress: bool,
+        sha256: str | None,
+        chunkSize: int,
+        resume: bool,
+    ) -> bool:
+        """下载文件的实际实现，异常由调用方处理"""
+        import httpx
+        from rich.progress import (
+            BarColumn,
+            DownloadColumn,
+            Progress,
+            TextColumn,
+            TimeRemainingColumn,
+            TransferSpeedColumn,
+        )
+
+        fullPath = os.path.join(savePath, fileName)
+        partPath = f"{fullPath}.part"
+        metaPath = f"{partPath}.json"
+        await asyncio.to_thread(os.makedirs, savePath, exist_ok=True)
+
+        headers = {"token": cls.m_sTokens}
+
+        # 只有记录了服务端校验标识的 .part 才续传，文件变更时服务端会返回完整内容
+        offset = 0
+        validator = ""
+        if resume and os.path.exists(partPath):
+            validator = await asyncio.to_thread(cls._readPartMeta, metaPath, url)
+            if validator:
+                offset = os.path.getsize(partPath)
+                headers["Range"] = f"bytes={offset}-"
+                headers["If-Range"] = validator
+
+        requestArgs: dict = {"headers": headers}
+        if params:
+            requestArgs["params"] = params
+        if jsonData:
+            requestArgs["json"] = jsonData
+
+        async with client.stream(
+            "GET", url, **requestArgs, follow_redirects=True
+        ) as response:
+            if response.status_code == 416:
+                # 续传范围无效，丢弃 .part 交由下次重试完整下载
+                await asyncio.to_thread(cls._removeFiles, partPath, metaPath)
+                return False
+
+            if response.status_code not in (200, 206):
+                await response.aread()
+                logger.warning(
+                    f"文件下载失败: HTTP {response.status_code} {response.text}"
                 )
 
-                if response.status_code != 200:
-                    logger.warning(
-                        f"文件下载失败: HTTP {response.status_code} {response.text}"
+                if response.status_code >= 500:
+                    raise httpx.RequestError(
+                        f"HTTP {response.status_code}", request=response.request
                     )
+                return False
+
+            if response.status_code == 200:
+                offset = 0
+
+            contentLength = int(response.headers.get("Content-Length", 0))
+            totalLength = offset + contentLength if contentLength else 0
+
+            validator = response.headers.get("ETag") or response.headers.get(
+                "Last-Modified", ""
+            )
+            if resume and validator:
+                await asyncio.to_thread(cls._writePartMeta, metaPath, url, validator)
+            else:
+                await asyncio.to_thread(cls._removeFiles, metaPath)
+
+            hasher = hashlib.sha256() if sha256 else None
+            if hasher and offset:
+                await asyncio.to_thread(cls._hashFile, partPath, hasher)
+
+            file = await asyncio.to_thread(open, partPath, "ab" if offset else "wb")
+            try:
+                with ExitStack() as stack:
+                    progress = None
+                    task = None
+                    if showProgress:
+                        progress = stack.enter_context(
+                            Progress(
+                                TextColumn("[progress.description]{task.description}"),
+                                BarColumn(),
+                                DownloadColumn(),
+                                TransferSpeedColumn(),
+                                TimeRemainingColumn(),
+                                transient=True,
+                            )
+                        )
+                        task = progress.add_task(
+                            f"[green]【真寻农场】正在下载 {fileName}",
+                            total=totalLength or None,
+                            completed=offset,
+                        )
+
+                    buffer = bytearray()
+                    pending = 0
+                    lastUpdate = time.monotonic()
+
+                    async for chunk in response.aiter_bytes(chunk_size=chunkSize):
+                        buffer += chunk
+                        if hasher:
+                            hasher.update(chunk)
+
+                        if len(buffer) >= cls.m_iDownloadWriteBuffer:
+                            await asyncio.to_thread(file.write, bytes(buffer))
+                            buffer.clear()
+
+                        if progress is not None and task is not None:
+                            pending += len(chunk)
+                            now = time.monotonic()
+                            if now - lastUpdate >= cls.m_fProgressInterval:
+                                progress.advance(task, pending)
+                                pending = 0
+                                lastUpdate = now
+
+                    if buffer:
+                        await asyncio.to_thread(file.write, bytes(buffer))
+
+                    if progress is not None and task is not None and pending:
+                        progress.advance(task, pending)
+
+                if hasher and hasher.hexdigest() != sha256:
+                    logger.warning(f"文件校验失败: {fileName} sha256 不匹配")
+                    await asyncio.to_thread(file.close)
+                    await asyncio.to_thread(cls._removeFiles, partPath, metaPath)
                     return False
 
-                totalLength = int(response.headers.get("Content-Length", 0))
-                fullPath = os.path.join(savePath, fileName)
-                os.makedirs(os.path.dirname(fullPath), exist_ok=True)
-
-                with Progress(
-                    TextColumn("[progress.description]{task.description}"),
-                    BarColumn(),
-                    DownloadColumn(),
-                    TransferSpeedColumn(),
-                    TimeRemainingColumn(),
-                    transient=True,
-                ) as progress:
-                    task = progress.add_task(
-                        f"[green]【真寻农场】正在下载 {fileName}", total=totalLength
-                    )
+                await asyncio.to_thread(cls._commitFile, file, partPath, fullPath)
+                await asyncio.to_thread(cls._removeFiles, metaPath)
+            finally:
+                if not file.closed:
+                    await asyncio.to_thread(file.close)
 
-                    with open(fullPath, "wb") as f:
-                        async for chunk in response.aiter_bytes(chunk_size=1024):
-                            f.write(chunk)
-                            progress.advance(task, len(chunk))
+        return True
 
-                return True
+    @classmethod
+    async def downloadFiles(
+        cls,
+        tasks: list[tuple],
+        name: str = "资源文件",
+        concurrency: int | None = None,
+        retries: int | None = None,
+    ) -> dict:
+        """以有限并发批量下载文件，失败自动退避重试，仅显示一个总进度条
 
-        except Exception as e:
-            logger.warning(f"下载文件异常: {e}")
-            return False
+        Args:
+            tasks (list[tuple]): 下载任务列表，每项为 (url, 保存文件夹路径, 文件名[, sha256])
+            name (str, optional): 进度条与日志中显示的名称
+            concurrency (int | None, optional): 最大并发数，不传使用默认值
+            retries (int | None, optional): 单个文件最大重试次数，不传使用默认值
+
+        Returns:
+            dict: 下载报告 {"total": 总数, "success": 成功数, "failed": [{"url", "path", "attempts"}]}
+        """
+        report = {"total": len(tasks), "success": 0, "failed": []}
+        if not tasks:
+            return report
+
+        concurrency = max(1, concurrency or cls.m_iDownloadConcurrency)
+        retries = max(1, retries or cls.m_iDownloadRetries)
+
+        queue: asyncio.Queue[tuple] = asyncio.Queue()
+        for task in tasks:
+            queue.put_nowait(task)
+
+        import httpx
+        from rich.progress import BarColumn, Progress, TextColumn, TimeRemainingColumn
+
+        limits = httpx.Limits(
+            max_connections=concurrency, max_keepalive_connections=concurrency
+        )
+
+        async with httpx.AsyncClient(timeout=30.0, limits=limits) as client:
+            with Progress(
+                TextColumn("[progress.description]{task.description}"),
+                BarColumn(),
+                TextColumn("{task.completed}/{task.total}"),
+                TimeRemainingColumn(),
+                transient=True,
+            ) as progress:
+                bar = progress.add_task(
+                    f"[green]【真寻农场】正在下载 {name}", total=len(tasks)
+                )
+
+                async def worker():
+                    while True:
+                        try:
+                            url, savePath, fileName, *rest = queue.get_nowait()
+                        except asyncio.QueueEmpty:
+                            return
+
+                        sha256 = rest[0] if rest else None
+
+                        attempts = 0
+                        success = False
+                        while attempts < retries and not success:
+                            if attempts > 0:
+                                await asyncio.sleep(
+                                    cls.m_fDownloadBackoff * (2 ** (attempts - 1))
+                                )
+
+                            attempts += 1
+                            success = await cls.download(
+                                url,
+                                savePath,
+                                fileName,
+                                client=client,
+                                showProgress=False,
+                                sha256=sha256,
+                            )
+
+                        if success:
+                            report["success"] += 1
+                        else:
+                            report["failed"].append(
+                                {
+                                    "url": url,
+                                    "path": os.path.join(savePath, fileName),
+                                    "attempts": attempts,
+                                }
+                            )
+
+                        progress.advance(bar)
+
+                await asyncio.gather(
+                    *(worker() for _ in range(min(concurrency, len(tasks))))
+                )
+
+        if report["failed"]:
+            logger.warning(
+                f"{name}下载完成，成功{report['success']}个，失败{len(report['failed'])}个"
+            )
+        else:
+            logger.info(f"{name}下载完成，共{report['success']}个")
+
+        return report
 
     @classmethod
     async def post(cls, endpoint: str, name: str = "", jsonData: dict = {}) -> dict:
@@ -108,10 +562,22 @@ class CRequestManager:
         url = f"{baseUrl.rstrip('/')}:8998/{endpoint.lstrip('/')}"
         headers = {"token": cls.m_sTokens}
 
+        allowed, trial = cls.allowRequest(url, name)
+        if not allowed:
+            return {}
+
+        import httpx
+
+        breaker = cls.breaker(url)
         try:
             async with httpx.AsyncClient(timeout=5.0) as client:
                 response = await client.post(url, json=jsonData, headers=headers)
 
+                if response.status_code >= 500:
+                    breaker.recordFailure(trial)
+                else:
+                    breaker.recordSuccess(trial)
+
                 if response.status_code == 200:
                     return response.json()
                 else:
@@ -120,47 +586,182 @@ class CRequestManager:
                     )
                     return {}
         except httpx.RequestError as e:
+            breaker.recordFailure(trial)
             logger.warning(f"{name}请求异常", e=e)
             return {}
         except Exception as e:
             logger.warning(f"{name}处理异常", e=e)
             return {}
+        finally:
+            if trial:
+                breaker.releaseTrial()
 
     @classmethod
-    async def get(cls, endpoint: str, name: str = "") -> dict:
+    async def get(
+        cls, endpoint: str, name: str = "", ttl: float | None = None
+    ) -> dict:
         """发送GET请求到指定接口，统一调用，仅支持无体的查询
 
+        响应会按地址缓存：有效期内直接返回缓存；过期后携带 ETag/Last-Modified
+        发起条件请求；请求失败时在容忍期内返回旧缓存。
+        相同地址的并发请求只会发出一次
+
         Args:
             endpoint (str): 请求的接口路径
             name (str, optional): 操作名称用于日志记录
+            ttl (float | None, optional): 缓存有效期 单位:秒，不传使用默认值，0为不使用本地有效期
 
         Returns:
             dict: 返回请求结果的JSON数据
         """
         baseUrl = Config.get_config("zhenxun_plugin_farm", "服务地址")
         url = f"{baseUrl.rstrip('/')}:8998/{endpoint.lstrip('/')}"
+
+        if ttl is None:
+            ttl = cls.m_fCacheTTL
+
+        cache = cls._loadCache()
+        entry = cache.get(url)
+        if entry and time.time() - entry.get("fetchedAt", 0) < ttl:
+            return entry["data"]
+
+        return await cls.singleFlight(f"GET {url}", lambda: cls._get(url, name))
+
+    @classmethod
+    async def _get(cls, url: str, name: str) -> dict:
         headers = {"token": cls.m_sTokens}
 
+        cache = cls._loadCache()
+        entry = cache.get(url)
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("lastModified"):
+                headers["If-Modified-Since"] = entry["lastModified"]
+
+        allowed, trial = cls.allowRequest(url, name)
+        if not allowed:
+            return cls._staleData(entry, name)
+
+        import httpx
+
+        breaker = cls.breaker(url)
         try:
             async with httpx.AsyncClient(timeout=5.0) as client:
                 response = await client.get(url, headers=headers)
 
+                if response.status_code >= 500:
+                    breaker.recordFailure(trial)
+                else:
+                    breaker.recordSuccess(trial)
+
+                if response.status_code == 304 and entry:
+                    entry["fetchedAt"] = time.time()
+                    await cls._saveCache()
+                    return entry["data"]
+
                 if response.status_code == 200:
-                    return response.json()
+                    data = response.json()
+
+                    cache[url] = {
+                        "data": data,
+                        "etag": response.headers.get("ETag", ""),
+                        "lastModified": response.headers.get("Last-Modified", ""),
+                        "fetchedAt": time.time(),
+                    }
+                    await cls._saveCache()
+                    return data
                 else:
                     logger.warning(
                         f"{name}请求失败: HTTP {response.status_code} {response.text}"
                     )
-                    return {}
         except httpx.RequestError as e:
+            breaker.recordFailure(trial)
             logger.warning(f"{name}请求异常", e=e)
-            return {}
         except Exception as e:
             logger.warning(f"{name}处理异常", e=e)
+        finally:
+            if trial:
+                breaker.releaseTrial()
+
+        return cls._staleData(entry, name)
+
+    @classmethod
+    def _staleData(cls, entry: dict | None, name: str) -> dict:
+        """请求失败时，在容忍期内返回旧缓存，离线模式下不限制缓存时长"""
+        if not entry:
             return {}
 
+        if (
+            cls.isOffline()
+            or time.time() - entry.get("fetchedAt", 0) < cls.m_fStaleIfError
+        ):
+            logger.debug(f"{name}使用缓存数据")
+            return entry["data"]
+
+        return {}
+
+    @classmethod
+    def _loadCache(cls) -> dict:
+        """读取响应缓存，首次调用时从磁盘加载"""
+        if cls.m_pCache is None:
+            try:
+                with open(g_sHttpCachePath, encoding="utf-8") as f:
+                    cls.m_pCache = json.load(f)
+            except FileNotFoundError:
+                cls.m_pCache = {}
+            except Exception as e:
+                logger.warning(f"读取响应缓存失败: {e}")
+                cls.m_pCache = {}
+
+        return cls.m_pCache  # type: ignore
+
+    @classmethod
+    async def _saveCache(cls):
+        def save(data: str):
+            tempPath = f"{g_sHttpCachePath}.tmp"
+            os.makedirs(os.path.dirname(g_sHttpCachePath), exist_ok=True)
+            with open(tempPath, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tempPath, g_sHttpCachePath)
+
+        try:
+            data = json.dumps(cls._loadCache(), ensure_ascii=False)
+            await asyncio.to_thread(save, data)
+        except Exception as e:
+            logger.warning(f"写入响应缓存失败: {e}")
+
+    @classmethod
+    async def singleFlight(cls, key: str, factory):
+        """合并相同key的并发调用，只执行一次并共享结果
+
+        Args:
+            key (str): 合并依据
+            factory: 无参函数，返回需要执行的协程
+
+        Returns:
+            协程的返回值
+        """
+        task = cls.m_pInflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            cls.m_pInflight[key] = task
+            task.add_done_callback(lambda _: cls.m_pInflight.pop(key, None))
+
+        # 单个等待方被取消时不影响其他等待方
+        return await asyncio.shield(task)
+
     @classmethod
     async def initSignInFile(cls) -> bool:
+        """检查签到文件是否为当月文件，否则重新下载，并发调用只会执行一次
+
+        Returns:
+            bool: 签到文件是否可用
+        """
+        return await cls.singleFlight("initSignInFile", cls._initSignInFile)
+
+    @classmethod
+    async def _initSignInFile(cls) -> bool:
         if os.path.exists(g_sSignInPath):
             try:
                 with open(g_sSignInPath, encoding="utf-8") as f:
@@ -175,7 +776,12 @@ class CRequestManager:
                     return True
                 else:
                     logger.warning("真寻农场签到文件检查失败, 即将下载")
-                    return await cls.downloadSignInFile()
+                    if await cls.downloadSignInFile():
+                        return True
+
+                    # 下载失败时继续使用上一次成功下载的签到文件
+                    logger.warning("签到文件下载失败，继续使用本地签到文件")
+                    return True
             except json.JSONDecodeError:
                 logger.warning("真寻农场签到文件格式错误, 即将下载")
                 return await cls.downloadSignInFile()
@@ -184,7 +790,7 @@ class CRequestManager:
 
     @classmethod
     async def downloadSignInFile(cls) -> bool:
-        """下载签到文件，并重命名为 sign_in.json
+        """下载签到文件，下载完成后原子替换 sign_in.json
 
         Returns:
             bool: 是否下载成功
@@ -195,31 +801,29 @@ class CRequestManager:
             path = str(g_sSignInPath.parent.resolve(strict=False))
             yearMonth = g_pToolManager.dateTime().now().strftime("%Y%m")
 
-            # 下载为 signTemp.json
-            success = await cls.download(
+            # 签到文件内容随请求月份变化，不进行断点续传
+            return await cls.download(
                 url=url,
                 savePath=path,
-                fileName="signTemp.json",
+                fileName=g_sSignInPath.name,
                 jsonData={"date": yearMonth},
+                resume=False,
             )
-
-            if not success:
-                return False
-
-            # 重命名为 sign_in.json
-            g_pToolManager.renameFile(f"{path}/signTemp.json", "sign_in.json")
-            return True
         except Exception as e:
             logger.error("下载签到文件失败", e=e)
             return False
 
     @classmethod
     async def initPlantDBFile(cls) -> bool:
-        """检查本地 plant.db 版本，如远程版本更新则重新下载
+        """检查本地 plant.db 版本，如远程版本更新则重新下载，并发调用只会执行一次
 
         Returns:
             bool: 是否为最新版或成功更新
         """
+        return await cls.singleFlight("initPlantDBFile", cls._initPlantDBFile)
+
+    @classmethod
+    async def _initPlantDBFile(cls) -> bool:
         versionPath = os.path.join(os.path.dirname(g_sPlantPath), "version.json")
 
         try:
@@ -238,20 +842,22 @@ class CRequestManager:
 
         if float(remoteVersion) <= float(localVersion):
             logger.debug("plant.db 已为最新版本")
+
+            # 作物数据未更新时也需要修复缺失或损坏的资源文件
+            await g_pDBService.plant.downloadPlant()
             return True
 
         logger.warning(
             f"发现新版本 plant.db（远程: {remoteVersion} / 本地: {localVersion}），开始更新..."
         )
 
-        # 先断开数据库连接
-        await g_pDBService.cleanup()
-
         return await cls.downloadPlantDBFile(remoteVersion)
 
     @classmethod
     async def downloadPlantDBFile(cls, remoteVersion: float) -> bool:
-        """下载最新版 plant.db 并更新本地 version.json
+        """下载最新版 plant.db 并热替换，随后更新本地 version.json
+
+        新文件先下载为旁路文件，校验通过后才会替换，替换期间指令照常使用旧版本
 
         Args:
             remoteVersion (float): 远程版本号
@@ -262,31 +868,56 @@ class CRequestManager:
         baseUrl = Config.get_config("zhenxun_plugin_farm", "服务地址")
 
         savePath = os.path.dirname(g_sPlantPath)
+        sideName = f"{g_sPlantPath.stem}Next{g_sPlantPath.suffix}"
         success = await cls.download(
             url=f"{baseUrl.rstrip('/')}:8998/file/plant.db",
             savePath=savePath,
-            fileName="plantTemp.db",
+            fileName=sideName,
         )
 
         if not success:
             return False
 
-        # 重命名为 sign_in.json
-        g_pToolManager.renameFile(f"{savePath}/plantTemp.db", "plant.db")
+        if not await g_pDBService.plant.swapDBFile(os.path.join(savePath, sideName)):
+            g_pToolManager.removeFile(os.path.join(savePath, sideName))
+            return False
 
         versionPath = os.path.join(savePath, "version.json")
         try:
-            with open(versionPath, "w", encoding="utf-8") as f:
+            with open(f"{versionPath}.tmp", "w", encoding="utf-8") as f:
                 json.dump({"version": remoteVersion}, f)
+            os.replace(f"{versionPath}.tmp", versionPath)
             logger.debug("版本文件已更新")
         except Exception as e:
             logger.warning(f"写入版本文件失败: {e}")
             return False
 
-        await g_pDBService.plant.init()
-        await g_pDBService.plant.downloadPlant()
+        # 资源文件同步耗时较长，放到后台执行
+        cls.createTask(g_pDBService.plant.downloadPlant())
 
         return True
 
+    @classmethod
+    def createTask(cls, coro) -> asyncio.Task:
+        """创建后台任务并持有引用，避免任务被提前回收
+
+        Args:
+            coro: 协程对象
+
+        Returns:
+            asyncio.Task: 后台任务
+        """
+        task = asyncio.create_task(coro)
+        cls.m_pTasks.add(task)
+        task.add_done_callback(cls._taskDone)
+        return task
+
+    @classmethod
+    def _taskDone(cls, task: asyncio.Task):
+        cls.m_pTasks.discard(task)
+
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("农场后台任务出错", e=task.exception())
+
 
 g_pRequestManager = CRequestManager()
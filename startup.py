@@ -0,0 +1,144 @@
+import asyncio
+import inspect
+import time
+
+from zhenxun.services.log import logger
+
+from . import config
+from .request import g_pRequestManager
+
+
+class CStartupStop(Exception):
+    """启动步骤主动终止启动，如仅预估数据库迁移时
+
+    插件不进入就绪状态，但不视为启动失败，不影响其他插件
+    """
+
+
+class CStartupStep:
+    def __init__(
+        self, name: str, func, depends: tuple, critical: bool, background: bool
+    ):
+        self.m_sName = name
+        self.m_pFunc = func
+        self.m_pDepends = depends
+        # 关键步骤失败时插件无法正常工作，启动直接失败
+        self.m_bCritical = critical
+        # 后台步骤不阻塞启动，也不影响就绪状态
+        self.m_bBackground = background
+
+
+class CStartupManager:
+    """插件启动编排
+
+    各步骤按依赖关系组成有向无环图，没有依赖关系的步骤并发执行，
+    依赖的步骤失败时跳过后续步骤。前台步骤全部完成后插件进入就绪状态，
+    后台步骤（如访问服务端的更新检查）在就绪后继续执行
+    """
+
+    def __init__(self):
+        self.m_pSteps: dict[str, CStartupStep] = {}
+        # 步骤名 -> 耗时（秒），跳过的步骤不记录
+        self.m_pTiming: dict[str, float] = {}
+        # 主动终止启动的原因，为空表示没有步骤要求终止
+        self.m_sStopReason = ""
+
+    def addStep(
+        self,
+        name: str,
+        func,
+        depends: tuple = (),
+        critical: bool = True,
+        background: bool = False,
+    ):
+        """添加启动步骤，依赖的步骤需要先添加
+
+        Args:
+            name (str): 步骤名称
+            func: 无参函数或协程函数，返回 False 视为失败
+            depends (tuple, optional): 依赖的步骤名称
+            critical (bool, optional): 失败时是否终止启动
+            background (bool, optional): 是否在后台执行
+        """
+        for depend in depends:
+            if depend not in self.m_pSteps:
+                raise ValueError(f"启动步骤 {name} 依赖的 {depend} 尚未添加")
+
+        self.m_pSteps[name] = CStartupStep(name, func, depends, critical, background)
+
+    async def _runStep(self, step: CStartupStep, tasks: dict) -> bool:
+        for depend in step.m_pDepends:
+            if not await tasks[depend]:
+                logger.warning(f"启动步骤 {step.m_sName} 已跳过：依赖 {depend} 未完成")
+                return False
+
+        start = time.perf_counter()
+        try:
+            result = step.m_pFunc()
+            if inspect.isawaitable(result):
+                result = await result
+        except CStartupStop as e:
+            self.m_pTiming[step.m_sName] = time.perf_counter() - start
+            self.m_sStopReason = str(e)
+            logger.info(f"启动步骤 {step.m_sName} 终止启动：{e}")
+            return False
+        except Exception as e:
+            logger.error(f"启动步骤 {step.m_sName} 出错", e=e)
+            result = False
+
+        self.m_pTiming[step.m_sName] = time.perf_counter() - start
+        if result is False:
+            logger.warning(f"启动步骤 {step.m_sName} 失败")
+            return False
+
+        if step.m_bBackground:
+            logger.debug(
+                f"后台启动步骤 {step.m_sName} 完成，"
+                f"耗时 {self.m_pTiming[step.m_sName] * 1000:.1f} ms"
+            )
+
+        return True
+
+    async def run(self) -> bool:
+        """执行所有启动步骤，前台步骤完成后返回
+
+        Returns:
+            bool: 关键步骤是否全部成功，有步骤主动终止启动时同样返回 False，
+            可通过 m_sStopReason 区分
+        """
+        config.g_bReady = False
+        self.m_pTiming.clear()
+        self.m_sStopReason = ""
+
+        start = time.perf_counter()
+        tasks: dict[str, asyncio.Task] = {}
+        for name, step in self.m_pSteps.items():
+            tasks[name] = asyncio.ensure_future(self._runStep(step, tasks))
+
+            # 后台步骤交由请求管理器持有引用，避免被提前回收
+            if step.m_bBackground:
+                g_pRequestManager.m_pTasks.add(tasks[name])
+                tasks[name].add_done_callback(g_pRequestManager.m_pTasks.discard)
+
+        foreground = [
+            name for name, step in self.m_pSteps.items() if not step.m_bBackground
+        ]
+        results = await asyncio.gather(*(tasks[name] for name in foreground))
+
+        total = time.perf_counter() - start
+        timing = "，".join(
+            f"{name} {self.m_pTiming[name] * 1000:.1f} ms"
+            for name in foreground
+            if name in self.m_pTiming
+        )
+        logger.info(f"真寻农场启动耗时 {total * 1000:.1f} ms（{timing}）")
+
+        for name, result in zip(foreground, results):
+            if not result and self.m_pSteps[name].m_bCritical:
+                return False
+
+        config.g_bReady = True
+        return True
+
+
+g_pStartupManager = CStartupManager()
@@ -5,12 +5,27 @@ from zoneinfo import ZoneInfo
 from zhenxun.services.log import logger
 from zhenxun.utils.message import MessageUtils
 
+from . import config
 from .dbService import g_pDBService
 
 
 class CToolManager:
+    @classmethod
+    async def isReady(cls) -> bool:
+        """插件是否启动完毕，未就绪时回复提示"""
+        if not config.g_bReady:
+            await MessageUtils.build_message(
+                config.g_sTranslation["basic"]["notReady"]
+            ).send()
+            return False
+
+        return True
+
     @classmethod
     async def isRegisteredByUid(cls, uid: str) -> bool:
+        if not await cls.isReady():
+            return False
+
         result = await g_pDBService.user.isUserExist(uid)
 
         if not result:
@@ -96,6 +111,25 @@ class CToolManager:
             logger.warning(f"文件重命名失败: {e}")
             return False
 
+    @classmethod
+    def removeFile(cls, filePath: str) -> bool:
+        """删除文件，文件不存在时视为成功
+
+        Args:
+            filePath (str): 文件完整路径
+
+        Returns:
+            bool: 删除成功返回 True，否则返回 False
+        """
+        try:
+            os.remove(filePath)
+            return True
+        except FileNotFoundError:
+            return True
+        except Exception as e:
+            logger.warning(f"文件删除失败: {e}")
+            return False
+
     @classmethod
     def dateTime(cls) -> datetime:
         tz = ZoneInfo("Asia/Shanghai")